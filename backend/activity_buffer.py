@@ -0,0 +1,226 @@
+"""Write-behind batching for activity events.
+
+A PDF page view or video tick used to be its own transaction (and fsync).
+ActivityBuffer collects events in memory and writes a whole batch in one
+transaction: every raw row goes into activities (still the source of
+truth for rollups.backfill), while the rollup upserts are coalesced per
+(user, type, day). A batch is written when it reaches max_events or
+max_delay seconds after the last write, whichever comes first.
+
+Durability modes (ACTIVITY_DURABILITY):
+
+- buffered (default): acknowledged once in memory. A crash loses at most
+  the last max_delay seconds; a batch that hit a database error (locked,
+  busy, I/O) is retried with the next one, up to max_attempts times.
+- group: the request waits for the batch holding its events to commit
+  (group commit), so an OK means on disk, at up to max_delay added latency.
+- sync: the request writes straight away, as before, one transaction per call.
+
+A batch rejected for its data rather than the database (a value SQLite
+can't store, say) is written again one row per transaction, and only the
+rows that still fail are dropped and logged, so one bad event can't wedge
+everyone else's.
+
+close() writes whatever is pending; the app calls it at exit.
+"""
+import os
+import sqlite3
+import threading
+
+import rollups
+
+DURABILITY_MODES = ("buffered", "group", "sync")
+
+
+class ActivityWriteFailed(Exception):
+    pass
+
+
+class _Batch:
+    def __init__(self):
+        self.rows = []  # (user_id, activity_type, value, day)
+        self.totals = {}  # (user_id, activity_type, day) -> [value, count]
+        self.done = threading.Event()
+        self.error = None
+        self.attempts = 0
+
+    def add(self, user_id, activity_type, value, day):
+        self.rows.append((user_id, activity_type, value, day))
+        totals = self.totals.setdefault((user_id, activity_type, day), [0, 0])
+        totals[0] += value
+        totals[1] += 1
+
+    def merge(self, other):
+        for row in other.rows:
+            self.add(*row)
+
+
+class ActivityBuffer:
+    def __init__(self, pool, max_events=500, max_delay=1.0, durability="buffered", wait_timeout=10.0, on_flush=None,
+                 max_attempts=10):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"durability must be one of {', '.join(DURABILITY_MODES)}, not {durability!r}")
+        self.pool = pool
+        self.max_events = max_events
+        self.max_delay = max_delay
+        self.durability = durability
+        self.wait_timeout = wait_timeout
+        self.max_attempts = max_attempts
+        self.on_flush = on_flush  # called with the set of user ids after each committed batch
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # one batch write at a time
+        self._wake = threading.Event()
+        self._batch = _Batch()
+        self._pending_users = set()
+        self._started = False
+        self.closed = False
+        self.counters = {"events": 0, "flushes": 0, "rows_written": 0, "rollup_upserts": 0, "write_errors": 0,
+                         "dropped": 0}
+
+    @classmethod
+    def from_env(cls, pool, on_flush=None):
+        return cls(
+            pool,
+            max_events=int(os.getenv("ACTIVITY_BATCH_SIZE", "500")),
+            max_delay=float(os.getenv("ACTIVITY_FLUSH_SECONDS", "1.0")),
+            durability=os.getenv("ACTIVITY_DURABILITY", "buffered"),
+            on_flush=on_flush,
+            max_attempts=int(os.getenv("ACTIVITY_MAX_ATTEMPTS", "10"))
+        )
+
+    def start(self, spawn):
+        if self._started or self.durability == "sync":
+            return
+        self._started = True
+        spawn(self._run)
+
+    def record(self, events):
+        """Queue [(user_id, activity_type, value, day)]; returns once the durability mode allows"""
+        if self.closed:
+            raise ActivityWriteFailed("Activity buffer is closed")
+        with self._lock:
+            batch = self._batch
+            for user_id, activity_type, value, day in events:
+                batch.add(user_id, activity_type, value, day)
+                self._pending_users.add(user_id)
+            self.counters["events"] += len(events)
+            full = len(batch.rows) >= self.max_events
+        if self.durability == "sync" or not self._started:
+            self.flush()
+        elif full:
+            self._wake.set()
+        if self.durability != "buffered":
+            if not batch.done.wait(self.wait_timeout):
+                raise ActivityWriteFailed(f"Activity batch not written after {self.wait_timeout} s")
+            if batch.error is not None:
+                raise ActivityWriteFailed(f"Activity batch failed: {batch.error}")
+
+    def flush(self):
+        """Write everything queued so far in one transaction; returns the number of events written"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._batch = self._batch, _Batch()
+                self._pending_users = set()
+            if not batch.rows:
+                batch.done.set()
+                return 0
+            try:
+                self._write(batch.rows, batch.totals)
+            except sqlite3.OperationalError as e:
+                # The database, not the data: locked, busy, out of disk
+                with self._lock:
+                    self.counters["write_errors"] += 1
+                    batch.attempts += 1
+                    if self.durability == "buffered" and not self.closed and batch.attempts < self.max_attempts:
+                        # Nobody is waiting on these: keep them for the next attempt
+                        batch.merge(self._batch)
+                        self._batch = batch
+                        self._pending_users.update(row[0] for row in batch.rows)
+                        print(f"⚠️ Activity batch write failed, will retry: {e}")
+                        return 0
+                    self.counters["dropped"] += len(batch.rows)
+                batch.error = e
+                batch.done.set()
+                print(f"❌ Activity batch write failed, {len(batch.rows)} events lost: {e}")
+                return 0
+            except Exception as e:
+                with self._lock:
+                    self.counters["write_errors"] += 1
+                print(f"⚠️ Activity batch rejected ({e}), writing its events one by one")
+                return self._salvage(batch)
+            return self._written(batch, batch.rows, len(batch.totals))
+
+    def _write(self, rows, totals):
+        """rows into activities and totals into the rollups, in one transaction"""
+        with self.pool.connection() as conn:
+            try:
+                conn.executemany("""INSERT INTO activities (user_id, activity_type, value, activity_date)
+                                    VALUES (?, ?, ?, ?)""", rows)
+                for (user_id, activity_type, day), (value, count) in totals.items():
+                    rollups.record_activity(conn, user_id, activity_type, value, day, count)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    def _salvage(self, batch):
+        """Write a rejected batch one row per transaction, dropping the rows that still fail"""
+        written = []
+        for row in batch.rows:
+            user_id, activity_type, value, day = row
+            try:
+                self._write([row], {(user_id, activity_type, day): (value, 1)})
+                written.append(row)
+            except Exception as e:
+                batch.error = e
+                with self._lock:
+                    self.counters["dropped"] += 1
+                print(f"❌ Dropped activity event {row}: {e}")
+        return self._written(batch, written, len(written))
+
+    def _written(self, batch, rows, upserts):
+        with self._lock:
+            self.counters["flushes"] += 1
+            self.counters["rows_written"] += len(rows)
+            self.counters["rollup_upserts"] += upserts
+        if rows and self.on_flush is not None:
+            self.on_flush({row[0] for row in rows})
+        batch.done.set()
+        return len(rows)
+
+    def flush_user(self, user_id):
+        """Write pending events first if user_id has any, so its reads see them"""
+        with self._lock:
+            pending = user_id in self._pending_users
+        if pending:
+            self.flush()
+
+    def pending(self):
+        with self._lock:
+            return len(self._batch.rows)
+
+    def _run(self):
+        while not self.closed:
+            self._wake.wait(self.max_delay)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ Activity flush loop error: {e}")
+
+    def close(self):
+        """Write what's left; later record() calls fail"""
+        if self.closed:
+            return
+        written = self.flush()
+        self.closed = True
+        self._wake.set()
+        if written:
+            print(f"🗄️ Flushed {written} buffered activity events on shutdown")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["pending"] = len(self._batch.rows)
+        stats.update(durability=self.durability, max_events=self.max_events, max_delay=self.max_delay)
+        return stats
@@ -1,94 +1,173 @@
 import eventlet
 eventlet.monkey_patch()
-from flask import Flask, request, jsonify
+from boot import BootTimer, Deferred  # first, so boot timings include the imports below
+from flask import Blueprint, Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 from flask_socketio import SocketIO, join_room, leave_room, emit
-from jose import jwt
-import requests
 import subprocess
 import tempfile
 import os
 import sys
+import atexit
+import signal
+import json
+import math
+import uuid
 import time
-import sqlite3
+import threading
+import re
+from contextlib import contextmanager
+from functools import wraps
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from http_client import get_http_client
+from auth import JWKSCache, TokenVerifier
+from response_cache import ResponseCache
+from intent_router import classify_prompt, DEFAULT_INTENT
+from python_pool import PythonWorkerPool, PoolUnavailable
+from compile_cache import CompileCache
+from exec_scheduler import ExecutionScheduler, QueueFull
+from sandbox import ResourceLimits, run_program
+from db import ConnectionPool
+from migrations import migrate
+from leaderboard import Leaderboard
+import rollups
+import progress_history
+from matchmaking import QueueSizeBroadcaster, criteria as match_criteria
+import state_backend
+from presence import Presence
+from collab import EditRejected
+from identity import UserDirectory
+from http_cache import HttpCache
+from stats_counters import StatsReconciler
+from activity_buffer import ActivityBuffer, ActivityWriteFailed
 
 # Load environment variables
 load_dotenv()
-app = Flask(__name__)
-
-# Configure CORS for production
-CORS(app, 
-     origins=["*"],  # Allow all origins for now, restrict in production
-     methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-     allow_headers=["Content-Type", "Authorization"],
-     supports_credentials=True)
-
-socketio = SocketIO(app, 
-                   cors_allowed_origins="*", 
-                   async_mode="eventlet", 
-                   transports=["websocket", "polling"],
-                   logger=True,
-                   engineio_logger=True)
-  # Enable Socket.IO
+boot_timer = BootTimer()
+api = Blueprint("api", __name__)
+socketio = SocketIO()  # bound to the app in create_app()
+
 DB_PATH = 'progress.db'
+db_pool = ConnectionPool.from_env(DB_PATH)
+atexit.register(db_pool.close)
+
+def get_db():
+    """The request's pooled connection, returned to the pool at teardown"""
+    db_ready.ensure(DB_INIT_TIMEOUT)
+    if 'db' not in g:
+        g.db = db_pool.acquire()
+    return g.db
+
+def release_db(exc):
+    conn = g.pop('db', None)
+    if conn is not None:
+        db_pool.release(conn)
+
+APTITUDE_MAX_SCORE = int(os.getenv("APTITUDE_MAX_SCORE", "1000"))
+leaderboard = Leaderboard(max_score=APTITUDE_MAX_SCORE)
+
+# Polled reads are served from here until a write bumps their scope: ("user", id), "stats" or "leaderboard"
+http_cache = HttpCache.from_env()
+
+# Activity events are written in batches; registered after db_pool so it flushes before the pool closes
+activity_buffer = ActivityBuffer.from_env(db_pool, on_flush=lambda user_ids: http_cache.bump(
+    "stats", *(("user", user_id) for user_id in user_ids)))
+
+# /api/stats reads counters kept on write; this recounts them now and then and reports any drift
+stats_reconciler = StatsReconciler.from_env(db_pool, on_drift=lambda drift: http_cache.bump("stats"))
+atexit.register(activity_buffer.close)
+MAX_ACTIVITY_EVENTS = int(os.getenv("MAX_ACTIVITY_EVENTS", "500"))
+MAX_ACTIVITY_VALUE = int(os.getenv("MAX_ACTIVITY_VALUE", "100000"))
 
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS users
-                 (id INTEGER PRIMARY KEY, clerk_id TEXT UNIQUE, username TEXT)''')
-    c.execute('''CREATE TABLE IF NOT EXISTS logins
-                 (id INTEGER PRIMARY KEY, user_id INTEGER, login_date DATE)''')
-    c.execute('''CREATE TABLE IF NOT EXISTS activities
-                 (id INTEGER PRIMARY KEY, user_id INTEGER, activity_type TEXT, value INTEGER, activity_date DATE)''')
-    c.execute('''CREATE TABLE IF NOT EXISTS aptitude_scores
-                 (id INTEGER PRIMARY KEY, user_id INTEGER, score INTEGER, timestamp DATETIME)''')
-    conn.commit()
-    conn.close()
+    with db_pool.connection() as conn:
+        if migrate(conn):
+            # Schema changed: rebuild the progress rollups from the raw tables
+            print(f"🗄️ Backfilled progress rollups for {rollups.backfill(conn)} users")
+        leaderboard.load(conn)
 
-init_db()
+# Migrations and the leaderboard load run after boot; requests that need the DB wait here
+DB_INIT_TIMEOUT = float(os.getenv("DB_INIT_TIMEOUT", "30"))
+db_ready = Deferred("init_db", init_db, boot_timer)
 
 # Clerk + OpenRouter Configuration (unchanged)
-CLERK_JWKS_URL = "https://complete-hare-60.clerk.accounts.dev/.well-known/jwks.json"
+CLERK_JWKS_URL = os.getenv("CLERK_JWKS_URL", "https://complete-hare-60.clerk.accounts.dev/.well-known/jwks.json")
 CLERK_AUDIENCE = "pk_test_Y29tcGxldGUtaGFyZS02MC5jbGVyay5hY2NvdW50cy5kZXYk"
 CLERK_ISSUER = "https://complete-hare-60.clerk.accounts.dev"
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "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")
 
+OPENROUTER_CHAT_URL = "https://openrouter.ai/api/v1/chat/completions"
+
 YOUR_SITE_URL = "http://localhost:5173"
 YOUR_APP_NAME = "AlphaX"
 
-try:
-    jwks = requests.get(CLERK_JWKS_URL).json()
-except Exception as e:
-    print("Failed to fetch JWKS from Clerk:", e)
-    jwks = {"keys": []}
-
+http_client = get_http_client()
+response_cache = ResponseCache.from_env()
 
-def verify_clerk_token(token):
-    try:
-        header = jwt.get_unverified_header(token)
-        key = next((k for k in jwks["keys"] if k["kid"] == header["kid"]), None)
-        if not key:
-            raise Exception("Matching JWKS key not found.")
-        payload = jwt.decode(
-            token,
-            key,
-            algorithms=["RS256"],
-            audience=CLERK_AUDIENCE,
-            issuer=CLERK_ISSUER,
-        )
-        return payload
-    except Exception as e:
-        raise Exception(f"JWT verification failed: {str(e)}")
+jwks_cache = JWKSCache.from_env(CLERK_JWKS_URL, http_client)
+token_verifier = TokenVerifier.from_env(jwks_cache, CLERK_AUDIENCE, CLERK_ISSUER)
+# Fetched in the background after boot; a token that arrives first fetches on its kid miss
+jwks_prefetch = Deferred("jwks_prefetch", jwks_cache.refresh, boot_timer)
 
 
-@app.route("/")
+def verify_clerk_token(token):
+    return token_verifier.verify(token)
+
+user_directory = UserDirectory.from_env(on_create=lambda user: http_cache.bump("stats"))
+
+def require_user(create=False):
+    """Verify the bearer token and resolve its user into g.user (an identity.User)
+    and g.claims before the route runs. With create, a first-time user is inserted;
+    without, an unknown one gets a 404."""
+    def decorator(route):
+        @wraps(route)
+        def wrapper(*args, **kwargs):
+            token = request.headers.get('Authorization')
+            if not token:
+                return jsonify({"error": "No token provided"}), 401
+            try:
+                payload = verify_clerk_token(token.replace('Bearer ', ''))
+                clerk_id = payload['sub']
+            except Exception as e:
+                return jsonify({"error": str(e)}), 401
+            user = user_directory.resolve(get_db(), clerk_id, payload.get('username', 'Unknown'), create)
+            if user is None:
+                return jsonify({"error": "User not found"}), 404
+            g.user, g.claims = user, payload
+            return route(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@api.route("/")
 def index():
     return jsonify({"message": "Flask backend running!"})
 
-@app.route("/api/test", methods=['GET'])
+@api.route("/api/metrics", methods=['GET'])
+def metrics():
+    """Runtime counters for the backend's shared subsystems"""
+    return jsonify({
+        "http_pool": http_client.stats(),
+        "response_cache": response_cache.stats(),
+        "python_pool": python_pool.stats() if python_pool is not None else None,
+        "compile_cache": compile_cache.stats(),
+        "execution_scheduler": execution_scheduler.stats(),
+        "sandbox_limits": sandbox_limits.to_dict(),
+        "db_pool": db_pool.stats(),
+        "jwks": jwks_cache.stats(),
+        "auth": token_verifier.stats(),
+        "boot": boot_timer.report(),
+        "matchmaking": dict(matchmaker.stats(), broadcasts=queue_updates.stats()),
+        "socket_state": socket_state.stats(),
+        "presence": presence.stats(),
+        "activity_buffer": activity_buffer.stats(),
+        "user_directory": user_directory.stats(),
+        "http_cache": http_cache.stats(),
+        "stats_counters": stats_reconciler.stats()
+    })
+
+@api.route("/api/test", methods=['GET'])
 def test_endpoint():
     """Test endpoint without authentication"""
     return jsonify({
@@ -97,7 +176,7 @@ def test_endpoint():
         "timestamp": datetime.now().isoformat()
     })
 
-@app.route("/api/test_progress", methods=['GET'])
+@api.route("/api/test_progress", methods=['GET'])
 def test_progress():
     """Test progress endpoint without authentication"""
     return jsonify({
@@ -127,7 +206,7 @@ def test_progress():
     })
 
 
-@app.route("/api/chat", methods=["POST"])
+@api.route("/api/chat", methods=["POST"])
 def chat():
     print("🤖 Chat request received!")
     
@@ -145,9 +224,14 @@ def chat():
         if not prompt:
             return jsonify({"error": "Missing prompt"}), 400
 
+        cached = response_cache.get(prompt, conversation_history)
+        if cached is not None:
+            return jsonify({"response": cached, "cached": True})
+
         # Try OpenRouter API first (ChatGPT-like functionality)
         try:
             response_text = get_ai_response(prompt, conversation_history)
+            response_cache.put(prompt, conversation_history, response_text)
             return jsonify({"response": response_text})
         except Exception as api_error:
             print(f"⚠️ AI API failed: {str(api_error)}")
@@ -159,8 +243,8 @@ def chat():
         print(f"❌ Error in chat: {str(e)}")
         return jsonify({"error": f"Chat failed: {str(e)}"}), 500
 
-def get_ai_response(prompt, history=[]):
-    """Get response from OpenRouter API (ChatGPT-like functionality)"""
+def build_chat_request(prompt, history=[], stream=False):
+    """Build the OpenRouter headers and payload for a chat turn"""
     
     # Build conversation context
     messages = [
@@ -239,12 +323,20 @@ Always be thorough, accurate, and educational. Encourage learning through unders
         "frequency_penalty": 0,
         "presence_penalty": 0
     }
+    if stream:
+        payload["stream"] = True
+    
+    return headers, payload
+
+def get_ai_response(prompt, history=[]):
+    """Get response from OpenRouter API (ChatGPT-like functionality)"""
+    headers, payload = build_chat_request(prompt, history)
     
-    response = requests.post(
-        "https://openrouter.ai/api/v1/chat/completions",
+    response = http_client.post(
+        OPENROUTER_CHAT_URL,
         headers=headers,
         json=payload,
-        timeout=30
+        read_timeout=30
     )
     
     if response.status_code == 200:
@@ -253,14 +345,94 @@ Always be thorough, accurate, and educational. Encourage learning through unders
     else:
         raise Exception(f"API request failed: {response.status_code} - {response.text}")
 
-def get_enhanced_local_response(prompt):
-    """Enhanced local response system with more comprehensive answers"""
-    prompt_lower = prompt.lower()
+def stream_ai_response(prompt, history=[], cancel_event=None):
+    """Yield response tokens from OpenRouter as they are generated.
+
+    Closing the upstream response (on cancel or when the consumer goes away)
+    tells OpenRouter to stop generating, so abandoned streams stop billing tokens.
+    """
+    headers, payload = build_chat_request(prompt, history, stream=True)
+    
+    with http_client.stream("POST", OPENROUTER_CHAT_URL, headers=headers, json=payload) as response:
+        if response.status_code != 200:
+            raise Exception(f"API request failed: {response.status_code} - {response.text}")
+        
+        for line in response.iter_lines(decode_unicode=True):
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            # Skip keep-alive comments (": OPENROUTER PROCESSING") and blank lines
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            chunk = json.loads(data)
+            if "error" in chunk:
+                raise Exception(f"API stream failed: {chunk['error']}")
+            choices = chunk.get("choices") or [{}]
+            token = (choices[0].get("delta") or {}).get("content")
+            if token:
+                yield token
+
+def iter_chat_tokens(prompt, history=[], cancel_event=None):
+    """Stream AI tokens, falling back to the local response if the API fails before the first token"""
+    cached = response_cache.get(prompt, history)
+    if cached is not None:
+        yield cached
+        return
+    
+    parts = []
+    try:
+        for token in stream_ai_response(prompt, history, cancel_event):
+            parts.append(token)
+            yield token
+    except Exception as api_error:
+        if parts:
+            raise
+        print(f"⚠️ AI stream failed: {str(api_error)}")
+        yield get_enhanced_local_response(prompt)
+        return
     
-    # Programming and coding questions
-    if any(word in prompt_lower for word in ['python', 'javascript', 'java', 'c++', 'programming', 'code', 'algorithm', 'function', 'variable', 'loop', 'array', 'object']):
-        if 'python' in prompt_lower:
-            return """I'd be happy to help you with Python! Here's what I can assist with:
+    # Only complete answers are worth caching
+    if parts and not (cancel_event is not None and cancel_event.is_set()):
+        response_cache.put(prompt, history, "".join(parts))
+
+def sse_event(event, data):
+    """Format a Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@api.route("/api/chat/stream", methods=["POST"])
+def chat_stream():
+    """Server-Sent Events variant of /api/chat"""
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "No JSON data received"}), 400
+    
+    prompt = data.get("prompt", "").strip()
+    conversation_history = data.get("history", [])
+    if not prompt:
+        return jsonify({"error": "Missing prompt"}), 400
+    
+    def generate():
+        # If the client disconnects, the WSGI server closes this generator and
+        # the GeneratorExit unwinds into stream_ai_response, closing the upstream.
+        parts = []
+        try:
+            for token in iter_chat_tokens(prompt, conversation_history):
+                parts.append(token)
+                yield sse_event("token", {"token": token})
+            yield sse_event("done", {"response": "".join(parts)})
+        except Exception as e:
+            print(f"❌ Error in chat stream: {str(e)}")
+            yield sse_event("error", {"error": f"Chat failed: {str(e)}"})
+    
+    return Response(stream_with_context(generate()), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+LOCAL_RESPONSES = {
+    "python": """I'd be happy to help you with Python! Here's what I can assist with:
 
 🐍 **Python Fundamentals:**
 - Variables, data types, and operators
@@ -280,10 +452,9 @@ def get_enhanced_local_response(prompt):
 - Machine learning basics
 - Automation scripts
 
-What specific Python topic would you like to explore? Feel free to share your code if you need debugging help!"""
+What specific Python topic would you like to explore? Feel free to share your code if you need debugging help!""",
 
-        elif any(word in prompt_lower for word in ['javascript', 'js', 'react', 'node']):
-            return """Great! I can help you with JavaScript and web development:
+    "javascript": """Great! I can help you with JavaScript and web development:
 
 🌐 **JavaScript Fundamentals:**
 - Variables, functions, and scope
@@ -303,10 +474,9 @@ What specific Python topic would you like to explore? Feel free to share your co
 - Frontend frameworks and libraries
 - Database connectivity
 
-What JavaScript concept or project are you working on? I can provide code examples and explanations!"""
+What JavaScript concept or project are you working on? I can provide code examples and explanations!""",
 
-        else:
-            return """I'm here to help with programming! I can assist with:
+    "programming": """I'm here to help with programming! I can assist with:
 
 💻 **Languages I Support:**
 - Python (data science, web dev, automation)
@@ -328,12 +498,9 @@ What JavaScript concept or project are you working on? I can provide code exampl
 - Code examples and explanations
 - Career guidance for developers
 
-What programming challenge are you facing? Share your code or describe the problem!"""
+What programming challenge are you facing? Share your code or describe the problem!""",
 
-    # Mathematics questions
-    elif any(word in prompt_lower for word in ['math', 'mathematics', 'calculus', 'algebra', 'geometry', 'statistics', 'equation', 'formula', 'solve']):
-        if 'calculus' in prompt_lower:
-            return """I'd love to help you with Calculus! Here's what I can cover:
+    "calculus": """I'd love to help you with Calculus! Here's what I can cover:
 
 📈 **Differential Calculus:**
 - Limits and continuity
@@ -353,10 +520,9 @@ What programming challenge are you facing? Share your code or describe the probl
 - Multiple integrals
 - Vector calculus
 
-What specific calculus problem or concept would you like help with? I can provide step-by-step solutions!"""
+What specific calculus problem or concept would you like help with? I can provide step-by-step solutions!""",
 
-        elif 'algebra' in prompt_lower:
-            return """I can help you master Algebra! Here's what I cover:
+    "algebra": """I can help you master Algebra! Here's what I cover:
 
 🔢 **Basic Algebra:**
 - Linear equations and inequalities
@@ -376,10 +542,9 @@ What specific calculus problem or concept would you like help with? I can provid
 - Function analysis
 - Real-world modeling
 
-What algebra topic or problem are you working on? I can break it down step by step!"""
+What algebra topic or problem are you working on? I can break it down step by step!""",
 
-        else:
-            return """I'm here to help with Mathematics! I can assist with:
+    "math": """I'm here to help with Mathematics! I can assist with:
 
 🧮 **Core Areas:**
 - Algebra (equations, functions, graphing)
@@ -399,11 +564,9 @@ What algebra topic or problem are you working on? I can break it down step by st
 - Practice problems generation
 - Exam preparation strategies
 
-What math topic or problem would you like help with? I can provide detailed explanations and solutions!"""
+What math topic or problem would you like help with? I can provide detailed explanations and solutions!""",
 
-    # Study and learning questions
-    elif any(word in prompt_lower for word in ['study', 'exam', 'test', 'learn', 'homework', 'assignment', 'grade', 'school', 'college', 'university']):
-        return """I'm your study companion! Here's how I can help you succeed:
+    "study": """I'm your study companion! Here's how I can help you succeed:
 
 📚 **Study Strategies:**
 - Active reading techniques
@@ -429,11 +592,9 @@ What math topic or problem would you like help with? I can provide detailed expl
 - Learning style identification
 - Study group organization
 
-What specific study challenge are you facing? I can create a personalized plan for you!"""
+What specific study challenge are you facing? I can create a personalized plan for you!""",
 
-    # Science questions
-    elif any(word in prompt_lower for word in ['physics', 'chemistry', 'biology', 'science', 'experiment', 'theory', 'formula']):
-        return """I can help you with Science subjects! Here's my coverage:
+    "science": """I can help you with Science subjects! Here's my coverage:
 
 🔬 **Physics:**
 - Mechanics (motion, forces, energy)
@@ -462,11 +623,9 @@ What specific study challenge are you facing? I can create a personalized plan f
 - Data analysis and interpretation
 - Scientific writing and reporting
 
-What science topic or problem would you like to explore? I can provide detailed explanations and examples!"""
+What science topic or problem would you like to explore? I can provide detailed explanations and examples!""",
 
-    # General help or greeting
-    elif any(word in prompt_lower for word in ['hello', 'hi', 'hey', 'help', 'what can you do', 'capabilities']):
-        return """Hello! I'm Alpha-X AI Assistant, your comprehensive learning companion! 🎓
+    "greeting": """Hello! I'm Alpha-X AI Assistant, your comprehensive learning companion! 🎓
 
 🚀 **My Capabilities:**
 
@@ -501,10 +660,9 @@ What science topic or problem would you like to explore? I can provide detailed
 - Ask for examples or step-by-step explanations
 
 What would you like to learn or work on today? I'm here to help you succeed! 🌟"""
+}
 
-    # Default comprehensive response
-    else:
-        return f"""I understand you're asking about "{prompt}". I'm Alpha-X AI Assistant, and I'm here to provide comprehensive help!
+LOCAL_DEFAULT_RESPONSE = """I understand you're asking about "{prompt}". I'm Alpha-X AI Assistant, and I'm here to provide comprehensive help!
 
 🎯 **I can help you with:**
 
@@ -536,12 +694,19 @@ To give you the most helpful response, could you:
 
 What specific topic or problem would you like to explore? I'm ready to provide detailed, personalized assistance! 🚀"""
 
+def get_enhanced_local_response(prompt):
+    """Enhanced local response system with more comprehensive answers"""
+    intent = classify_prompt(prompt)
+    if intent == DEFAULT_INTENT:
+        return LOCAL_DEFAULT_RESPONSE.format(prompt=prompt)
+    return LOCAL_RESPONSES[intent]
+
 
 # ---------------------------
 # 🔴 Code Execution API
 # ---------------------------
 
-@app.route("/api/execute", methods=["POST"])
+@api.route("/api/execute", methods=["POST"])
 def execute_code():
     print("🔥 Code execution request received!")
     
@@ -566,7 +731,42 @@ def execute_code():
                 "execution_time": 0
             }), 400
 
-        result = execute_code_safely(code, language)
+        if not execution_scheduler.supports(language):
+            return jsonify(execute_code_safely(code, language))
+
+        try:
+            if data.get("async"):
+                # Results are pushed only to the caller's own sockets, never to a sid named in the body
+                notify = None
+                token = request.headers.get('Authorization')
+                if token:
+                    try:
+                        claims = verify_clerk_token(token.replace('Bearer ', ''))
+                    except Exception as e:
+                        return jsonify({"error": str(e)}), 401
+                    notify = push_execution_result(user_room(claims['sub']))
+                elif data.get("sid"):
+                    return jsonify({"error": "Sign in to have results pushed over Socket.IO"}), 401
+                job = execution_scheduler.submit(code, language, notify=notify)
+                print(f"📥 Execution job queued: {job.id}")
+                return jsonify({
+                    "jobId": job.id,
+                    "status": job.status,
+                    "position": execution_scheduler.position(job)
+                }), 202
+
+            result = execution_scheduler.run(code, language)
+        except QueueFull as e:
+            print(f"🚦 Execution queue full: {e.language}")
+            response = jsonify({
+                "success": False,
+                "error": str(e),
+                "output": "",
+                "execution_time": 0
+            })
+            response.headers["Retry-After"] = str(e.retry_after)
+            return response, 429
+
         print(f"✅ Execution result: {result}")
         return jsonify(result)
         
@@ -579,6 +779,32 @@ def execute_code():
             "execution_time": 0
         }), 500
 
+@api.route("/api/execute/<job_id>", methods=["GET"])
+def get_execution_job(job_id):
+    """Poll an asynchronous execution job"""
+    job = execution_scheduler.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
+
+def push_execution_result(to):
+    """Deliver a finished job to one Socket.IO client or a user's room"""
+    return lambda job: socketio.emit('execution_result', job.to_dict(), to=to)
+
+@socketio.on('execute_code')
+def handle_execute_code(data):
+    code = (data or {}).get('code', '').strip()
+    language = (data or {}).get('language', 'python').lower()
+    if not code:
+        return {'error': 'No code provided'}
+    if not execution_scheduler.supports(language):
+        return {'error': f"Language '{language}' not supported"}
+    try:
+        job = execution_scheduler.submit(code, language, notify=push_execution_result(request.sid))
+    except QueueFull as e:
+        return {'error': str(e), 'retryAfter': e.retry_after}
+    return {'jobId': job.id, 'position': execution_scheduler.position(job)}
+
 def execute_code_safely(code, language):
     """Execute code safely with timeout and resource limits"""
     start_time = time.time()
@@ -609,37 +835,32 @@ def execute_code_safely(code, language):
             "execution_time": time.time() - start_time
         }
 
+sandbox_limits = ResourceLimits.from_env()
+python_pool = PythonWorkerPool.from_env(sandbox_limits)
+compile_cache = CompileCache.from_env()
+execution_scheduler = ExecutionScheduler.from_env(execute_code_safely)
+if python_pool is not None:
+    atexit.register(python_pool.shutdown)
+
 def execute_python(code, start_time):
-    """Execute Python code"""
+    """Execute Python code on a warm pooled interpreter"""
+    if python_pool is None:
+        return execute_python_subprocess(code, start_time)
+    return program_result(run_pooled_python(code, "", 10), start_time)
+
+def execute_python_subprocess(code, start_time):
+    """Execute Python code in a fresh interpreter (used when the pool is disabled)"""
+    return program_result(run_python_subprocess(code, "", 10), start_time)
+
+def run_python_subprocess(code, stdin, time_limit):
+    """One fresh interpreter per run, in run_program's shape"""
     with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
         f.write(code)
         temp_file = f.name
     
     try:
-        result = subprocess.run(
-            [sys.executable, temp_file],
-            capture_output=True,
-            text=True,
-            timeout=10,  # 10 second timeout
-            cwd=tempfile.gettempdir()
-        )
-        
-        execution_time = time.time() - start_time
-        
-        if result.returncode == 0:
-            return {
-                "success": True,
-                "output": result.stdout,
-                "error": result.stderr if result.stderr else None,
-                "execution_time": execution_time
-            }
-        else:
-            return {
-                "success": False,
-                "output": result.stdout,
-                "error": result.stderr,
-                "execution_time": execution_time
-            }
+        return run_program([sys.executable, temp_file], stdin, time_limit,
+                           cwd=tempfile.gettempdir(), limits=sandbox_limits)
     finally:
         try:
             os.unlink(temp_file)
@@ -653,30 +874,9 @@ def execute_javascript(code, start_time):
         temp_file = f.name
     
     try:
-        result = subprocess.run(
-            ['node', temp_file],
-            capture_output=True,
-            text=True,
-            timeout=10,
-            cwd=tempfile.gettempdir()
-        )
-        
-        execution_time = time.time() - start_time
-        
-        if result.returncode == 0:
-            return {
-                "success": True,
-                "output": result.stdout,
-                "error": result.stderr if result.stderr else None,
-                "execution_time": execution_time
-            }
-        else:
-            return {
-                "success": False,
-                "output": result.stdout,
-                "error": result.stderr,
-                "execution_time": execution_time
-            }
+        run = run_program(javascript_command(temp_file), timeout=10, cwd=tempfile.gettempdir(),
+                          limits=sandbox_limits, address_space=False)
+        return program_result(run, start_time)
     except FileNotFoundError:
         return {
             "success": False,
@@ -690,233 +890,426 @@ def execute_javascript(code, start_time):
         except:
             pass
 
+def javascript_command(source):
+    # V8 reserves far more address space than it uses, so cap its heap instead of RLIMIT_AS
+    return ['node', f"--max-old-space-size={sandbox_limits.memory_mb}", source]
+
 def execute_java(code, start_time):
     """Execute Java code"""
-    # Extract class name from code
-    import re
-    class_match = re.search(r'public\s+class\s+(\w+)', code)
-    if not class_match:
+    return execute_compiled(code, "java", start_time)
+
+def execute_cpp(code, start_time):
+    """Execute C++ code"""
+    return execute_compiled(code, "cpp", start_time)
+
+def execute_c(code, start_time):
+    """Execute C code"""
+    return execute_compiled(code, "c", start_time)
+
+COMPILER_MISSING = {
+    "java": "Java compiler (javac) not found. Please install Java JDK.",
+    "cpp": "C++ compiler (g++) not found. Please install GCC.",
+    "c": "C compiler (gcc) not found. Please install GCC."
+}
+
+def compiled_program_spec(code, language):
+    """Return (source_name, compile_cmd, run_cmd) for a compiled language"""
+    exe_name = "main.exe" if os.name == 'nt' else "main"
+    if language == "java":
+        # Extract class name from code
+        class_match = re.search(r'public\s+class\s+(\w+)', code)
+        if not class_match:
+            raise ValueError("No public class found. Java code must contain a public class.")
+        class_name = class_match.group(1)
+        # The JVM reserves far more address space than it uses, so cap its heap instead of RLIMIT_AS
+        return (f"{class_name}.java", ['javac', f"{class_name}.java"],
+                lambda build_dir: ['java', f"-Xmx{sandbox_limits.memory_mb}m", '-cp', build_dir, class_name])
+    elif language == "cpp":
+        return ("main.cpp", ['g++', 'main.cpp', '-o', exe_name],
+                lambda build_dir: [os.path.join(build_dir, exe_name)])
+    else:
+        return ("main.c", ['gcc', 'main.c', '-o', exe_name],
+                lambda build_dir: [os.path.join(build_dir, exe_name)])
+
+def execute_compiled(code, language, start_time):
+    """Compile (or reuse a cached build) and run a C, C++ or Java program"""
+    try:
+        spec = compiled_program_spec(code, language)
+    except ValueError as e:
         return {
             "success": False,
-            "error": "No public class found. Java code must contain a public class.",
+            "error": str(e),
             "output": "",
             "execution_time": time.time() - start_time
         }
     
-    class_name = class_match.group(1)
-    
-    with tempfile.TemporaryDirectory() as temp_dir:
-        java_file = os.path.join(temp_dir, f"{class_name}.java")
-        with open(java_file, 'w') as f:
-            f.write(code)
-        
-        try:
-            # Compile
-            compile_result = subprocess.run(
-                ['javac', java_file],
-                capture_output=True,
-                text=True,
-                timeout=10,
-                cwd=temp_dir
-            )
-            
-            if compile_result.returncode != 0:
+    try:
+        with compiled_program(code, *spec) as (cmd, build):
+            if build["error"] is not None:
                 return {
                     "success": False,
-                    "error": f"Compilation failed: {compile_result.stderr}",
+                    "error": f"Compilation failed: {build['error']}",
                     "output": "",
-                    "execution_time": time.time() - start_time
+                    "execution_time": time.time() - start_time,
+                    "breakdown": timing_breakdown(None, build["compile_time"], False)
                 }
-            
-            # Execute
-            run_result = subprocess.run(
-                ['java', class_name],
-                capture_output=True,
-                text=True,
-                timeout=10,
-                cwd=temp_dir
-            )
-            
-            execution_time = time.time() - start_time
-            
-            if run_result.returncode == 0:
-                return {
-                    "success": True,
-                    "output": run_result.stdout,
-                    "error": run_result.stderr if run_result.stderr else None,
-                    "execution_time": execution_time
-                }
-            else:
-                return {
-                    "success": False,
-                    "output": run_result.stdout,
-                    "error": run_result.stderr,
-                    "execution_time": execution_time
-                }
-        except FileNotFoundError:
-            return {
-                "success": False,
-                "error": "Java compiler (javac) not found. Please install Java JDK.",
-                "output": "",
-                "execution_time": time.time() - start_time
-            }
+            with tempfile.TemporaryDirectory() as run_dir:
+                run = run_program(cmd, timeout=10, cwd=run_dir, limits=sandbox_limits,
+                                  address_space=language != "java")
+            return program_result(run, start_time, build["compile_time"], build["cache_hit"])
+    except FileNotFoundError:
+        return {
+            "success": False,
+            "error": COMPILER_MISSING[language],
+            "output": "",
+            "execution_time": time.time() - start_time
+        }
 
-def execute_cpp(code, start_time):
-    """Execute C++ code"""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        cpp_file = os.path.join(temp_dir, "main.cpp")
-        exe_file = os.path.join(temp_dir, "main.exe" if os.name == 'nt' else "main")
-        
-        with open(cpp_file, 'w') as f:
+LIMIT_MESSAGES = {
+    "wall": "Execution timed out after {timeout} seconds",
+    "cpu": "CPU time limit exceeded ({cpu_seconds} s)",
+    "memory": "Memory limit exceeded ({memory_mb} MB)",
+    "output": "Output limit exceeded ({output_kb} KB)"
+}
+
+def program_result(run, start_time, compile_time=0.0, cache_hit=None, timeout=10):
+    """Shape a run_program-style result for /api/execute"""
+    error = run["stderr"] or None
+    if run["limit"]:
+        message = LIMIT_MESSAGES[run["limit"]].format(timeout=timeout, **sandbox_limits.to_dict())
+        error = f"{error.rstrip()}\n{message}" if error else message
+    return {
+        "success": run["returncode"] == 0 and not run["limit"],
+        "output": run["stdout"],
+        "error": error,
+        "execution_time": time.time() - start_time,
+        "breakdown": timing_breakdown(run, compile_time, cache_hit)
+    }
+
+def timing_breakdown(run, compile_time=0.0, cache_hit=None):
+    """Split of execution_time (and the resources used) reported alongside it"""
+    breakdown = {
+        "compile_time": compile_time,
+        "run_time": run["wall_time"] if run else 0.0,
+        "wall_time": run["wall_time"] if run else 0.0,
+        "cpu_time": run["cpu_time"] if run else None,
+        "peak_rss_kb": run["peak_rss_kb"] if run else None,
+        "limit": run["limit"] if run else None
+    }
+    if cache_hit is not None:
+        breakdown["cache_hit"] = cache_hit
+        breakdown["cache_hit_rate"] = compile_cache.hit_rate()
+    return breakdown
+
+@contextmanager
+def compiled_program(code, source_name, compile_cmd, run_cmd):
+    """Build through the artifact cache (skipped on a hit).
+    
+    compile_cmd runs inside the build directory; run_cmd(build_dir) gives the
+    command that runs the compiled program. Yields (command, build) where
+    build has compile_time, cache_hit and error (compiler output or None).
+    """
+    key = compile_cache.key(compile_cmd, source_name, code)
+    with compile_cache.checkout(key) as artifact_dir:
+        if artifact_dir is not None:
+            yield run_cmd(artifact_dir), {"compile_time": 0.0, "cache_hit": True, "error": None}
+            return
+    
+    with tempfile.TemporaryDirectory() as build_dir:
+        with open(os.path.join(build_dir, source_name), 'w') as f:
             f.write(code)
         
-        try:
-            # Compile
-            compile_cmd = ['g++', cpp_file, '-o', exe_file]
-            compile_result = subprocess.run(
-                compile_cmd,
-                capture_output=True,
-                text=True,
-                timeout=10,
-                cwd=temp_dir
-            )
-            
-            if compile_result.returncode != 0:
-                return {
-                    "success": False,
-                    "error": f"Compilation failed: {compile_result.stderr}",
-                    "output": "",
-                    "execution_time": time.time() - start_time
-                }
-            
-            # Execute
-            run_result = subprocess.run(
-                [exe_file],
-                capture_output=True,
-                text=True,
-                timeout=10,
-                cwd=temp_dir
-            )
-            
-            execution_time = time.time() - start_time
-            
-            if run_result.returncode == 0:
-                return {
-                    "success": True,
-                    "output": run_result.stdout,
-                    "error": run_result.stderr if run_result.stderr else None,
-                    "execution_time": execution_time
-                }
-            else:
-                return {
-                    "success": False,
-                    "output": run_result.stdout,
-                    "error": run_result.stderr,
-                    "execution_time": execution_time
-                }
-        except FileNotFoundError:
-            return {
-                "success": False,
-                "error": "C++ compiler (g++) not found. Please install GCC.",
-                "output": "",
-                "execution_time": time.time() - start_time
-            }
-
-def execute_c(code, start_time):
-    """Execute C code"""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        c_file = os.path.join(temp_dir, "main.c")
-        exe_file = os.path.join(temp_dir, "main.exe" if os.name == 'nt' else "main")
+        # Compile
+        compile_start = time.time()
+        compile_result = subprocess.run(
+            compile_cmd,
+            capture_output=True,
+            text=True,
+            timeout=10,
+            cwd=build_dir
+        )
+        compile_time = time.time() - compile_start
         
-        with open(c_file, 'w') as f:
-            f.write(code)
+        if compile_result.returncode != 0:
+            yield None, {"compile_time": compile_time, "cache_hit": False, "error": compile_result.stderr}
+            return
         
-        try:
-            # Compile
-            compile_cmd = ['gcc', c_file, '-o', exe_file]
-            compile_result = subprocess.run(
-                compile_cmd,
-                capture_output=True,
-                text=True,
-                timeout=10,
-                cwd=temp_dir
-            )
-            
-            if compile_result.returncode != 0:
-                return {
-                    "success": False,
-                    "error": f"Compilation failed: {compile_result.stderr}",
-                    "output": "",
-                    "execution_time": time.time() - start_time
-                }
-            
-            # Execute
-            run_result = subprocess.run(
-                [exe_file],
-                capture_output=True,
-                text=True,
-                timeout=10,
-                cwd=temp_dir
-            )
-            
-            execution_time = time.time() - start_time
-            
-            if run_result.returncode == 0:
-                return {
-                    "success": True,
-                    "output": run_result.stdout,
-                    "error": run_result.stderr if run_result.stderr else None,
-                    "execution_time": execution_time
-                }
-            else:
-                return {
-                    "success": False,
-                    "output": run_result.stdout,
-                    "error": run_result.stderr,
-                    "execution_time": execution_time
-                }
-        except FileNotFoundError:
-            return {
-                "success": False,
-                "error": "C compiler (gcc) not found. Please install GCC.",
-                "output": "",
-                "execution_time": time.time() - start_time
-            }
+        compile_cache.store(key, build_dir, exclude=[source_name])
+        yield run_cmd(build_dir), {"compile_time": compile_time, "cache_hit": False, "error": None}
+
+# ---------------------------
+# 🔴 Batch Execution (test cases)
+# ---------------------------
+
+MAX_BATCH_CASES = 50
+# Cases x timeLimit may not exceed this, so a batch ends well before the route stops waiting for it
+MAX_BATCH_SECONDS = float(os.getenv("MAX_BATCH_SECONDS", "60"))
+BATCH_WAIT_MARGIN = 60  # seconds on top for queueing and compiling
+MAX_CASE_OUTPUT = 10000  # characters of output/error echoed back per case
+
+@api.route("/api/execute_batch", methods=["POST"])
+def execute_batch():
+    """Compile once, then run the program against every test case's stdin"""
+    print("🧪 Batch execution request received!")
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "No JSON data received"}), 400
+    
+    code = data.get("code", "").strip()
+    language = data.get("language", "python").lower()
+    cases = data.get("testCases") or []
+    if not code:
+        return jsonify({"error": "No code provided"}), 400
+    if not isinstance(cases, list) or not cases:
+        return jsonify({"error": "No test cases provided"}), 400
+    if len(cases) > MAX_BATCH_CASES:
+        return jsonify({"error": f"At most {MAX_BATCH_CASES} test cases per batch"}), 400
+    if not execution_scheduler.supports(language):
+        return jsonify({"error": f"Language '{language}' not supported"}), 400
+    try:
+        time_limit = float(data.get("timeLimit", 5))
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid timeLimit"}), 400
+    if not math.isfinite(time_limit) or time_limit <= 0:
+        return jsonify({"error": "timeLimit must be a positive number of seconds"}), 400
+    time_limit = min(time_limit, 10)
+    if len(cases) * time_limit > MAX_BATCH_SECONDS:
+        return jsonify({"error": f"testCases x timeLimit may not exceed {MAX_BATCH_SECONDS:g} seconds"}), 400
+    
+    try:
+        result = execution_scheduler.run(
+            code, language, timeout=len(cases) * time_limit + BATCH_WAIT_MARGIN,
+            task=lambda: execute_batch_safely(code, ExecutionScheduler.normalize(language), cases, time_limit)
+        )
+    except QueueFull as e:
+        response = jsonify({"error": str(e)})
+        response.headers["Retry-After"] = str(e.retry_after)
+        return response, 429
+    except TimeoutError as e:
+        print(f"⏱️ Batch execution timed out: {e}")
+        return jsonify({"error": str(e)}), 504
+    
+    print(f"✅ Batch result: {result.get('passed')}/{result.get('total')} passed")
+    return jsonify(result)
+
+def execute_batch_safely(code, language, cases, time_limit):
+    """Build the program once and judge each test case"""
+    start_time = time.time()
+    build = {"compile_time": 0.0, "cache_hit": False, "error": None}
+    
+    try:
+        if language == "python" and python_pool is not None:
+            results = [judge_case(i, case, run_pooled_python(code, case_input(case), time_limit))
+                       for i, case in enumerate(cases)]
+        elif language in ("python", "javascript"):
+            with tempfile.TemporaryDirectory() as temp_dir:
+                source = os.path.join(temp_dir, "main.py" if language == "python" else "main.js")
+                with open(source, 'w') as f:
+                    f.write(code)
+                cmd = [sys.executable, source] if language == "python" else javascript_command(source)
+                results = [judge_case(i, case, run_program(cmd, case_input(case), time_limit, cwd=temp_dir,
+                                                           limits=sandbox_limits,
+                                                           address_space=language == "python"))
+                           for i, case in enumerate(cases)]
+        else:
+            with compiled_program(code, *compiled_program_spec(code, language)) as (cmd, build):
+                if build["error"] is not None:
+                    results = [compile_error_case(i) for i in range(len(cases))]
+                else:
+                    with tempfile.TemporaryDirectory() as run_dir:
+                        results = [judge_case(i, case, run_program(cmd, case_input(case), time_limit, cwd=run_dir,
+                                                                   limits=sandbox_limits,
+                                                                   address_space=language != "java"))
+                                   for i, case in enumerate(cases)]
+    except FileNotFoundError:
+        missing = "Node.js not found. Please install Node.js to run JavaScript code." if language == "javascript" else COMPILER_MISSING[language]
+        return {"success": False, "error": missing, "cases": [], "passed": 0, "total": len(cases),
+                "execution_time": time.time() - start_time}
+    except ValueError as e:  # e.g. Java without a public class
+        return {"success": False, "error": str(e), "cases": [], "passed": 0, "total": len(cases),
+                "execution_time": time.time() - start_time}
+    
+    passed = sum(1 for r in results if r["passed"])
+    return {
+        "success": passed == len(cases),
+        "error": f"Compilation failed: {build['error']}" if build["error"] else None,
+        "passed": passed,
+        "total": len(cases),
+        "cases": results,
+        "compile_time": build["compile_time"],
+        "cache_hit": build["cache_hit"],
+        "execution_time": time.time() - start_time
+    }
+
+def case_input(case):
+    value = case.get("input", "") if isinstance(case, dict) else ""
+    return value if isinstance(value, str) else json.dumps(value)
+
+def run_pooled_python(code, stdin, time_limit):
+    """Run on a warm interpreter, reported in run_program's shape"""
+    started = time.perf_counter()
+    try:
+        result = python_pool.run(code, timeout=time_limit, stdin=stdin)
+    except PoolUnavailable:
+        # No warm worker free or startable: a fresh interpreter is slower but still answers
+        return run_python_subprocess(code, stdin, time_limit)
+    return {
+        "returncode": 0 if result["success"] else 1,
+        "stdout": result["stdout"],
+        "stderr": "" if result["timed_out"] else result["stderr"],
+        "timed_out": result["timed_out"],
+        "limit": result.get("limit"),
+        "wall_time": result.get("duration", time.perf_counter() - started),
+        "cpu_time": result.get("cpu_time"),
+        "peak_rss_kb": result.get("peak_rss_kb")
+    }
+
+def outputs_match(actual, expected):
+    """Compare outputs ignoring trailing whitespace on each line and at the end"""
+    normalize = lambda text: [line.rstrip() for line in text.rstrip().splitlines()]
+    return normalize(actual) == normalize(expected)
+
+def judge_case(index, case, run):
+    expected = case.get("expected", case.get("output")) if isinstance(case, dict) else None
+    if expected is not None and not isinstance(expected, str):
+        expected = json.dumps(expected)
+    
+    if run["timed_out"] or run["limit"] == "cpu":
+        verdict = "Time Limit Exceeded"
+    elif run["limit"] == "memory":
+        verdict = "Memory Limit Exceeded"
+    elif run["limit"] == "output":
+        verdict = "Output Limit Exceeded"
+    elif run["returncode"] != 0:
+        verdict = "Runtime Error"
+    elif expected is None:
+        verdict = "Completed"
+    elif outputs_match(run["stdout"], expected):
+        verdict = "Accepted"
+    else:
+        verdict = "Wrong Answer"
+    
+    return {
+        "index": index,
+        "verdict": verdict,
+        "passed": verdict in ("Accepted", "Completed"),
+        "output": run["stdout"][:MAX_CASE_OUTPUT],
+        "error": run["stderr"][:MAX_CASE_OUTPUT] or None,
+        "time": run["wall_time"],
+        "cpu_time": run["cpu_time"],
+        "peak_memory_kb": run["peak_rss_kb"]
+    }
+
+def compile_error_case(index):
+    return {"index": index, "verdict": "Compilation Error", "passed": False, "output": "",
+            "error": None, "time": 0.0, "cpu_time": None, "peak_memory_kb": None}
+
+# ---------------------------
+# 🔴 Chat Streaming (Socket.IO)
+# ---------------------------
+
+chat_streams = {}  # (sid, streamId) -> cancel Event for in-flight chat streams
+
+def run_chat_stream(sid, stream_id, prompt, history, cancel_event):
+    """Background task that pushes chat tokens to a single client"""
+    parts = []
+    try:
+        for token in iter_chat_tokens(prompt, history, cancel_event):
+            if cancel_event.is_set():
+                break
+            parts.append(token)
+            socketio.emit('chat_token', {'streamId': stream_id, 'token': token}, to=sid)
+        if cancel_event.is_set():
+            socketio.emit('chat_cancelled', {'streamId': stream_id}, to=sid)
+        else:
+            socketio.emit('chat_done', {'streamId': stream_id, 'response': ''.join(parts)}, to=sid)
+    except Exception as e:
+        print(f"❌ Error in chat stream {stream_id}: {str(e)}")
+        socketio.emit('chat_error', {'streamId': stream_id, 'error': f"Chat failed: {str(e)}"}, to=sid)
+    finally:
+        chat_streams.pop((sid, stream_id), None)
+
+@socketio.on('chat_stream')
+def handle_chat_stream(data):
+    prompt = (data or {}).get('prompt', '').strip()
+    if not prompt:
+        emit('chat_error', {'streamId': (data or {}).get('streamId'), 'error': 'Missing prompt'})
+        return
+    
+    stream_id = data.get('streamId') or uuid.uuid4().hex
+    cancel_event = threading.Event()
+    chat_streams[(request.sid, stream_id)] = cancel_event
+    socketio.start_background_task(run_chat_stream, request.sid, stream_id, prompt, data.get('history', []), cancel_event)
+    print(f"🤖 Chat stream {stream_id} started for {request.sid}")
+    return {'streamId': stream_id}
+
+@socketio.on('chat_cancel')
+def handle_chat_cancel(data):
+    cancel_event = chat_streams.get((request.sid, (data or {}).get('streamId')))
+    if cancel_event:
+        cancel_event.set()
+        print(f"🛑 Chat stream {data.get('streamId')} cancelled by {request.sid}")
+
+def cancel_chat_streams(sid):
+    """Stop every in-flight chat stream owned by a client"""
+    for (owner, _), cancel_event in list(chat_streams.items()):
+        if owner == sid:
+            cancel_event.set()
 
 # ---------------------------
 # 🔴 Mock Interview Features
 # ---------------------------
 
-rooms = {}  # Keeps track of users in a room
-waiting_users = []  # Users waiting for interview match
-online_users = set()  # Track online users
-interview_rooms = {}  # Active interview rooms
+# Online users, the match queue and room state, shared by worker processes when
+# SOCKETIO_STATE points at a shared store (see state_backend.py)
+socket_state = state_backend.from_env()
+matchmaker = socket_state.matchmaker  # Users waiting for interview match
+queue_updates = QueueSizeBroadcaster(
+    lambda: len(matchmaker),
+    lambda payload: socketio.emit('queue_size', payload),
+    interval=float(os.getenv("QUEUE_SIZE_INTERVAL", "0.5")),
+    shared=socket_state.shared
+)
+# Online and per-room counts, broadcast once per tick instead of on every connect
+presence = Presence(
+    socket_state,
+    lambda event, payload, room=None: socketio.emit(event, payload, to=room),
+    tick=float(os.getenv("PRESENCE_TICK", "1.0"))
+)
+
+def user_room(clerk_id):
+    """Room holding every socket a signed-in user has open"""
+    return f"user:{clerk_id}"
 
 @socketio.on('connect')
-def handle_connect():
+def handle_connect(auth=None):
     print(f"🔗 User connected: {request.sid}")
-    online_users.add(request.sid)
-    print(f"📊 Total online users: {len(online_users)}")
-    emit('online_users_count', len(online_users), broadcast=True)
+    token = (auth or {}).get('token') if isinstance(auth, dict) else None
+    if token:
+        # Optional: signed-in sockets also receive results of their user's async HTTP executions
+        try:
+            join_room(user_room(verify_clerk_token(token)['sub']))
+        except Exception as e:
+            print(f"⚠️ Socket {request.sid} sent an invalid token: {e}")
+    presence.connected(request.sid)
+    emit('online_users_count', presence.online_count())
+    emit('queue_size', queue_updates.snapshot())
 
 @socketio.on('disconnect')
 def handle_disconnect():
     print(f"❌ User disconnected: {request.sid}")
-    online_users.discard(request.sid)
+    presence.disconnected(request.sid)
+    cancel_chat_streams(request.sid)
     
     # Remove from waiting users
-    global waiting_users
-    waiting_users = [user for user in waiting_users if user['sid'] != request.sid]
-    
-    print(f"📊 Total online users: {len(online_users)}")
-    emit('online_users_count', len(online_users), broadcast=True)
-    emit('waiting_users', waiting_users, broadcast=True)
+    if matchmaker.remove(request.sid):
+        queue_updates.changed()
 
 @socketio.on('join_progress_room')
 def handle_join_progress_room():
     """Handle users joining the progress tracking room"""
     print(f"👤 User {request.sid} joined progress room")
-    emit('online_users_count', len(online_users))
+    emit('online_users_count', presence.online_count())
 
 @socketio.on('heartbeat')
 def handle_heartbeat():
@@ -931,8 +1324,8 @@ def handle_join_interview_pool(data):
         'username': data.get('username', 'Anonymous')
     }
     print(f"👤 User joined interview pool: {user_data['username']}")
-    emit('online_users_count', len(online_users))
-    emit('waiting_users', waiting_users)
+    emit('online_users_count', presence.online_count())
+    emit('queue_size', queue_updates.snapshot())
 
 @socketio.on('find_match')
 def handle_find_match(data):
@@ -944,21 +1337,20 @@ def handle_find_match(data):
     
     print(f"🔍 User looking for match: {user_data['username']}")
     
-    # Check if there's someone waiting
-    if waiting_users:
-        # Match with the first waiting user
-        partner = waiting_users.pop(0)
+    # Match with the longest-waiting compatible user, or wait in their bucket
+    partner = matchmaker.find_or_enqueue(user_data, *match_criteria(data))
+    queue_updates.changed()
+    if partner:
         room_id = f"interview_{request.sid}_{partner['sid']}"
         
         # Create interview room
-        interview_rooms[room_id] = {
-            'users': [user_data, partner],
-            'created_at': time.time()
-        }
+        socket_state.create_interview(room_id, [user_data, partner])
         
         # Join both users to the room
         join_room(room_id, sid=request.sid)
         join_room(room_id, sid=partner['sid'])
+        presence.join(room_id, request.sid)
+        presence.join(room_id, partner['sid'])
         
         # Notify both users of the match
         emit('match_found', {
@@ -976,16 +1368,12 @@ def handle_find_match(data):
         print(f"✅ Match found: {user_data['username']} <-> {partner['username']}")
         
     else:
-        # Add to waiting list
-        waiting_users.append(user_data)
-        emit('waiting_users', waiting_users, broadcast=True)
         print(f"⏳ User added to waiting list: {user_data['username']}")
 
 @socketio.on('cancel_search')
 def handle_cancel_search(data):
-    global waiting_users
-    waiting_users = [user for user in waiting_users if user['sid'] != request.sid]
-    emit('waiting_users', waiting_users, broadcast=True)
+    if matchmaker.remove(request.sid):
+        queue_updates.changed()
     print(f"❌ User cancelled search: {data.get('userId')}")
 
 @socketio.on('start_round')
@@ -1002,6 +1390,42 @@ def handle_start_round(data):
     
     print(f"🎯 New round started in room {room_id}: {problem['title']}")
 
+# Shared code documents: edits are {pos, delete, insert} against a version (see collab.py)
+COLLAB_SNAPSHOT_EVERY = int(os.getenv("COLLAB_SNAPSHOT_EVERY", "200"))
+
+@socketio.on('code_edit')
+def handle_code_edit(data):
+    room_id = data.get('roomId')
+    try:
+        version, edit = socket_state.edit_document(
+            room_id, lambda document: document.apply(data.get('edit'), data.get('version'), request.sid))
+    except EditRejected as e:
+        print(f"⚠️ Code edit rejected in room {room_id}: {e}")
+        send_code_resync(room_id)
+        return
+
+    emit('code_ack', {'version': version})
+    emit('code_edit', {'version': version, 'edit': edit}, room=room_id, include_self=False)
+    if version % COLLAB_SNAPSHOT_EVERY == 0:
+        emit('code_snapshot', socket_state.document_snapshot(room_id), room=room_id)
+
+@socketio.on('code_sync')
+def handle_code_sync(data):
+    """Send the room's current document to a client that lost track of it"""
+    send_code_resync((data or {}).get('roomId'))
+
+def send_code_resync(room_id):
+    """Send the requester a snapshot it must adopt even with its own edits in flight.
+
+    A room without a document has ended; an empty snapshot would wipe the
+    client's editor, so it is told the interview is over instead.
+    """
+    snapshot = socket_state.document_snapshot(room_id) if room_id else None
+    if snapshot is None:
+        emit('interview_disconnected', {'roomId': room_id, 'error': 'Interview room no longer exists'})
+        return
+    emit('code_snapshot', dict(snapshot, resync=True))
+
 @socketio.on('code_change')
 def handle_code_change(data):
     room_id = data['roomId']
@@ -1122,8 +1546,9 @@ def handle_disconnect_interview(data):
     username = request.sid
     
     # Get user info from interview room
-    if room_id in interview_rooms:
-        room_users = interview_rooms[room_id]['users']
+    room = socket_state.get_interview(room_id)
+    if room:
+        room_users = room['users']
         disconnecting_user = next((user for user in room_users if user['sid'] == request.sid), None)
         
         if disconnecting_user:
@@ -1133,15 +1558,17 @@ def handle_disconnect_interview(data):
             }, room=room_id, include_self=False)
             
             # Remove the room
-            del interview_rooms[room_id]
+            socket_state.delete_interview(room_id)
+            presence.leave(room_id, request.sid)
             print(f"❌ User {disconnecting_user['username']} disconnected from interview room {room_id}")
 
 @socketio.on('swap_roles')
 def handle_swap_roles(data):
     room_id = data['roomId']
     
-    if room_id in interview_rooms:
-        room_users = interview_rooms[room_id]['users']
+    room = socket_state.get_interview(room_id)
+    if room:
+        room_users = room['users']
         
         # Swap roles for both users
         for user in room_users:
@@ -1155,6 +1582,7 @@ def handle_swap_roles(data):
                 new_role = 'helper' if user.get('role', 'solver') == 'solver' else 'solver'
                 user['role'] = new_role
                 emit('roles_swapped', {'newRole': new_role}, room=user['sid'])
+        socket_state.save_interview(room_id, room)
         
         print(f"🔄 Roles swapped in room {room_id}")
 
@@ -1181,11 +1609,10 @@ def handle_join(data):
     username = data['username']
     join_room(room)
 
-    if room not in rooms:
-        rooms[room] = []
-    rooms[room].append(username)
+    members = socket_state.join_members(room, username)
+    presence.join(room, request.sid)
 
-    emit('user_joined', {'username': username, 'users': rooms[room]}, room=room)
+    emit('user_joined', {'username': username, 'users': members}, room=room)
     print(f"{username} joined room {room}")
 
 @socketio.on('leave_room')
@@ -1194,12 +1621,10 @@ def handle_leave(data):
     username = data['username']
     leave_room(room)
 
-    if room in rooms and username in rooms[room]:
-        rooms[room].remove(username)
-        if not rooms[room]:
-            del rooms[room]
+    members = socket_state.leave_members(room, username)
+    presence.leave(room, request.sid)
 
-    emit('user_left', {'username': username, 'users': rooms.get(room, [])}, room=room)
+    emit('user_left', {'username': username, 'users': members}, room=room)
     print(f"{username} left room {room}")
 
 @socketio.on('send_question')
@@ -1209,38 +1634,10 @@ def handle_question(data):
     emit('receive_question', {'question': question}, room=room)
 
 
-def calculate_streak(logins):
-    if not logins:
-        return 0
-    logins = sorted(set(logins))
-    streak = 1
-    current = datetime.strptime(logins[-1], '%Y-%m-%d')
-    for i in range(len(logins)-2, -1, -1):
-        prev = datetime.strptime(logins[i], '%Y-%m-%d')
-        if (current - prev) == timedelta(days=1):
-            streak += 1
-            current = prev
-        else:
-            break
-    return streak
-
-@app.route('/api/stats', methods=['GET'])
+@api.route('/api/stats', methods=['GET'])
 def get_stats():
     try:
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute("SELECT COUNT(*) FROM users")
-        user_count = c.fetchone()[0]
-        c.execute("SELECT COUNT(*) FROM logins")
-        login_count = c.fetchone()[0]
-        c.execute("SELECT SUM(value) FROM activities")
-        activity_sum = c.fetchone()[0] or 0
-        conn.close()
-        return jsonify({
-            "users": user_count,
-            "logins": login_count,
-            "activities": activity_sum
-        })
+        return http_cache.respond("stats", "stats", stats_payload)
     except Exception as e:
         print(f"Stats error: {e}")
         return jsonify({
@@ -1249,217 +1646,147 @@ def get_stats():
             "activities": 0
         })
 
-@app.route('/api/record_login', methods=['POST'])
+def stats_payload():
+    # users, logins, activities: maintained on write, see rollups.get_stats
+    return rollups.get_stats(get_db())
+
+@api.route('/api/record_login', methods=['POST'])
+@require_user(create=True)
 def record_login():
-    token = request.headers.get('Authorization')
-    if not token:
-        return jsonify({"error": "No token provided"}), 401
-    try:
-        payload = verify_clerk_token(token.replace('Bearer ', ''))
-        clerk_id = payload['sub']
-        username = payload.get('username', 'Unknown')
-    except Exception as e:
-        return jsonify({"error": str(e)}), 401
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_db()
     c = conn.cursor()
-    c.execute("SELECT id FROM users WHERE clerk_id = ?", (clerk_id,))
-    user = c.fetchone()
-    if not user:
-        c.execute("INSERT INTO users (clerk_id, username) VALUES (?, ?)", (clerk_id, username))
-        conn.commit()
-        user_id = c.lastrowid
-    else:
-        user_id = user[0]
+    user_id = g.user.id
     today = time.strftime('%Y-%m-%d')
-    c.execute("SELECT id FROM logins WHERE user_id = ? AND login_date = ?", (user_id, today))
-    if not c.fetchone():
-        c.execute("INSERT INTO logins (user_id, login_date) VALUES (?, ?)", (user_id, today))
-        conn.commit()
-    conn.close()
+    c.execute("INSERT OR IGNORE INTO logins (user_id, login_date) VALUES (?, ?)", (user_id, today))
+    if c.rowcount:
+        rollups.record_login(conn, user_id, today)
+    conn.commit()
+    http_cache.bump("stats", ("user", user_id))
     return jsonify({"success": True})
 
-@app.route('/api/record_activity', methods=['POST'])
+@api.route('/api/record_activity', methods=['POST'])
+@require_user()
 def record_activity():
-    token = request.headers.get('Authorization')
-    if not token:
-        return jsonify({"error": "No token provided"}), 401
-    try:
-        payload = verify_clerk_token(token.replace('Bearer ', ''))
-        clerk_id = payload['sub']
-    except Exception as e:
-        return jsonify({"error": str(e)}), 401
     data = request.get_json()
+    try:
+        event = parse_activity(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return queue_activities([event])
+
+@api.route('/api/record_activities', methods=['POST'])
+@require_user()
+def record_activities():
+    """Bulk record_activity: {"events": [{"type", "value"}, ...]} or the bare list"""
+    data = request.get_json(silent=True)
+    events = data.get('events') if isinstance(data, dict) else data
+    if not isinstance(events, list) or not events:
+        return jsonify({"error": "Missing events"}), 400
+    if len(events) > MAX_ACTIVITY_EVENTS:
+        return jsonify({"error": f"At most {MAX_ACTIVITY_EVENTS} events per request"}), 413
+    try:
+        parsed = [parse_activity(event) for event in events]
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return queue_activities(parsed)
+
+def parse_activity(data):
+    """(type, value) from one activity event, or ValueError"""
+    if not isinstance(data, dict):
+        raise ValueError("Invalid event")
     activity_type = data.get('type')
-    value = data.get('value', 1)
-    if not activity_type:
-        return jsonify({"error": "Missing type"}), 400
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT id FROM users WHERE clerk_id = ?", (clerk_id,))
-    user = c.fetchone()
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-    user_id = user[0]
+    if not activity_type or not isinstance(activity_type, str):
+        raise ValueError("Missing type")
+    try:
+        value = int(data.get('value', 1))
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("Invalid value")
+    if not 0 <= value <= MAX_ACTIVITY_VALUE:
+        raise ValueError(f"Value must be between 0 and {MAX_ACTIVITY_VALUE}")
+    return activity_type, value
+
+def queue_activities(events):
+    user_id = g.user.id
     today = time.strftime('%Y-%m-%d')
-    c.execute("INSERT INTO activities (user_id, activity_type, value, activity_date) VALUES (?, ?, ?, ?)", (user_id, activity_type, value, today))
-    conn.commit()
-    conn.close()
-    return jsonify({"success": True})
-
-@app.route('/api/submit_aptitude_score', methods=['POST'])
-def submit_aptitude_score():
-    token = request.headers.get('Authorization')
-    if not token:
-        return jsonify({"error": "No token provided"}), 401
     try:
-        payload = verify_clerk_token(token.replace('Bearer ', ''))
-        clerk_id = payload['sub']
-    except Exception as e:
-        return jsonify({"error": str(e)}), 401
+        activity_buffer.record([(user_id, activity_type, value, today) for activity_type, value in events])
+    except ActivityWriteFailed as e:
+        print(f"❌ {e}")
+        return jsonify({"error": "Could not record activity"}), 503
+    return jsonify({"success": True, "accepted": len(events)})
+
+@api.route('/api/submit_aptitude_score', methods=['POST'])
+@require_user()
+def submit_aptitude_score():
     data = request.get_json()
     score = data.get('score')
     if score is None:
         return jsonify({"error": "Missing score"}), 400
-    conn = sqlite3.connect(DB_PATH)
+    try:
+        score = int(score)
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid score"}), 400
+    if not 0 <= score <= APTITUDE_MAX_SCORE:
+        return jsonify({"error": f"Score must be between 0 and {APTITUDE_MAX_SCORE}"}), 400
+    conn = get_db()
     c = conn.cursor()
-    c.execute("SELECT id FROM users WHERE clerk_id = ?", (clerk_id,))
-    user = c.fetchone()
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-    user_id = user[0]
+    user_id, username = g.user.id, g.user.username
     now = datetime.now().isoformat()
     c.execute("INSERT INTO aptitude_scores (user_id, score, timestamp) VALUES (?, ?, ?)", (user_id, score, now))
+    c.execute("""INSERT INTO aptitude_best (user_id, score, achieved_at) VALUES (?, ?, ?)
+                 ON CONFLICT(user_id) DO UPDATE SET score = excluded.score, achieved_at = excluded.achieved_at
+                 WHERE excluded.score > aptitude_best.score""", (user_id, score, now))
+    rollups.record_aptitude(conn, user_id, score)
     conn.commit()
-    # Calculate rank
-    c.execute("""SELECT user_id, MAX(score) as max_score FROM aptitude_scores GROUP BY user_id ORDER BY max_score DESC""")
-    rankings = c.fetchall()
-    rank = next((i+1 for i, (uid, _) in enumerate(rankings) if uid == user_id), None)
-    conn.close()
-    return jsonify({"success": True, "rank": rank})
-
-@app.route('/api/get_aptitude_leaderboard', methods=['GET'])
+    leaderboard.record(user_id, score, username, now)
+    http_cache.bump("leaderboard", ("user", user_id))
+    return jsonify({"success": True, "rank": leaderboard.rank(user_id)})
+
+@api.route('/api/get_aptitude_leaderboard', methods=['GET'])
 def get_aptitude_leaderboard():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""SELECT u.username, MAX(s.score) as max_score 
-                 FROM aptitude_scores s 
-                 JOIN users u ON s.user_id = u.id 
-                 GROUP BY s.user_id 
-                 ORDER BY max_score DESC 
-                 LIMIT 10""")
-    leaderboard = [{"username": row[0], "score": row[1]} for row in c.fetchall()]
-    conn.close()
-    return jsonify(leaderboard)
-
-@app.route('/api/get_detailed_progress', methods=['GET'])
+    db_ready.ensure(DB_INIT_TIMEOUT)
+    return http_cache.respond("leaderboard", "leaderboard", lambda: leaderboard.top(10))
+
+@api.route('/api/get_detailed_progress', methods=['GET'])
+@require_user()
 def get_detailed_progress():
-    token = request.headers.get('Authorization')
-    if not token:
-        return jsonify({"error": "No token provided"}), 401
+    """Login and activity history; see progress_history for the paging parameters"""
     try:
-        payload = verify_clerk_token(token.replace('Bearer ', ''))
-        clerk_id = payload['sub']
-    except Exception as e:
-        return jsonify({"error": str(e)}), 401
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT id FROM users WHERE clerk_id = ?", (clerk_id,))
-    user = c.fetchone()
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-    user_id = user[0]
-    # Logins
-    c.execute("SELECT login_date FROM logins WHERE user_id = ?", (user_id,))
-    logins = [row[0] for row in c.fetchall()]
-    # Activities by date and type
-    c.execute("""SELECT activity_date, activity_type, SUM(value) 
-                 FROM activities 
-                 WHERE user_id = ? 
-                 GROUP BY activity_date, activity_type""", (user_id,))
-    activities = {}
-    for date, typ, val in c.fetchall():
-        if date not in activities:
-            activities[date] = {}
-        activities[date][typ] = val
-    conn.close()
-    return jsonify({
-        "logins": logins,
-        "activities": activities
-    })
-
-@app.route('/api/get_progress', methods=['GET'])
+        query = progress_history.parse_query(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    user_id = g.user.id
+    activity_buffer.flush_user(user_id)
+    if query is None:
+        return http_cache.respond("detailed_progress", ("user", user_id),
+                                  lambda: progress_history.legacy_history(get_db(), user_id), private=True)
+    return http_cache.respond(("detailed_progress", query), ("user", user_id),
+                              lambda: progress_history.history_page(get_db(), user_id, query), private=True)
+
+@api.route('/api/get_progress', methods=['GET'])
+@require_user(create=True)
 def get_progress():
-    print("🔍 Progress API called")
-    token = request.headers.get('Authorization')
-    print(f"📝 Token received: {token is not None}")
-    
-    if not token:
-        print("❌ No token provided")
-        return jsonify({"error": "No token provided"}), 401
+    print(f"🔍 Progress API called for user {g.user.id}")
+    user_id = g.user.id
+    activity_buffer.flush_user(user_id)
+    return http_cache.respond("progress", ("user", user_id), lambda: progress_payload(get_db(), user_id), private=True)
+
+def progress_payload(conn, user_id):
+    # One row holds every running total the dashboard needs
+    summary = rollups.get_summary(conn, user_id)
+    current_streak = summary["current_streak"]
+    total_days_visited = summary["login_days"]
     
-    try:
-        payload = verify_clerk_token(token.replace('Bearer ', ''))
-        clerk_id = payload['sub']
-        print(f"✅ Token verified for user: {clerk_id}")
-    except Exception as e:
-        print(f"❌ Token verification failed: {str(e)}")
-        return jsonify({"error": str(e)}), 401
-    
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("SELECT id FROM users WHERE clerk_id = ?", (clerk_id,))
-    user = c.fetchone()
-    
-    if not user:
-        print(f"👤 User not found, creating new user for: {clerk_id}")
-        # Create user if not exists
-        username = payload.get('username', 'Unknown')
-        c.execute("INSERT INTO users (clerk_id, username) VALUES (?, ?)", (clerk_id, username))
-        conn.commit()
-        user_id = c.lastrowid
-        print(f"✅ Created new user with ID: {user_id}")
-    else:
-        user_id = user[0]
-        print(f"✅ Found existing user with ID: {user_id}")
-    
-    # Login streak and total days
-    c.execute("SELECT login_date FROM logins WHERE user_id = ? ORDER BY login_date", (user_id,))
-    logins = [row[0] for row in c.fetchall()]
-    current_streak = calculate_streak(logins)
-    total_days_visited = len(set(logins))
-    
-    # Activities with detailed counts
-    c.execute("""SELECT activity_type, SUM(value), COUNT(*) FROM activities 
-                 WHERE user_id = ? GROUP BY activity_type""", (user_id,))
-    act_data = c.fetchall()
+    pdf_count = summary["pdf_total"]
+    video_count = summary["video_total"]
+    quantum_count = summary["quantum_total"]
+    test_count = summary["test_count"]
+    total_marks = summary["test_total"]
+    aptitude_count = summary["aptitude_total"]
     
-    # Initialize counters
-    pdf_count = 0
-    video_count = 0
-    quantum_count = 0
-    test_count = 0
-    total_marks = 0
-    aptitude_count = 0
-    
-    for typ, sm, cnt in act_data:
-        if typ == 'pdf':
-            pdf_count = sm or 0
-        elif typ == 'video':
-            video_count = sm or 0
-        elif typ == 'quantum':
-            quantum_count = sm or 0
-        elif typ == 'test':
-            test_count = cnt or 0
-            total_marks = sm or 0
-        elif typ == 'aptitude':
-            aptitude_count = sm or 0
-    
-    # Get aptitude scores
-    c.execute("SELECT COUNT(*), MAX(score), AVG(score) FROM aptitude_scores WHERE user_id = ?", (user_id,))
-    aptitude_data = c.fetchone()
-    aptitude_tests_taken = aptitude_data[0] or 0
-    best_aptitude_score = aptitude_data[1] or 0
-    avg_aptitude_score = round(aptitude_data[2] or 0, 1)
+    aptitude_tests_taken = summary["aptitude_tests"]
+    best_aptitude_score = summary["aptitude_best"]
+    avg_aptitude_score = round(summary["aptitude_score_sum"] / aptitude_tests_taken, 1) if aptitude_tests_taken else 0
     
     # Calculate percentages for progress bars
     total_pdf = 50  # Assume 50 PDFs available
@@ -1474,18 +1801,11 @@ def get_progress():
     overall_progress = round((pdf_pct + video_pct + quantum_pct) / 3, 1)
     
     # Get recent activity (last 7 days)
-    from datetime import datetime, timedelta
     week_ago = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
-    c.execute("""SELECT activity_date, activity_type, SUM(value) 
-                 FROM activities 
-                 WHERE user_id = ? AND activity_date >= ? 
-                 GROUP BY activity_date, activity_type 
-                 ORDER BY activity_date DESC""", (user_id, week_ago))
-    recent_activities = c.fetchall()
+    recent_activities = rollups.recent_activity(conn, user_id, week_ago)
     
-    conn.close()
     
-    return jsonify({
+    return {
         # Basic progress percentages
         "pdfNotesRead": round(pdf_pct, 1),
         "lecturesWatched": round(video_pct, 1),
@@ -1501,8 +1821,9 @@ def get_progress():
         
         # Streak and visit data
         "currentStreak": current_streak,
+        "longestStreak": summary["longest_streak"],
         "totalDaysVisited": total_days_visited,
-        "totalLogins": len(logins),
+        "totalLogins": summary["login_days"],
         
         # Test and score data
         "testsAttempted": test_count,
@@ -1522,10 +1843,53 @@ def get_progress():
         
         # Legacy fields for compatibility
         "streak": current_streak
-    })
+    }
+
+# ---------------------------
+# App factory
+# ---------------------------
+def create_app():
+    """Build the Flask app. Nothing here touches the network or the schema:
+    init_db and the JWKS fetch start in the background once it returns."""
+    boot_timer.record("module_load", time.perf_counter() - boot_timer.started)
+    with boot_timer.phase("create_app"):
+        app = Flask(__name__)
+
+        # Configure CORS for production
+        CORS(app, 
+             origins=["*"],  # Allow all origins for now, restrict in production
+             methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+             allow_headers=["Content-Type", "Authorization"],
+             supports_credentials=True)
+
+        app.register_blueprint(api)
+        app.teardown_appcontext(release_db)
+        socketio.init_app(app, 
+                          cors_allowed_origins="*", 
+                          async_mode="eventlet", 
+                          transports=["websocket", "polling"],
+                          logger=True,
+                          engineio_logger=True,
+                          **state_backend.message_queue_options())
+
+    db_ready.start(socketio.start_background_task)
+    jwks_prefetch.start(socketio.start_background_task)
+    jwks_cache.start_background_refresh()
+    queue_updates.start(socketio.start_background_task)
+    socket_state.start(socketio.start_background_task)
+    presence.start(socketio.start_background_task)
+    activity_buffer.start(socketio.start_background_task)
+    stats_reconciler.start(socketio.start_background_task)
+    boot_timer.mark_ready()
+    print(f"🚀 App built in {boot_timer.summary()}")
+    return app
+
+app = create_app()
 
 # ---------------------------
 # Flask Run
 # ---------------------------
 if __name__ == "__main__":
+    # Exit through atexit on SIGTERM too, so buffered activity gets written
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
     socketio.run(app, debug=True, port=5000, use_reloader=False)
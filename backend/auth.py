@@ -0,0 +1,154 @@
+"""Clerk session token verification with cached keys and results.
+
+JWKSCache holds Clerk's signing keys. It refreshes them in the background
+and refetches straight away when a token names a kid it doesn't know
+(key rotation), at most once per min_refetch_interval so a stream of
+forged kids can't hammer Clerk.
+
+TokenVerifier remembers tokens it has already verified, keyed by their
+sha256, until the token's own exp. The dashboard sends the same session
+token on every call, so only the first pays for an RS256 check.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from jose import jwt
+
+
+class AuthError(Exception):
+    pass
+
+
+class JWKSCache:
+    def __init__(self, url, http_client, refresh_interval=3600, min_refetch_interval=30):
+        self.url = url
+        self.http_client = http_client
+        self.refresh_interval = refresh_interval
+        self.min_refetch_interval = min_refetch_interval
+        self._lock = threading.Lock()
+        self._keys = {}
+        self.fetched_at = None
+        self._last_attempt = None
+        self._refresher = None
+        self.counters = {"fetches": 0, "fetch_errors": 0, "kid_misses": 0, "refetches_skipped": 0}
+
+    @classmethod
+    def from_env(cls, url, http_client):
+        return cls(
+            url, http_client,
+            refresh_interval=float(os.getenv("JWKS_REFRESH_SECONDS", "3600")),
+            min_refetch_interval=float(os.getenv("JWKS_MIN_REFETCH_SECONDS", "30"))
+        )
+
+    def refresh(self):
+        """Fetch the key set; on failure the keys already held stay in use"""
+        with self._lock:
+            self._last_attempt = time.monotonic()
+        try:
+            keys = self.http_client.get(self.url).json()["keys"]
+        except Exception as e:
+            with self._lock:
+                self.counters["fetch_errors"] += 1
+            print(f"⚠️ Failed to fetch JWKS from Clerk: {e}")
+            return False
+        with self._lock:
+            self._keys = {key["kid"]: key for key in keys if "kid" in key}
+            self.fetched_at = time.time()
+            self.counters["fetches"] += 1
+        return True
+
+    def get_key(self, kid):
+        with self._lock:
+            key = self._keys.get(kid)
+            if key is not None:
+                return key
+            self.counters["kid_misses"] += 1
+            recently = (self._last_attempt is not None
+                        and time.monotonic() - self._last_attempt < self.min_refetch_interval)
+            if recently:
+                self.counters["refetches_skipped"] += 1
+        if recently:
+            return None
+        self.refresh()
+        with self._lock:
+            return self._keys.get(kid)
+
+    def start_background_refresh(self):
+        if self._refresher is not None:
+            return
+        self._refresher = threading.Thread(target=self._refresh_loop, daemon=True)
+        self._refresher.start()
+
+    def _refresh_loop(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            self.refresh()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["keys"] = len(self._keys)
+            stats["age_seconds"] = round(time.time() - self.fetched_at, 1) if self.fetched_at else None
+        return stats
+
+
+class TokenVerifier:
+    def __init__(self, jwks, audience, issuer, cache_size=4096):
+        self.jwks = jwks
+        self.audience = audience
+        self.issuer = issuer
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # sha256(token) -> (payload, exp), least recently used first
+        self.counters = {"verifications": 0, "cache_hits": 0, "failures": 0}
+
+    @classmethod
+    def from_env(cls, jwks, audience, issuer):
+        return cls(jwks, audience, issuer, cache_size=int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "4096")))
+
+    def verify(self, token):
+        """Return the token's claims or raise AuthError"""
+        digest = hashlib.sha256(token.encode()).digest()
+        now = time.time()
+        with self._lock:
+            cached = self._cache.get(digest)
+            if cached is not None:
+                if cached[1] > now:
+                    self._cache.move_to_end(digest)
+                    self.counters["cache_hits"] += 1
+                    return dict(cached[0])
+                del self._cache[digest]
+
+        try:
+            payload = self._verify_signature(token)
+        except Exception as e:
+            with self._lock:
+                self.counters["failures"] += 1
+            raise AuthError(f"JWT verification failed: {str(e)}")
+
+        exp = payload.get("exp")
+        with self._lock:
+            self.counters["verifications"] += 1
+            if isinstance(exp, (int, float)) and exp > now:
+                self._cache[digest] = (payload, exp)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return dict(payload)
+
+    def _verify_signature(self, token):
+        header = jwt.get_unverified_header(token)
+        key = self.jwks.get_key(header.get("kid"))
+        if not key:
+            raise Exception("Matching JWKS key not found.")
+        return jwt.decode(token, key, algorithms=["RS256"], audience=self.audience, issuer=self.issuer)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["cached_tokens"] = len(self._cache)
+        checks = stats["verifications"] + stats["cache_hits"]
+        stats["hit_rate"] = round(stats["cache_hits"] / checks, 3) if checks else 0.0
+        return stats
@@ -0,0 +1,116 @@
+"""Startup bookkeeping: per-phase boot timings and run-once deferred init.
+
+Nothing slow or networked should run while the module is imported, or a
+worker with no route to Clerk never starts serving. Slow setup is wrapped
+in a Deferred instead: it starts on a background greenlet once the app
+is built, and anything that needs it calls ensure(), which waits for
+(or, if nothing started it, runs) the one shared attempt. A failed attempt
+(a busy lock, say) is not final: once its backoff has passed, the next
+ensure() tries again, doubling the wait after each failure up to max_backoff.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+PROCESS_START = time.perf_counter()
+
+
+class BootTimer:
+    def __init__(self, started=PROCESS_START):
+        self.started = started
+        self.phases = {}
+        self._lock = threading.Lock()
+        self.ready_at = None
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name, seconds):
+        with self._lock:
+            self.phases[name] = round(seconds * 1000, 2)
+
+    def mark_ready(self):
+        self.ready_at = time.perf_counter()
+
+    def report(self):
+        with self._lock:
+            phases = dict(self.phases)
+        total = (self.ready_at or time.perf_counter()) - self.started
+        return {"phases_ms": phases, "ready_ms": round(total * 1000, 2), "ready": self.ready_at is not None}
+
+    def summary(self):
+        report = self.report()
+        parts = ", ".join(f"{name} {ms:.0f}ms" for name, ms in report["phases_ms"].items())
+        return f"{report['ready_ms']:.0f}ms ({parts})"
+
+
+class Deferred:
+    """Run fn once, in the background or on first use, retrying it after a failure"""
+
+    def __init__(self, name, fn, timer=None, backoff=1.0, max_backoff=60.0):
+        self.name = name
+        self.fn = fn
+        self.timer = timer
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._started = False
+        self.error = None
+        self.failures = 0
+        self._retry_at = 0.0
+
+    def start(self, spawn):
+        """Kick off fn via spawn(callable), e.g. socketio.start_background_task"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        spawn(self._run)
+
+    def ensure(self, timeout=None):
+        """Block until fn has finished, running it here if nobody started it
+        or if the last attempt failed and its backoff has passed"""
+        if self._done.is_set() and self.error is None:
+            return
+        with self._lock:
+            if self._done.is_set() and self.error is not None and time.monotonic() >= self._retry_at:
+                print(f"🔁 Retrying {self.name} (attempt {self.failures + 1})")
+                self._done.clear()  # before error, so nobody sees done without an error meanwhile
+                self.error = None
+                self._started = False
+            run_here = not self._started
+            self._started = True
+        if run_here:
+            self._run()
+        elif not self._done.wait(timeout):
+            raise TimeoutError(f"{self.name} is still initialising")
+        if self.error is not None:
+            raise RuntimeError(f"{self.name} failed to initialise: {self.error}")
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def _run(self):
+        started = time.perf_counter()
+        try:
+            self.fn()
+        except Exception as e:
+            with self._lock:
+                self.failures += 1
+                delay = min(self.backoff * 2 ** (self.failures - 1), self.max_backoff)
+                self._retry_at = time.monotonic() + delay
+                self.error = e
+            print(f"❌ {self.name} failed to initialise, retrying on next use after {delay:g}s: {e}")
+        else:
+            self.failures = 0
+        finally:
+            if self.timer is not None:
+                self.timer.record(self.name, time.perf_counter() - started)
+            self._done.set()
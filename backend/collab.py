@@ -0,0 +1,119 @@
+"""Incremental code sync for interview rooms.
+
+Instead of re-sending the whole buffer on every keystroke, the editor
+sends one edit {pos, delete, insert} against the document version it last
+saw. The server keeps the authoritative Document per interview room:
+it transforms an edit past any edits from other authors that landed after
+that version, applies it, bumps the version and relays the transformed
+edit to the room. Edits are a few bytes whatever the file size.
+
+Clients keep one edit in flight and send what was typed meanwhile as one
+edit after the ack, so an author's own unseen edits can only sit right
+after its base version, ahead of everyone else's; those are skipped, not
+transformed. An edit whose base has another author's edit before one of
+its author's own can't be placed reliably and is rejected, which sends the
+client a resync.
+
+A client that falls behind (an edit based on a version older than the
+kept history, an edit that doesn't fit, or remote edits arriving while
+its own are in flight) asks for a snapshot {version, code} and carries on
+from there. The server also pushes a snapshot to the room every few
+hundred versions, so drift can't outlive a round.
+"""
+from collections import deque
+
+MAX_DOCUMENT_CHARS = 200_000
+
+
+class EditRejected(Exception):
+    pass
+
+
+def normalize_edit(raw):
+    """{pos, delete, insert} with the right types, or EditRejected"""
+    if not isinstance(raw, dict):
+        raise EditRejected("Edit must be an object")
+    pos, delete, insert = raw.get("pos"), raw.get("delete", 0), raw.get("insert", "")
+    if not isinstance(pos, int) or not isinstance(delete, int) or not isinstance(insert, str):
+        raise EditRejected("Edit needs integer pos/delete and string insert")
+    if pos < 0 or delete < 0:
+        raise EditRejected("Edit offsets must be non-negative")
+    return {"pos": pos, "delete": delete, "insert": insert}
+
+
+def apply_edit(text, edit):
+    end = edit["pos"] + edit["delete"]
+    if end > len(text):
+        raise EditRejected(f"Edit ends at {end}, past the end of the document ({len(text)})")
+    return text[:edit["pos"]] + edit["insert"] + text[end:]
+
+
+def _map_start(offset, applied):
+    """Where an edit starting at offset starts once applied has run. Starts inside
+    the text applied replaced, or at its insertion point, move past its insert."""
+    if offset < applied["pos"]:
+        return offset
+    if offset >= applied["pos"] + applied["delete"]:
+        return offset - applied["delete"] + len(applied["insert"])
+    return applied["pos"] + len(applied["insert"])
+
+
+def _map_end(offset, applied):
+    """Where an edit ending at offset ends once applied has run. Ends inside the
+    text applied replaced stop before its insert, so that insert survives."""
+    if offset <= applied["pos"]:
+        return offset
+    if offset > applied["pos"] + applied["delete"]:
+        return offset - applied["delete"] + len(applied["insert"])
+    return applied["pos"]
+
+
+def transform(edit, applied):
+    """Rewrite edit, made without seeing applied, to apply after it. On a tie the applied insert goes first."""
+    start = _map_start(edit["pos"], applied)
+    end = max(start, _map_end(edit["pos"] + edit["delete"], applied)) if edit["delete"] else start
+    return {"pos": start, "delete": end - start, "insert": edit["insert"]}
+
+
+class Document:
+    def __init__(self, text="", version=0, history=None, history_size=200):
+        self.text = text
+        self.version = version
+        self.history_size = history_size
+        self.history = deque(history or (), maxlen=history_size)  # (version, author, edit), oldest first
+
+    def apply(self, raw_edit, base_version, author):
+        """Apply an edit made against base_version; returns (new version, edit as applied)"""
+        edit = normalize_edit(raw_edit)
+        if not isinstance(base_version, int) or base_version > self.version:
+            raise EditRejected(f"Unknown base version {base_version!r}")
+        oldest = self.history[0][0] - 1 if self.history else self.version
+        if base_version < oldest:
+            raise EditRejected(f"Base version {base_version} is older than the kept history")
+        foreign = False
+        for version, other, applied in self.history:
+            if version <= base_version:
+                continue
+            if other != author:
+                edit = transform(edit, applied)
+                foreign = True
+            elif foreign:
+                raise EditRejected(f"Edit based on {base_version} interleaves with others' edits")
+            # else: the author's own edit, already in the text its edit was made against
+        text = apply_edit(self.text, edit)
+        if len(text) > MAX_DOCUMENT_CHARS:
+            raise EditRejected(f"Documents are limited to {MAX_DOCUMENT_CHARS} characters")
+        self.text = text
+        self.version += 1
+        self.history.append((self.version, author, edit))
+        return self.version, edit
+
+    def snapshot(self):
+        return {"version": self.version, "code": self.text}
+
+    def to_dict(self):
+        return {"text": self.text, "version": self.version, "history": [list(h) for h in self.history]}
+
+    @classmethod
+    def from_dict(cls, data, history_size=200):
+        return cls(data["text"], data["version"], [tuple(h) for h in data["history"]], history_size)
@@ -0,0 +1,137 @@
+"""Content-addressed cache of compiled C, C++ and Java artifacts.
+
+Interview sessions run the same starter code hundreds of times, so builds
+are keyed by sha256(compile command + source file name + source) and kept
+on local disk. A hit skips the compiler entirely. The cache is bounded in
+bytes and evicts least recently used builds, never one that is currently
+checked out by a running program.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+def _dir_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+class CompileCache:
+    def __init__(self, root, max_bytes=256 * 1024 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> size in bytes, least recently used first
+        self._in_use = {}
+        self.bytes_used = 0
+        self.counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        os.makedirs(root, exist_ok=True)
+        self._load()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            os.getenv("COMPILE_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "alphax-compile-cache"),
+            max_bytes=int(float(os.getenv("COMPILE_CACHE_MAX_MB", "256")) * 1024 * 1024)
+        )
+
+    def _load(self):
+        """Index builds left on disk by a previous process, oldest access first"""
+        found = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.startswith(".staging-"):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.isdir(path):
+                found.append((os.path.getmtime(path), name, _dir_size(path)))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self.bytes_used += size
+        with self._lock:
+            self._evict()
+
+    @staticmethod
+    def key(compile_cmd, source_name, source):
+        raw = json.dumps([compile_cmd, source_name]) + "\0" + source
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    @contextmanager
+    def checkout(self, key):
+        """Yield the artifact directory for key (None on a miss); it can't be evicted meanwhile"""
+        with self._lock:
+            hit = key in self._entries
+            if hit:
+                self._entries.move_to_end(key)
+                self._in_use[key] = self._in_use.get(key, 0) + 1
+                self.counters["hits"] += 1
+            else:
+                self.counters["misses"] += 1
+        if not hit:
+            yield None
+            return
+
+        path = os.path.join(self.root, key)
+        try:
+            os.utime(path)  # keeps LRU order across restarts
+        except OSError:
+            pass
+        try:
+            yield path
+        finally:
+            with self._lock:
+                self._in_use[key] -= 1
+                if not self._in_use[key]:
+                    del self._in_use[key]
+                self._evict()
+
+    def store(self, key, build_dir, exclude=()):
+        """Copy the files produced in build_dir into the cache under key"""
+        staging = os.path.join(self.root, f".staging-{uuid.uuid4().hex}")
+        shutil.copytree(build_dir, staging, ignore=lambda d, names: [n for n in names if n in exclude])
+        size = _dir_size(staging)
+        final = os.path.join(self.root, key)
+        with self._lock:
+            if key in self._entries:  # a concurrent build of the same source won
+                shutil.rmtree(staging, ignore_errors=True)
+                return
+            os.rename(staging, final)
+            self._entries[key] = size
+            self.bytes_used += size
+            self.counters["stores"] += 1
+            self._evict()
+
+    def _evict(self):
+        for key in list(self._entries):
+            if self.bytes_used <= self.max_bytes:
+                break
+            if key in self._in_use:
+                continue
+            self.bytes_used -= self._entries.pop(key)
+            shutil.rmtree(os.path.join(self.root, key), ignore_errors=True)
+            self.counters["evictions"] += 1
+
+    def hit_rate(self):
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return round(self.counters["hits"] / lookups, 3) if lookups else 0.0
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self.bytes_used
+            stats["max_bytes"] = self.max_bytes
+        stats["hit_rate"] = self.hit_rate()
+        return stats
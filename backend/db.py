@@ -0,0 +1,122 @@
+"""Pooled SQLite connections for progress.db.
+
+Opening a connection per request re-reads the schema and throws away the
+prepared-statement cache every time. Connections here are opened once,
+switched to WAL (readers no longer wait for writers) with
+synchronous=NORMAL, and handed out from a small pool. Whatever a caller
+leaves uncommitted is rolled back on release, so an early return can never
+leak a connection or hold a write lock.
+"""
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+class PoolExhausted(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, path, size=8, timeout=5.0, cached_statements=256, busy_timeout_ms=5000):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self.busy_timeout_ms = busy_timeout_ms
+        self._idle = queue.LifoQueue()  # most recently used first: its statement cache is warm
+        self._lock = threading.Lock()
+        self._opened = 0
+        self.closed = False
+        self.counters = {"acquired": 0, "opened": 0, "waits": 0, "rollbacks": 0}
+
+    @classmethod
+    def from_env(cls, path):
+        return cls(
+            path,
+            size=int(os.getenv("DB_POOL_SIZE", "8")),
+            timeout=float(os.getenv("DB_POOL_TIMEOUT", "5"))
+        )
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,  # handed between workers, never shared at once
+            cached_statements=self.cached_statements
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        return conn
+
+    def acquire(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+        if conn is None:
+            with self._lock:
+                can_open = self._opened < self.size
+                if can_open:
+                    self._opened += 1
+                    self.counters["opened"] += 1
+            if can_open:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._opened -= 1
+                    raise
+            else:
+                with self._lock:
+                    self.counters["waits"] += 1
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise PoolExhausted(f"No database connection free after {self.timeout} s")
+        with self._lock:
+            self.counters["acquired"] += 1
+        return conn
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+            with self._lock:
+                self.counters["rollbacks"] += 1
+        if self.closed:
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+            return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of the with block"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["open"] = self._opened
+        stats["idle"] = self._idle.qsize()
+        stats["size"] = self.size
+        return stats
+
+    def close(self):
+        self.closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+
@@ -0,0 +1,184 @@
+"""Bounded execution scheduler for /api/execute.
+
+Each language gets its own lane: a FIFO queue drained by a fixed number of
+workers, so a burst of submissions never starts more compilers than the box
+can take. Submissions beyond a lane's queue limit are rejected (QueueFull,
+served as HTTP 429). Jobs can be awaited inline or polled by id later.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+DEFAULT_WORKERS = {"python": 4, "javascript": 2, "java": 1, "cpp": 2, "c": 2}
+
+LANGUAGE_ALIASES = {"c++": "cpp"}
+
+
+class QueueFull(Exception):
+    def __init__(self, language, retry_after):
+        super().__init__(f"Too many {language} submissions queued, try again shortly")
+        self.language = language
+        self.retry_after = retry_after
+
+
+class ExecutionJob:
+    def __init__(self, code, language, notify=None, task=None):
+        self.id = uuid.uuid4().hex
+        self.code = code
+        self.language = language
+        self.notify = notify
+        self.task = task
+        self.status = "queued"
+        self.result = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.done = threading.Event()
+
+    def to_dict(self):
+        job = {"jobId": self.id, "language": self.language, "status": self.status}
+        if self.started_at:
+            job["queueTime"] = self.started_at - self.created_at
+        if self.result is not None:
+            job["result"] = self.result
+        return job
+
+
+class _Lane:
+    def __init__(self, language, workers):
+        self.language = language
+        self.workers = workers
+        self.queue = deque()
+        self.ready = threading.Condition()
+        self.running = 0
+        self.started = False
+        self.completed = 0
+        self.rejected = 0
+        self.total_run_time = 0.0
+
+
+class ExecutionScheduler:
+    def __init__(self, run_fn, workers=None, max_queue=20, job_ttl=300):
+        self.run_fn = run_fn  # run_fn(code, language) -> result dict
+        self.max_queue = max_queue
+        self.job_ttl = job_ttl
+        self._lanes = {
+            language: _Lane(language, count)
+            for language, count in dict(DEFAULT_WORKERS, **(workers or {})).items()
+        }
+        self._jobs_lock = threading.Lock()
+        self._jobs = OrderedDict()  # job id -> job, oldest first
+
+    @classmethod
+    def from_env(cls, run_fn):
+        workers = {
+            language: int(os.environ[f"EXEC_WORKERS_{language.upper()}"])
+            for language in DEFAULT_WORKERS
+            if os.getenv(f"EXEC_WORKERS_{language.upper()}")
+        }
+        return cls(run_fn, workers=workers, max_queue=int(os.getenv("EXEC_QUEUE_LIMIT", "20")))
+
+    @staticmethod
+    def normalize(language):
+        language = (language or "python").lower()
+        return LANGUAGE_ALIASES.get(language, language)
+
+    def supports(self, language):
+        return self.normalize(language) in self._lanes
+
+    def submit(self, code, language, notify=None, task=None):
+        """Queue a job; raises QueueFull when the lane is saturated.
+
+        task, if given, is called instead of run_fn(code, language).
+        """
+        lane = self._lanes[self.normalize(language)]
+        job = ExecutionJob(code, lane.language, notify, task)
+        with lane.ready:
+            if len(lane.queue) >= self.max_queue:
+                lane.rejected += 1
+                raise QueueFull(lane.language, self._retry_after(lane))
+            lane.queue.append(job)
+            if not lane.started:
+                lane.started = True
+                for _ in range(lane.workers):
+                    threading.Thread(target=self._work, args=(lane,), daemon=True).start()
+            lane.ready.notify()
+        with self._jobs_lock:
+            self._purge()
+            self._jobs[job.id] = job
+        return job
+
+    def run(self, code, language, timeout=120, task=None):
+        """Submit and wait for the result"""
+        job = self.submit(code, language, task=task)
+        if not job.done.wait(timeout):
+            raise TimeoutError("Execution did not finish in time")
+        return job.result
+
+    def get(self, job_id):
+        with self._jobs_lock:
+            self._purge()
+            return self._jobs.get(job_id)
+
+    def position(self, job):
+        lane = self._lanes[job.language]
+        with lane.ready:
+            try:
+                return lane.queue.index(job) + 1
+            except ValueError:
+                return 0
+
+    def _retry_after(self, lane):
+        avg = lane.total_run_time / lane.completed if lane.completed else 1.0
+        return max(1, int(avg * len(lane.queue) / lane.workers + 0.5))
+
+    def _purge(self):
+        cutoff = time.time() - self.job_ttl
+        for job_id, job in list(self._jobs.items()):
+            if job.created_at >= cutoff:
+                break
+            if job.done.is_set():
+                del self._jobs[job_id]
+
+    def _work(self, lane):
+        while True:
+            with lane.ready:
+                while not lane.queue:
+                    lane.ready.wait()
+                job = lane.queue.popleft()
+                lane.running += 1
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                job.result = job.task() if job.task else self.run_fn(job.code, job.language)
+            except Exception as e:
+                job.result = {"success": False, "error": str(e), "output": "", "execution_time": 0}
+            job.finished_at = time.time()
+            job.status = "done"
+            with lane.ready:
+                lane.running -= 1
+                lane.completed += 1
+                lane.total_run_time += job.finished_at - job.started_at
+            job.done.set()
+            if job.notify:
+                try:
+                    job.notify(job)
+                except Exception as e:
+                    print(f"⚠️ Failed to deliver execution result {job.id}: {e}")
+
+    def stats(self):
+        lanes = {}
+        for language, lane in self._lanes.items():
+            with lane.ready:
+                lanes[language] = {
+                    "workers": lane.workers,
+                    "running": lane.running,
+                    "queued": len(lane.queue),
+                    "completed": lane.completed,
+                    "rejected": lane.rejected
+                }
+        with self._jobs_lock:
+            tracked = len(self._jobs)
+        return {"max_queue": self.max_queue, "tracked_jobs": tracked, "lanes": lanes}
@@ -0,0 +1,106 @@
+"""Versioned response cache with ETag revalidation for polled read routes.
+
+The dashboards poll progress, stats and the leaderboard every few
+seconds, and each poll ran the SQL and re-encoded the JSON even when
+nothing had changed. Each cacheable resource now has a version counter:
+one per user for that user's progress, one shared counter for stats and
+one for the leaderboard. The write paths bump the counter of whatever
+they touch. A read whose resource version still matches its cached entry,
+and whose entry is younger than the TTL, reuses the encoded body. If the
+client's If-None-Match matches, it gets an empty 304 instead.
+
+The ETag is a hash of the body itself, not of the version. A rebuild that
+produces the same bytes therefore keeps the ETag, and clients still get
+304s. Versions only decide when the server may skip rebuilding. Writes
+from another process or a new day don't bump this process's counters,
+so the TTL bounds how long it can serve a body built before them.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Response, request
+
+
+class ResourceVersions:
+    """Write counters per scope: ("user", id), "stats", ... Several cached resources can share one"""
+
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._versions.get(key, 0)
+
+    def bump(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._versions[key] = self._versions.get(key, 0) + 1
+
+
+class HttpCache:
+    def __init__(self, ttl=10.0, max_entries=5000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.versions = ResourceVersions()
+        self._entries = OrderedDict()  # (resource, scope) -> (version, expires_at, body, etag)
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "not_modified": 0, "evictions": 0}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            ttl=float(os.getenv("HTTP_CACHE_TTL", "10")),
+            max_entries=int(os.getenv("HTTP_CACHE_ENTRIES", "5000"))
+        )
+
+    def bump(self, *scopes):
+        self.versions.bump(*scopes)
+
+    def lookup(self, resource, scope, build):
+        """(body, etag) for resource, from the cache while scope's version and the TTL hold, else from build()"""
+        key = (resource, scope)
+        version = self.versions.get(scope)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version and now < entry[1]:
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return entry[2], entry[3]
+            self.counters["misses"] += 1
+        body = json.dumps(build(), separators=(",", ":"), sort_keys=True).encode()
+        etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        with self._lock:
+            # A write during build() bumped the version past ours: the next read rebuilds
+            self._entries[key] = (version, now + self.ttl, body, etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters["evictions"] += 1
+        return body, etag
+
+    def respond(self, resource, scope, build, private=False):
+        """A 200 with the cached JSON body, or a 304 if the request's If-None-Match still holds"""
+        body, etag = self.lookup(resource, scope, build)
+        headers = {
+            "ETag": etag,
+            # Let browsers keep the body but revalidate on every poll
+            "Cache-Control": "private, no-cache" if private else "no-cache"
+        }
+        if request.if_none_match.contains(etag.strip('"')):
+            with self._lock:
+                self.counters["not_modified"] += 1
+            return Response(status=304, headers=headers)
+        return Response(body, status=200, mimetype="application/json", headers=headers)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["entries"] = len(self._entries)
+        stats.update(ttl=self.ttl, max_entries=self.max_entries)
+        return stats
@@ -0,0 +1,196 @@
+"""Shared outbound HTTP client (OpenRouter, Clerk JWKS).
+
+One pooled requests.Session with HTTP keep-alive, a cap on concurrent
+requests per host, separate connect/read timeouts and pool hit/miss counters.
+
+Streams (chat completions) hold their connection for as long as the model
+keeps talking, so they get a session and per-host cap of their own
+(stream_limit): a room full of open chats can't starve the JWKS fetch or
+a plain request, and short requests never make a chat wait.
+"""
+import os
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+class HostBusyError(requests.exceptions.RequestException):
+    """Raised when a host's concurrency limit stays saturated past the acquire timeout"""
+
+
+class PoolMetrics:
+    """Thread-safe connection checkout counters, per host"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hosts = {}
+
+    def record(self, host, reused):
+        with self._lock:
+            counts = self.hosts.setdefault(host, {"hits": 0, "misses": 0})
+            counts["hits" if reused else "misses"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            hosts = {host: dict(counts) for host, counts in self.hosts.items()}
+        hits = sum(c["hits"] for c in hosts.values())
+        misses = sum(c["misses"] for c in hosts.values())
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / total, 3) if total else 0.0,
+            "hosts": hosts
+        }
+
+
+def _counting_pool(base, metrics):
+    class CountingPool(base):
+        def _get_conn(self, timeout=None):
+            conn = super()._get_conn(timeout=timeout)
+            # An idle kept-alive connection still holds its socket; a new one connects lazily
+            metrics.record(self.host, reused=getattr(conn, "sock", None) is not None)
+            return conn
+    return CountingPool
+
+
+class PooledAdapter(HTTPAdapter):
+    def __init__(self, metrics, **kwargs):
+        self.metrics = metrics
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _counting_pool(HTTPConnectionPool, self.metrics),
+            "https": _counting_pool(HTTPSConnectionPool, self.metrics)
+        }
+
+
+class HTTPClient:
+    """Pooled keep-alive HTTP client shared by every outbound call"""
+
+    def __init__(self, pool_connections=10, pool_maxsize=20, per_host_limit=10,
+                 connect_timeout=5.0, read_timeout=30.0, acquire_timeout=10.0, stream_limit=100):
+        self.per_host_limit = per_host_limit
+        self.stream_limit = stream_limit
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.acquire_timeout = acquire_timeout
+        self.metrics = PoolMetrics()
+
+        self.session = self._session(pool_connections, pool_maxsize)
+        # Sized to stream_limit so a stream that got its slot never queues for a socket
+        self.stream_session = self._session(pool_connections, stream_limit)
+
+        self._limits_lock = threading.Lock()
+        self._host_limits = {}  # (host, streaming) -> BoundedSemaphore
+        self._in_flight = {}
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            pool_maxsize=int(os.getenv("HTTP_POOL_MAXSIZE", "20")),
+            per_host_limit=int(os.getenv("HTTP_PER_HOST_LIMIT", "10")),
+            connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT", "5")),
+            read_timeout=float(os.getenv("HTTP_READ_TIMEOUT", "30")),
+            stream_limit=int(os.getenv("HTTP_STREAM_LIMIT", "100"))
+        )
+
+    def _session(self, pool_connections, pool_maxsize):
+        session = requests.Session()
+        adapter = PooledAdapter(
+            self.metrics,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=True  # never open more than pool_maxsize sockets per host
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _timeout(self, connect_timeout, read_timeout):
+        return (
+            self.connect_timeout if connect_timeout is None else connect_timeout,
+            self.read_timeout if read_timeout is None else read_timeout
+        )
+
+    @contextmanager
+    def _host_slot(self, url, streaming=False):
+        host = urlsplit(url).netloc
+        key = (host, streaming)
+        with self._limits_lock:
+            limit = self._host_limits.get(key)
+            if limit is None:
+                limit = self._host_limits[key] = threading.BoundedSemaphore(
+                    self.stream_limit if streaming else self.per_host_limit)
+        if not limit.acquire(timeout=self.acquire_timeout):
+            raise HostBusyError(f"Too many concurrent {'streams' if streaming else 'requests'} to {host}")
+        with self._limits_lock:
+            self._in_flight[key] = self._in_flight.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            with self._limits_lock:
+                self._in_flight[key] -= 1
+            limit.release()
+
+    def request(self, method, url, connect_timeout=None, read_timeout=None, **kwargs):
+        """Send a request and read the full body; the host slot is released on return"""
+        kwargs.pop("stream", None)
+        with self._host_slot(url):
+            return self.session.request(
+                method, url, timeout=self._timeout(connect_timeout, read_timeout), **kwargs
+            )
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    @contextmanager
+    def stream(self, method, url, connect_timeout=None, read_timeout=None, **kwargs):
+        """Open a streaming response; its stream slot is held until the block exits.
+
+        For streams the read timeout bounds the gap between chunks, not the total.
+        """
+        with self._host_slot(url, streaming=True):
+            response = self.stream_session.request(
+                method, url, timeout=self._timeout(connect_timeout, read_timeout),
+                stream=True, **kwargs
+            )
+            try:
+                yield response
+            finally:
+                response.close()
+
+    def stats(self):
+        stats = self.metrics.snapshot()
+        with self._limits_lock:
+            stats["in_flight"] = {host: n for (host, streaming), n in self._in_flight.items() if n and not streaming}
+            stats["streams"] = {host: n for (host, streaming), n in self._in_flight.items() if n and streaming}
+        stats["per_host_limit"] = self.per_host_limit
+        stats["stream_limit"] = self.stream_limit
+        return stats
+
+    def close(self):
+        self.session.close()
+        self.stream_session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """Return the process-wide client, creating it from the environment on first use"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HTTPClient.from_env()
+        return _client
@@ -0,0 +1,78 @@
+"""clerk_id -> user row resolution for authenticated routes.
+
+Every route used to verify the JWT and then run
+SELECT id FROM users WHERE clerk_id = ? on top, and record_login and
+get_progress followed a miss with an INSERT, which two concurrent first
+requests could both attempt. A user's id and name never change once the
+row exists, so UserDirectory keeps a bounded LRU map of them in process:
+after the first request a user costs no query at all. Creating a user is
+an INSERT ... ON CONFLICT(clerk_id) DO NOTHING followed by a read of
+whichever row won, so concurrent first requests agree on one id.
+"""
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+import rollups
+
+User = namedtuple("User", "id clerk_id username")
+
+
+class UserDirectory:
+    def __init__(self, max_entries=10000, on_create=None):
+        self.max_entries = max_entries
+        self.on_create = on_create  # called with the new User after its row is committed
+        self._users = OrderedDict()  # clerk_id -> User, least recently used first
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "created": 0, "evictions": 0}
+
+    @classmethod
+    def from_env(cls, on_create=None):
+        return cls(max_entries=int(os.getenv("USER_CACHE_SIZE", "10000")), on_create=on_create)
+
+    def resolve(self, conn, clerk_id, username=None, create=False):
+        """The User for clerk_id, inserting it first when create is set; None if there is none"""
+        with self._lock:
+            user = self._users.get(clerk_id)
+            if user is not None:
+                self._users.move_to_end(clerk_id)
+                self.counters["hits"] += 1
+                return user
+            self.counters["misses"] += 1
+        if create:
+            cur = conn.execute("""INSERT INTO users (clerk_id, username) VALUES (?, ?)
+                                  ON CONFLICT(clerk_id) DO NOTHING""", (clerk_id, username or "Unknown"))
+            created = cur.rowcount > 0
+            if created:
+                rollups.record_user(conn)
+            conn.commit()
+        row = conn.execute("SELECT id, username FROM users WHERE clerk_id = ?", (clerk_id,)).fetchone()
+        if row is None:
+            return None
+        user = User(row[0], clerk_id, row[1])
+        with self._lock:
+            if create and created:
+                self.counters["created"] += 1
+            self._users[clerk_id] = user
+            self._users.move_to_end(clerk_id)
+            while len(self._users) > self.max_entries:
+                self._users.popitem(last=False)
+                self.counters["evictions"] += 1
+        if create and created and self.on_create is not None:
+            self.on_create(user)
+        return user
+
+    def forget(self, clerk_id):
+        with self._lock:
+            self._users.pop(clerk_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["size"] = len(self._users)
+        stats["max_entries"] = self.max_entries
+        return stats
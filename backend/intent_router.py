@@ -0,0 +1,131 @@
+"""Keyword intent router for the local (offline) tutor responses.
+
+Every keyword (and its plural forms) is compiled once at import into a
+single prefix-trie regex, so a prompt is classified in one C-level scan
+instead of one Python substring scan per keyword list. Whole-word matching
+stops short keywords misfiring inside other words ("hi" in "this", "js" in
+"adjust"), while "functions", "loops" and "exams" still match.
+"""
+import re
+
+# keyword -> tags it contributes; order of INTENT_PRIORITY decides the winner
+INTENT_KEYWORDS = {
+    # Programming
+    "python": ("programming", "python"),
+    "javascript": ("programming", "javascript"),
+    "java": ("programming",),
+    "c++": ("programming",),
+    "programming": ("programming",),
+    "code": ("programming",),
+    "algorithm": ("programming",),
+    "function": ("programming",),
+    "variable": ("programming",),
+    "loop": ("programming",),
+    "array": ("programming",),
+    "object": ("programming",),
+    "js": ("javascript",),
+    "react": ("javascript",),
+    "node": ("javascript",),
+    # Mathematics
+    "math": ("math",),
+    "mathematics": ("math",),
+    "calculus": ("math", "calculus"),
+    "algebra": ("math", "algebra"),
+    "geometry": ("math",),
+    "statistics": ("math",),
+    "equation": ("math",),
+    "formula": ("math", "science"),
+    "solve": ("math",),
+    # Study
+    "study": ("study",),
+    "exam": ("study",),
+    "test": ("study",),
+    "learn": ("study",),
+    "homework": ("study",),
+    "assignment": ("study",),
+    "grade": ("study",),
+    "school": ("study",),
+    "college": ("study",),
+    "university": ("study",),
+    # Science
+    "physics": ("science",),
+    "chemistry": ("science",),
+    "biology": ("science",),
+    "science": ("science",),
+    "experiment": ("science",),
+    "theory": ("science",),
+    # Greetings / help
+    "hello": ("greeting",),
+    "hi": ("greeting",),
+    "hey": ("greeting",),
+    "help": ("greeting",),
+    "what can you do": ("greeting",),
+    "capabilities": ("greeting",),
+}
+
+# (required tag, sub-tag -> intent) in the order the original if/elif chain checked them
+INTENT_PRIORITY = (
+    ("programming", (("python", "python"), ("javascript", "javascript")), "programming"),
+    ("math", (("calculus", "calculus"), ("algebra", "algebra")), "math"),
+    ("study", (), "study"),
+    ("science", (), "science"),
+    ("greeting", (), "greeting"),
+)
+
+DEFAULT_INTENT = "general"
+
+
+def _surface_forms():
+    forms = {}  # matched text -> tags
+    for keyword, tags in INTENT_KEYWORDS.items():
+        variants = [keyword]
+        if len(keyword) >= 4 and keyword.isalpha():
+            variants += [keyword + "s", keyword + "es"]  # plurals, but not "his" for "hi"
+        for variant in variants:
+            forms[variant] = forms.get(variant, ()) + tags
+    return forms
+
+
+def _trie_pattern(words):
+    """Build a regex alternation factored by common prefixes ("c(?:ode|alculus)")"""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        optional = "" in node
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")" + ("?" if optional else "")
+
+    return build(trie)
+
+
+_FORMS = _surface_forms()
+_PATTERN = re.compile(r"(?<![\w+])(" + _trie_pattern(_FORMS) + r")(?![\w+])")
+
+
+def match_tags(prompt):
+    """Return the set of tags whose keywords appear in the prompt"""
+    tags = set()
+    for keyword in _PATTERN.findall(prompt.lower()):
+        tags.update(_FORMS[keyword])
+    return tags
+
+
+def classify_prompt(prompt):
+    """Map a prompt to one local-response intent in a single pass"""
+    tags = match_tags(prompt)
+    for required, refinements, intent in INTENT_PRIORITY:
+        if required in tags:
+            for tag, refined in refinements:
+                if tag in tags:
+                    return refined
+            return intent
+    return DEFAULT_INTENT
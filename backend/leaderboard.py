@@ -0,0 +1,153 @@
+"""In-memory aptitude leaderboard, kept in step with the aptitude_best table.
+
+Each student's best score sits in a bucket of a Fenwick tree indexed by
+score, so "how many students beat this score" is a prefix sum and the
+k-th best student is found by descending the tree. Both are O(log S) for
+S possible scores, however many students there are. Ties are broken by
+who reached the score first.
+
+The tree is rebuilt from aptitude_best at startup and updated by
+submit_aptitude_score after each commit.
+"""
+import heapq
+import threading
+
+
+class FenwickTree:
+    def __init__(self, size):
+        self.size = size
+        self._tree = [0] * (size + 1)
+
+    def add(self, index, delta):
+        if not 0 <= index < self.size:
+            # i = index + 1 <= 0 would never advance below
+            raise IndexError(f"Fenwick index {index} outside 0..{self.size - 1}")
+        i = index + 1
+        while i <= self.size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, index):
+        """Sum of buckets 0..index inclusive"""
+        total = 0
+        i = min(index, self.size - 1) + 1
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def total(self):
+        return self.prefix_sum(self.size - 1)
+
+    def lower_bound(self, target):
+        """Smallest index whose prefix sum reaches target (target >= 1)"""
+        pos = 0
+        step = 1 << self.size.bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= self.size and self._tree[nxt] < target:
+                pos = nxt
+                target -= self._tree[nxt]
+            step >>= 1
+        return pos
+
+
+class Leaderboard:
+    def __init__(self, max_score=1000, score_limit=1_000_000):
+        """The tree starts with room for 0..max_score and grows on demand, but never
+        past score_limit: scores outside 0..score_limit are not ranked at all"""
+        self.score_limit = score_limit
+        self._lock = threading.Lock()
+        self._tree = FenwickTree(max_score + 1)
+        self._best = {}     # user_id -> (score, achieved_at)
+        self._buckets = {}  # score -> {user_id: achieved_at}
+        self._names = {}
+
+    def load(self, conn):
+        """Rebuild from aptitude_best (the on-disk source of truth)"""
+        rows = conn.execute("""SELECT b.user_id, b.score, b.achieved_at, u.username
+                               FROM aptitude_best b JOIN users u ON u.id = b.user_id""").fetchall()
+        valid = [row for row in rows if self.accepts(row[1])]
+        if len(valid) < len(rows):
+            print(f"⚠️ Leaderboard skipped {len(rows) - len(valid)} scores outside 0..{self.score_limit}")
+        with self._lock:
+            top = max((int(score) for _, score, _, _ in valid), default=0)
+            self._tree = FenwickTree(max(self._tree.size, top + 1))
+            self._best.clear()
+            self._buckets.clear()
+            self._names.clear()
+            for user_id, score, achieved_at, username in valid:
+                self._place(user_id, int(score), achieved_at)
+                self._names[user_id] = username
+        return len(valid)
+
+    def accepts(self, score):
+        try:
+            return 0 <= int(score) <= self.score_limit
+        except (TypeError, ValueError, OverflowError):
+            return False
+
+    def record(self, user_id, score, username, achieved_at):
+        """Note a new score; only a personal best moves the student"""
+        score = max(0, int(score))
+        if not self.accepts(score):
+            return False
+        with self._lock:
+            self._names[user_id] = username
+            current = self._best.get(user_id)
+            if current is not None and current[0] >= score:
+                return False
+            if current is not None:
+                self._remove(user_id, current[0])
+            if score >= self._tree.size:
+                self._grow(score + 1)
+            self._place(user_id, score, achieved_at)
+            return True
+
+    def rank(self, user_id):
+        """1 + number of students with a strictly higher best score"""
+        with self._lock:
+            current = self._best.get(user_id)
+            if current is None:
+                return None
+            return self._tree.total() - self._tree.prefix_sum(current[0]) + 1
+
+    def top(self, n=10):
+        """[{"username", "score"}] for the n best students, best first"""
+        with self._lock:
+            total = self._tree.total()
+            leaders = []
+            seen = 0
+            while seen < min(n, total):
+                # Bucket holding the (seen+1)-th best student, counting from the top
+                score = self._tree.lower_bound(total - seen)
+                bucket = self._buckets[score]
+                first = heapq.nsmallest(n - len(leaders), bucket.items(), key=lambda item: (item[1] or "", item[0]))
+                for user_id, _ in first:
+                    leaders.append({"username": self._names.get(user_id), "score": score})
+                seen += len(bucket)
+            return leaders
+
+    def __len__(self):
+        return len(self._best)
+
+    def _place(self, user_id, score, achieved_at):
+        if score >= self._tree.size:
+            self._grow(score + 1)
+        self._best[user_id] = (score, achieved_at)
+        self._buckets.setdefault(score, {})[user_id] = achieved_at
+        self._tree.add(score, 1)
+
+    def _remove(self, user_id, score):
+        bucket = self._buckets[score]
+        del bucket[user_id]
+        if not bucket:
+            del self._buckets[score]
+        del self._best[user_id]
+        self._tree.add(score, -1)
+
+    def _grow(self, size):
+        tree = FenwickTree(max(size, self._tree.size * 2))
+        for score, bucket in self._buckets.items():
+            tree.add(score, len(bucket))
+        self._tree = tree
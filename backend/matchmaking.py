@@ -0,0 +1,242 @@
+"""Mock interview matchmaking: bucketed FIFO queues with a sid index.
+
+Waiting users are queued by (language, difficulty, skill band), each
+bucket an OrderedDict keyed by sid in arrival order, and a sid -> bucket
+index makes cancel/disconnect an O(1) removal. A new searcher is matched
+with the longest-waiting user in its own skill band or the two next to
+it, so a lookup touches at most three bucket heads however long the
+queue is. Criteria a client doesn't send fall back to "any" / 0, so
+clients that send none all share one bucket and match in arrival order.
+SQLiteMatchmaker is the same queue in a file shared by several worker
+processes (see state_backend.py).
+
+QueueSizeBroadcaster replaces broadcasting the whole waiting list on every
+change: changes only set a flag, and a background loop emits the queue
+size (and its delta since the last emit) at most once per interval.
+"""
+import itertools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+ANY = "any"
+
+
+def criteria(data):
+    """Normalised (language, difficulty, skill) from a find_match payload"""
+    language = str(data.get("language") or ANY).lower()
+    difficulty = str(data.get("difficulty") or ANY).lower()
+    try:
+        skill = max(0, int(data.get("skill") or 0))
+    except (TypeError, ValueError):
+        skill = 0
+    return language, difficulty, skill
+
+
+class Matchmaker:
+    def __init__(self, skill_band=100):
+        self.skill_band = skill_band
+        self._lock = threading.Lock()
+        self._buckets = {}  # (language, difficulty, band) -> OrderedDict(sid -> entry)
+        self._index = {}  # sid -> bucket key
+        self._arrivals = itertools.count()
+        self.counters = {"enqueued": 0, "matched": 0, "removed": 0}
+
+    @classmethod
+    def from_env(cls):
+        return cls(skill_band=int(os.getenv("MATCH_SKILL_BAND", "100")))
+
+    def find_or_enqueue(self, user, language=ANY, difficulty=ANY, skill=0):
+        """Pop and return the best waiting partner for user, or queue user and return None"""
+        band = skill // self.skill_band
+        with self._lock:
+            self._remove(user["sid"])  # searching again replaces an earlier place in the queue
+            best_key, best_arrival = None, None
+            for key in ((language, difficulty, band - 1), (language, difficulty, band),
+                        (language, difficulty, band + 1)):
+                bucket = self._buckets.get(key)
+                if bucket:
+                    head = next(iter(bucket.values()))
+                    if best_arrival is None or head["arrival"] < best_arrival:
+                        best_key, best_arrival = key, head["arrival"]
+            if best_key is not None:
+                sid, entry = self._buckets[best_key].popitem(last=False)
+                self._drop_if_empty(best_key)
+                del self._index[sid]
+                self.counters["matched"] += 1
+                return entry["user"]
+
+            key = (language, difficulty, band)
+            self._buckets.setdefault(key, OrderedDict())[user["sid"]] = {
+                "user": user, "arrival": next(self._arrivals), "queued_at": time.time()
+            }
+            self._index[user["sid"]] = key
+            self.counters["enqueued"] += 1
+            return None
+
+    def remove(self, sid):
+        """Take sid out of the queue; returns whether it was waiting"""
+        with self._lock:
+            return self._remove(sid)
+
+    def _remove(self, sid):
+        key = self._index.pop(sid, None)
+        if key is None:
+            return False
+        del self._buckets[key][sid]
+        self._drop_if_empty(key)
+        self.counters["removed"] += 1
+        return True
+
+    def _drop_if_empty(self, key):
+        if not self._buckets[key]:
+            del self._buckets[key]
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, sid):
+        return sid in self._index
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["waiting"] = len(self._index)
+            stats["buckets"] = len(self._buckets)
+        return stats
+
+
+class QueueSizeBroadcaster:
+    """Coalesces queue changes into at most one emit(size, delta) per interval.
+
+    With a queue shared between processes, another process may have emitted
+    a different size since this one last did, so shared=True emits after
+    every change rather than only when the size differs from our last emit.
+    """
+
+    def __init__(self, size_fn, emit, interval=0.5, shared=False):
+        self.size_fn = size_fn
+        self.emit = emit
+        self.interval = interval
+        self.shared = shared
+        self._changed = threading.Event()
+        self._started = False
+        self.last_size = 0
+        self.counters = {"changes": 0, "emits": 0}
+
+    def start(self, spawn):
+        if self._started:
+            return
+        self._started = True
+        spawn(self._run)
+
+    def changed(self):
+        self.counters["changes"] += 1
+        self._changed.set()
+
+    def snapshot(self):
+        return {"waiting": self.size_fn(), "delta": 0}
+
+    def flush(self):
+        """Emit now if the size moved since the last emit (or at all, when shared)"""
+        size = self.size_fn()
+        if size == self.last_size and not self.shared:
+            return False
+        delta, self.last_size = size - self.last_size, size
+        self.counters["emits"] += 1
+        self.emit({"waiting": size, "delta": delta})
+        return True
+
+    def _run(self):
+        while True:
+            self._changed.wait()
+            self._changed.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ Queue size broadcast failed: {e}")
+            time.sleep(self.interval)
+
+    def stats(self):
+        return dict(self.counters, last_size=self.last_size, interval=self.interval)
+
+
+class SQLiteMatchmaker:
+    """Matchmaker's queue kept in a SQLite file that every worker process shares.
+
+    Same buckets and pairing rule; each bucket head is one index seek on
+    (language, difficulty, band, arrival), and the pop-or-insert runs under
+    BEGIN IMMEDIATE so two processes can't pair with the same user.
+    """
+
+    def __init__(self, pool, skill_band=100, host=None):
+        self.pool = pool
+        self.skill_band = skill_band
+        self.host = host
+        self._lock = threading.Lock()
+        self.counters = {"enqueued": 0, "matched": 0, "removed": 0}
+        with pool.connection() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS match_queue
+                            (arrival INTEGER PRIMARY KEY AUTOINCREMENT, sid TEXT UNIQUE NOT NULL,
+                             language TEXT, difficulty TEXT, band INTEGER, user TEXT,
+                             host TEXT, queued_at REAL)""")
+            conn.execute("""CREATE INDEX IF NOT EXISTS idx_match_queue_bucket
+                            ON match_queue (language, difficulty, band, arrival)""")
+            conn.commit()
+
+    def find_or_enqueue(self, user, language=ANY, difficulty=ANY, skill=0):
+        band = skill // self.skill_band
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                removed = conn.execute("DELETE FROM match_queue WHERE sid = ?", (user["sid"],)).rowcount
+                best = None
+                for neighbour in (band - 1, band, band + 1):
+                    head = conn.execute("""SELECT arrival, user FROM match_queue
+                                           WHERE language = ? AND difficulty = ? AND band = ?
+                                           ORDER BY arrival LIMIT 1""",
+                                        (language, difficulty, neighbour)).fetchone()
+                    if head and (best is None or head[0] < best[0]):
+                        best = head
+                if best is not None:
+                    conn.execute("DELETE FROM match_queue WHERE arrival = ?", (best[0],))
+                else:
+                    conn.execute("""INSERT INTO match_queue (sid, language, difficulty, band, user, host, queued_at)
+                                    VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                                 (user["sid"], language, difficulty, band, json.dumps(user), self.host, time.time()))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        with self._lock:
+            self.counters["removed"] += removed
+            self.counters["matched" if best is not None else "enqueued"] += 1
+        return json.loads(best[1]) if best is not None else None
+
+    def remove(self, sid):
+        with self.pool.connection() as conn:
+            removed = conn.execute("DELETE FROM match_queue WHERE sid = ?", (sid,)).rowcount
+            conn.commit()
+        if removed:
+            with self._lock:
+                self.counters["removed"] += 1
+        return bool(removed)
+
+    def __len__(self):
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM match_queue").fetchone()[0]
+
+    def __contains__(self, sid):
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT 1 FROM match_queue WHERE sid = ?", (sid,)).fetchone() is not None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        with self.pool.connection() as conn:
+            stats["waiting"], stats["buckets"] = conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT language || '/' || difficulty || '/' || band) FROM match_queue"
+            ).fetchone()
+        return stats
@@ -0,0 +1,138 @@
+"""Versioned schema migrations for progress.db.
+
+The schema version is kept in PRAGMA user_version. migrate() applies every
+migration newer than that, in order, each in its own transaction together
+with the version bump, so a failed step leaves the database at the last
+good version. New schema changes go at the end of MIGRATIONS; never edit
+one that has shipped.
+
+Run directly to upgrade a database by hand: python migrations.py [db path]
+"""
+import sqlite3
+import sys
+
+MIGRATIONS = []
+
+
+def migration(version, description):
+    def register(fn):
+        MIGRATIONS.append((version, description, fn))
+        return fn
+    return register
+
+
+@migration(1, "base tables")
+def _base_tables(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS users
+                    (id INTEGER PRIMARY KEY, clerk_id TEXT UNIQUE, username TEXT)''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS logins
+                    (id INTEGER PRIMARY KEY, user_id INTEGER, login_date DATE)''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS activities
+                    (id INTEGER PRIMARY KEY, user_id INTEGER, activity_type TEXT, value INTEGER, activity_date DATE)''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS aptitude_scores
+                    (id INTEGER PRIMARY KEY, user_id INTEGER, score INTEGER, timestamp DATETIME)''')
+
+
+@migration(2, "per-user indexes, one login row per user per day")
+def _per_user_indexes(conn):
+    # Concurrent record_login calls could insert the same day twice
+    conn.execute('''DELETE FROM logins WHERE id NOT IN
+                    (SELECT MIN(id) FROM logins GROUP BY user_id, login_date)''')
+    conn.execute('''CREATE UNIQUE INDEX IF NOT EXISTS idx_logins_user_date
+                    ON logins (user_id, login_date)''')
+    # get_progress totals per type
+    conn.execute('''CREATE INDEX IF NOT EXISTS idx_activities_user_type_date
+                    ON activities (user_id, activity_type, activity_date)''')
+    # get_detailed_progress and the 7-day window, grouped by date then type
+    conn.execute('''CREATE INDEX IF NOT EXISTS idx_activities_user_date_type
+                    ON activities (user_id, activity_date, activity_type)''')
+    # best/avg score per user and the leaderboard's MAX(score) GROUP BY user_id
+    conn.execute('''CREATE INDEX IF NOT EXISTS idx_aptitude_user_score
+                    ON aptitude_scores (user_id, score)''')
+
+
+@migration(3, "aptitude_best: each student's best score")
+def _aptitude_best(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS aptitude_best
+                    (user_id INTEGER PRIMARY KEY, score INTEGER, achieved_at DATETIME)''')
+    # Earliest time each student reached their best score
+    conn.execute('''INSERT OR IGNORE INTO aptitude_best (user_id, score, achieved_at)
+                    SELECT s.user_id, s.score, MIN(s.timestamp)
+                    FROM aptitude_scores s
+                    JOIN (SELECT user_id, MAX(score) AS best FROM aptitude_scores GROUP BY user_id) m
+                      ON m.user_id = s.user_id AND s.score = m.best
+                    GROUP BY s.user_id''')
+
+
+@migration(4, "user_summary and daily_activity rollups")
+def _progress_rollups(conn):
+    # Filled by rollups.backfill() once migrations finish
+    conn.execute('''CREATE TABLE IF NOT EXISTS user_summary
+                    (user_id INTEGER PRIMARY KEY,
+                     login_days INTEGER NOT NULL DEFAULT 0,
+                     last_login_date DATE,
+                     current_streak INTEGER NOT NULL DEFAULT 0,
+                     pdf_total INTEGER NOT NULL DEFAULT 0, pdf_count INTEGER NOT NULL DEFAULT 0,
+                     video_total INTEGER NOT NULL DEFAULT 0, video_count INTEGER NOT NULL DEFAULT 0,
+                     quantum_total INTEGER NOT NULL DEFAULT 0, quantum_count INTEGER NOT NULL DEFAULT 0,
+                     test_total INTEGER NOT NULL DEFAULT 0, test_count INTEGER NOT NULL DEFAULT 0,
+                     aptitude_total INTEGER NOT NULL DEFAULT 0, aptitude_count INTEGER NOT NULL DEFAULT 0,
+                     aptitude_tests INTEGER NOT NULL DEFAULT 0,
+                     aptitude_best INTEGER NOT NULL DEFAULT 0,
+                     aptitude_score_sum INTEGER NOT NULL DEFAULT 0)''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS daily_activity
+                    (user_id INTEGER, activity_date DATE, activity_type TEXT,
+                     total INTEGER NOT NULL DEFAULT 0,
+                     PRIMARY KEY (user_id, activity_date, activity_type)) WITHOUT ROWID''')
+
+
+@migration(5, "user_summary.longest_streak")
+def _longest_streak(conn):
+    # Filled by rollups.backfill() once migrations finish
+    conn.execute("ALTER TABLE user_summary ADD COLUMN longest_streak INTEGER NOT NULL DEFAULT 0")
+
+
+@migration(6, "global_stats counters for /api/stats")
+def _global_stats(conn):
+    # Kept up to date by the rollups write helpers and recounted by rollups.reconcile_stats()
+    conn.execute('''CREATE TABLE IF NOT EXISTS global_stats
+                    (name TEXT PRIMARY KEY, value INTEGER NOT NULL DEFAULT 0) WITHOUT ROWID''')
+    conn.execute('''INSERT OR REPLACE INTO global_stats (name, value) VALUES
+                    ('users', (SELECT COUNT(*) FROM users)),
+                    ('logins', (SELECT COUNT(*) FROM logins)),
+                    ('activities', (SELECT COALESCE(SUM(value), 0) FROM activities))''')
+
+
+def current_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, target=None):
+    """Apply pending migrations up to target (default: latest); returns the versions applied"""
+    applied = []
+    for version, description, fn in sorted(MIGRATIONS, key=lambda m: m[0]):
+        if version <= current_version(conn) or (target is not None and version > target):
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have applied it while we waited for the write lock
+            if version <= current_version(conn):
+                conn.rollback()
+                continue
+            fn(conn)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"🗄️ Applied migration {version}: {description}")
+        applied.append(version)
+    return applied
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else "progress.db"
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    print(f"✅ {path} is at schema version {current_version(conn)}")
+    conn.close()
@@ -0,0 +1,107 @@
+"""Online and per-room presence counts, broadcast on a fixed tick.
+
+Every connect and disconnect used to broadcast online_users_count to
+every client, so N clients reconnecting after a deploy cost O(N²)
+messages. Presence instead marks the count dirty and a background loop
+broadcasts it at most once per tick, and only if it changed since the
+last broadcast. Rooms work the same way: join/leave mark the room dirty
+and the tick sends one room_presence {room, count} to that room.
+
+Counts themselves live in the state backend (state_backend.py), so with
+a shared backend they cover every worker process. In that case each
+process broadcasts after any local change, since another process may
+have sent a different value since this one last did.
+"""
+import threading
+import time
+
+
+class Presence:
+    def __init__(self, state, emit, tick=1.0):
+        self.state = state
+        self.emit = emit  # emit(event, payload, room=None); room=None broadcasts
+        self.tick = tick
+        self._lock = threading.Lock()
+        self._online_dirty = False
+        self._dirty_rooms = set()
+        self._sent_online = None
+        self._sent_rooms = {}
+        self._started = False
+        self.counters = {"changes": 0, "broadcasts": 0, "room_updates": 0}
+
+    def start(self, spawn):
+        if self._started:
+            return
+        self._started = True
+        spawn(self._run)
+
+    def connected(self, sid):
+        self.state.add_online(sid)
+        self._mark(online=True)
+
+    def disconnected(self, sid):
+        self.state.remove_online(sid)
+        self._mark(online=True, rooms=self.state.drop_presence(sid))
+
+    def join(self, room, sid):
+        self.state.join_presence(room, sid)
+        self._mark(rooms=[room])
+
+    def leave(self, room, sid):
+        self.state.leave_presence(room, sid)
+        self._mark(rooms=[room])
+
+    def online_count(self):
+        return self.state.online_count()
+
+    def room_count(self, room):
+        return self.state.presence_count(room)
+
+    def _mark(self, online=False, rooms=()):
+        with self._lock:
+            self.counters["changes"] += 1
+            self._online_dirty = self._online_dirty or online
+            self._dirty_rooms.update(rooms)
+
+    def flush(self):
+        """Send whatever changed since the last flush; returns the number of emits"""
+        with self._lock:
+            online_dirty, self._online_dirty = self._online_dirty, False
+            rooms, self._dirty_rooms = self._dirty_rooms, set()
+        shared = getattr(self.state, "shared", False)
+        emitted = 0
+
+        if online_dirty:
+            count = self.state.online_count()
+            if shared or count != self._sent_online:
+                self._sent_online = count
+                self.emit('online_users_count', count)
+                emitted += 1
+                self.counters["broadcasts"] += 1
+
+        for room in rooms:
+            count = self.state.presence_count(room)
+            if count and (shared or count != self._sent_rooms.get(room, 0)):  # an empty room has no one to tell
+                self.emit('room_presence', {'room': room, 'count': count}, room=room)
+                emitted += 1
+                self.counters["room_updates"] += 1
+            if count:
+                self._sent_rooms[room] = count
+            else:
+                self._sent_rooms.pop(room, None)
+        return emitted
+
+    def _run(self):
+        while True:
+            time.sleep(self.tick)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ Presence broadcast failed: {e}")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats["tick"] = self.tick
+        stats["rooms_tracked"] = len(self._sent_rooms)
+        return stats
@@ -0,0 +1,168 @@
+"""Windowed, paginated reads of a user's login and activity history.
+
+get_detailed_progress used to return every login date and every
+(date, type) bucket a user had ever recorded, so the payload grew with the
+age of the account. With any of these query parameters it returns one
+page instead:
+
+    from, to   inclusive ISO dates bounding the history read
+    bucket     day (default), week or month; periods are labelled by their
+               first day (weeks start on Monday)
+    limit      periods per page (default 90, at most 1000)
+    cursor     next_cursor from the previous page
+    format     rows (default) or columns
+
+Pages walk back in time: the first page holds the newest periods, and
+next_cursor (null on the last page) continues with older ones. Within a
+page, periods run oldest to newest, as charts want them.
+
+rows keeps the old shape: {"logins": [...], "activities": {period: {type:
+total}}}. With week or month buckets, logins becomes {period: days logged
+in}. columns sends parallel arrays instead: {"periods": [...], "logins":
+[...], "types": [...], "values": {type: [...]}}. Every array lines up with
+periods, with zeros filled in, so the period and type names are sent once
+rather than once per cell.
+
+With no parameters, the full legacy payload is returned unchanged.
+"""
+import base64
+import binascii
+from collections import namedtuple
+from datetime import date
+
+BUCKETS = {
+    "day": "{column}",
+    "week": "date({column}, 'weekday 0', '-6 days')",
+    "month": "strftime('%Y-%m-01', {column})",
+}
+FORMATS = ("rows", "columns")
+DEFAULT_LIMIT = 90
+MAX_LIMIT = 1000
+QUERY_PARAMS = ("from", "to", "bucket", "limit", "cursor", "format")
+
+HistoryQuery = namedtuple("HistoryQuery", "start end bucket limit before format")
+
+
+def _iso_date(value, name):
+    try:
+        return date.fromisoformat(value).isoformat()
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {name} date, expected YYYY-MM-DD")
+
+
+def encode_cursor(bucket, period):
+    return base64.urlsafe_b64encode(f"{bucket}:{period}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, bucket):
+    """The period start a cursor continues before; ValueError if it isn't one of ours for this bucket"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+    cursor_bucket, _, period = raw.partition(":")
+    if cursor_bucket != bucket:
+        raise ValueError("Cursor belongs to a different bucket size")
+    return _iso_date(period, "cursor")
+
+
+def parse_query(args):
+    """HistoryQuery from request args, None when none of QUERY_PARAMS is given (legacy payload)"""
+    if not any(name in args for name in QUERY_PARAMS):
+        return None
+    bucket = args.get("bucket", "day")
+    if bucket not in BUCKETS:
+        raise ValueError(f"bucket must be one of {', '.join(BUCKETS)}")
+    response_format = args.get("format", "rows")
+    if response_format not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    try:
+        limit = int(args.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError("Invalid limit")
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+    start = _iso_date(args["from"], "from") if "from" in args else None
+    end = _iso_date(args["to"], "to") if "to" in args else None
+    if start and end and start > end:
+        raise ValueError("from is after to")
+    before = decode_cursor(args["cursor"], bucket) if args.get("cursor") else None
+    return HistoryQuery(start, end, bucket, limit, before, response_format)
+
+
+def legacy_history(conn, user_id):
+    """Everything, in the original get_detailed_progress shape"""
+    logins = [row[0] for row in conn.execute("SELECT login_date FROM logins WHERE user_id = ?", (user_id,))]
+    activities = {}
+    for day, typ, total in conn.execute("""SELECT activity_date, activity_type, total
+                                           FROM daily_activity WHERE user_id = ?""", (user_id,)):
+        activities.setdefault(day, {})[typ] = total
+    return {"logins": logins, "activities": activities}
+
+
+def _date_filter(column, start, end, before):
+    """SQL condition and params for start <= column <= end and column < before, skipping unset bounds"""
+    clauses, params = [], []
+    if start:
+        clauses.append(f"{column} >= ?")
+        params.append(start)
+    if end:
+        clauses.append(f"{column} <= ?")
+        params.append(end)
+    if before:
+        # before is a period start, so any date before it lies in an earlier period
+        clauses.append(f"{column} < ?")
+        params.append(before)
+    return "".join(f" AND {clause}" for clause in clauses), params
+
+
+def history_page(conn, user_id, query):
+    """One page of history for a HistoryQuery, in query.format"""
+    login_period = BUCKETS[query.bucket].format(column="login_date")
+    activity_period = BUCKETS[query.bucket].format(column="activity_date")
+    login_filter, login_params = _date_filter("login_date", query.start, query.end, query.before)
+    activity_filter, activity_params = _date_filter("activity_date", query.start, query.end, query.before)
+
+    # The newest limit + 1 periods with any data tell us where this page stops and whether another follows
+    periods = [row[0] for row in conn.execute(
+        f"""SELECT {login_period} AS period FROM logins WHERE user_id = ?{login_filter}
+            UNION
+            SELECT {activity_period} FROM daily_activity WHERE user_id = ?{activity_filter}
+            ORDER BY period DESC LIMIT ?""",
+        [user_id, *login_params, user_id, *activity_params, query.limit + 1])]
+    next_cursor = None
+    if len(periods) > query.limit:
+        periods = periods[:query.limit]
+        next_cursor = encode_cursor(query.bucket, periods[-1])
+    periods.reverse()
+
+    logins, activities = {}, {}
+    if periods:
+        # The oldest period can start before query.start; days before it are still out of range
+        oldest = max(periods[0], query.start) if query.start else periods[0]
+        login_filter, login_params = _date_filter("login_date", oldest, query.end, query.before)
+        activity_filter, activity_params = _date_filter("activity_date", oldest, query.end, query.before)
+        logins = dict(conn.execute(f"""SELECT {login_period}, COUNT(*) FROM logins
+                                       WHERE user_id = ?{login_filter} GROUP BY 1""",
+                                   [user_id, *login_params]).fetchall())
+        for period, typ, total in conn.execute(f"""SELECT {activity_period}, activity_type, SUM(total)
+                                                   FROM daily_activity WHERE user_id = ?{activity_filter}
+                                                   GROUP BY 1, 2""", [user_id, *activity_params]):
+            activities.setdefault(period, {})[typ] = total
+
+    page = {"bucket": query.bucket, "next_cursor": next_cursor}
+    if query.format == "columns":
+        types = sorted({typ for totals in activities.values() for typ in totals})
+        page.update(
+            periods=periods,
+            logins=[logins.get(period, 0) for period in periods],
+            types=types,
+            values={typ: [activities.get(period, {}).get(typ, 0) for period in periods] for typ in types}
+        )
+    else:
+        page.update(
+            logins=[period for period in periods if period in logins] if query.bucket == "day"
+            else {period: logins[period] for period in periods if period in logins},
+            activities={period: activities[period] for period in periods if period in activities}
+        )
+    return page
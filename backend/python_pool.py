@@ -0,0 +1,300 @@
+"""Pool of warm Python sandbox workers for /api/execute.
+
+Starting a fresh interpreter per run costs 20-50 ms, which dominates short
+student snippets. Instead a few sandbox_worker.py processes are started up
+front and fed code over a pipe; each run is forked off the warm worker, so
+nothing one submission changes survives into the next. A worker is replaced
+after max_runs runs, or straight away if it crashes or overruns its timeout.
+
+If no worker comes free within acquire_timeout, or every worker failed to
+start, run() raises PoolUnavailable and the caller runs the code in a fresh
+interpreter instead. The pool needs select() on pipes, so from_env()
+disables it on Windows.
+"""
+import json
+import os
+import queue
+import select
+import signal
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from sandbox import ResourceLimits
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_worker.py")
+
+_HEADER = struct.Struct(">I")
+
+
+class WorkerTimeout(Exception):
+    pass
+
+
+class WorkerCrashed(Exception):
+    pass
+
+
+class PoolUnavailable(Exception):
+    pass
+
+
+class PythonWorker:
+    """One warm interpreter speaking the sandbox_worker.py frame protocol"""
+
+    def __init__(self, worker_id, python=sys.executable, limits=None):
+        self.worker_id = worker_id
+        self.limits = limits
+        self.proc = subprocess.Popen(
+            [python, WORKER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=tempfile.gettempdir(),
+            # Its own process group, so stop() also takes down the forked run and anything it started
+            start_new_session=True,
+            # CPU is limited per run by the worker itself
+            preexec_fn=limits.preexec_fn(cpu=False) if limits else None
+        )
+        self.started_at = time.time()
+        self.boot_time = None
+        self.runs = 0
+        self.total_time = 0.0
+        self.last_time = None
+        self.max_time = 0.0
+
+    def alive(self):
+        return self.proc.poll() is None
+
+    def run(self, code, timeout, stdin=""):
+        started = time.perf_counter()
+        request = {"code": code, "stdin": stdin}
+        if self.limits:
+            request["cpu_seconds"] = self.limits.cpu_seconds
+            request["output_limit"] = self.limits.output_bytes
+        payload = json.dumps(request).encode()
+        try:
+            self.proc.stdin.write(_HEADER.pack(len(payload)) + payload)
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError):
+            raise WorkerCrashed("Python worker exited unexpectedly")
+
+        deadline = started + timeout
+        header = self._read(_HEADER.size, deadline)
+        (size,) = _HEADER.unpack(header)
+        result = json.loads(self._read(size, deadline))
+
+        elapsed = time.perf_counter() - started
+        self.runs += 1
+        self.total_time += elapsed
+        self.last_time = elapsed
+        self.max_time = max(self.max_time, elapsed)
+        return result
+
+    def warm_up(self, timeout=30):
+        """Wait for the interpreter to finish booting; not counted as a run"""
+        self.run("pass", timeout)
+        self.boot_time = time.time() - self.started_at
+        self.runs, self.total_time, self.last_time, self.max_time = 0, 0.0, None, 0.0
+
+    def _read(self, size, deadline):
+        fd = self.proc.stdout.fileno()
+        data = b""
+        while len(data) < size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                raise WorkerTimeout()
+            readable, _, _ = select.select([fd], [], [], remaining)
+            if not readable:
+                raise WorkerTimeout()
+            try:
+                chunk = os.read(fd, size - len(data))
+            except BlockingIOError:
+                continue
+            if not chunk:
+                raise WorkerCrashed("Python worker exited unexpectedly")
+            data += chunk
+        return data
+
+    def stop(self):
+        try:
+            os.killpg(self.proc.pid, signal.SIGKILL)
+        except (AttributeError, OSError):  # no process groups (Windows), or already gone
+            if self.alive():
+                self.proc.kill()
+        try:
+            self.proc.wait(timeout=1)
+        except Exception:
+            pass
+
+    def stats(self):
+        return {
+            "id": self.worker_id,
+            "pid": self.proc.pid,
+            "boot_ms": round(self.boot_time * 1000, 2) if self.boot_time is not None else None,
+            "runs": self.runs,
+            "avg_ms": round(self.total_time / self.runs * 1000, 2) if self.runs else None,
+            "last_ms": round(self.last_time * 1000, 2) if self.last_time is not None else None,
+            "max_ms": round(self.max_time * 1000, 2)
+        }
+
+
+class PythonWorkerPool:
+    """Fixed-size pool of warm workers; callers queue FIFO for a free one"""
+
+    def __init__(self, size=2, max_runs=50, python=sys.executable, limits=None, acquire_timeout=30.0):
+        self.size = size
+        self.max_runs = max_runs
+        self.acquire_timeout = acquire_timeout
+        self.python = python
+        self.limits = limits
+        self._lock = threading.Lock()
+        self._idle = queue.Queue()
+        self._workers = {}
+        self._next_id = 0
+        self.waiting = 0
+        self.closed = False
+        self._last_restart = time.monotonic()
+        self.counters = {"runs": 0, "timeouts": 0, "crashes": 0, "recycled": 0, "unavailable": 0}
+        for _ in range(size):
+            self._start_worker()
+
+    @classmethod
+    def from_env(cls, limits=None):
+        """Build the pool from PYTHON_POOL_SIZE / PYTHON_POOL_MAX_RUNS; None when disabled"""
+        size = int(os.getenv("PYTHON_POOL_SIZE", "2"))
+        if size <= 0:
+            return None
+        if os.name == "nt":
+            print("⚠️ Python worker pool needs select() on pipes; running Python in fresh interpreters")
+            return None
+        return cls(size=size, max_runs=int(os.getenv("PYTHON_POOL_MAX_RUNS", "50")),
+                   limits=limits or ResourceLimits.from_env(),
+                   acquire_timeout=float(os.getenv("PYTHON_POOL_ACQUIRE_TIMEOUT", "30")))
+
+    def _spawn(self):
+        with self._lock:
+            self._next_id += 1
+            worker = PythonWorker(self._next_id, self.python, self.limits)
+            self._workers[worker.worker_id] = worker
+        return worker
+
+    def _start_worker(self):
+        """Boot a worker in the background; it joins the idle queue once warm"""
+        if self.closed:
+            return
+        threading.Thread(target=self._warm, args=(self._spawn(),), daemon=True).start()
+
+    def _warm(self, worker, attempts=3):
+        for attempt in range(attempts):
+            try:
+                worker.warm_up()
+                self._idle.put(worker)
+                return
+            except Exception as e:
+                self._retire(worker)
+                if self.closed:
+                    return
+                print(f"⚠️ Python worker {worker.worker_id} failed to start: {e}")
+                if attempt + 1 < attempts:
+                    worker = self._spawn()
+
+    def _retire(self, worker):
+        worker.stop()
+        with self._lock:
+            self._workers.pop(worker.worker_id, None)
+            self.counters["recycled"] += 1
+
+    def run(self, code, timeout=10, stdin=""):
+        """Run code on a warm worker.
+
+        Returns {"success", "stdout", "stderr", "timed_out", "limit"} plus the
+        worker's cpu_time, peak_rss_kb and duration when it finished. Raises
+        PoolUnavailable when no worker can take the run.
+        """
+        worker = self._acquire()
+
+        replace = False
+        try:
+            result = worker.run(code, timeout, stdin)
+            result["timed_out"] = False
+        except WorkerTimeout:
+            replace = True
+            with self._lock:
+                self.counters["timeouts"] += 1
+            result = {"success": False, "stdout": "", "timed_out": True, "limit": "wall",
+                      "stderr": f"Execution timed out after {timeout} seconds"}
+        except Exception as e:  # crashed, or the protocol stream is unusable
+            replace = True
+            with self._lock:
+                self.counters["crashes"] += 1
+            result = {"success": False, "stdout": "", "timed_out": False, "limit": None,
+                      "stderr": str(e) or "Python worker failed"}
+        finally:
+            with self._lock:
+                self.counters["runs"] += 1
+            isolated = not replace and result.get("isolated", False)
+            if not isolated or worker.runs >= self.max_runs or not worker.alive():
+                self._retire(worker)
+                self._start_worker()
+            else:
+                self._idle.put(worker)
+        return result
+
+    def _acquire(self):
+        """Wait for an idle worker; PoolUnavailable when none comes or none can start"""
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._lock:
+            self.waiting += 1
+        try:
+            while True:
+                with self._lock:
+                    # Warming workers are in _workers too: an empty map means every start failed
+                    dead = not self._workers
+                if dead or self.closed:
+                    self._restart_after_failure()
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    return self._idle.get(timeout=min(remaining, 0.5))
+                except queue.Empty:
+                    continue
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        with self._lock:
+            self.counters["unavailable"] += 1
+        raise PoolUnavailable("No Python worker available")
+
+    def _restart_after_failure(self, cooldown=30.0):
+        """Every worker failed to start: try one more, at most once per cooldown, for later callers"""
+        with self._lock:
+            if self.closed or time.monotonic() - self._last_restart < cooldown:
+                return
+            self._last_restart = time.monotonic()
+        try:
+            self._start_worker()
+        except Exception as e:
+            print(f"⚠️ Python worker could not be started: {e}")
+
+    def stats(self):
+        with self._lock:
+            workers = [w.stats() for w in self._workers.values()]
+            stats = dict(self.counters)
+            stats["queue_depth"] = self.waiting
+        stats["size"] = self.size
+        stats["idle"] = self._idle.qsize()
+        stats["workers"] = workers
+        return stats
+
+    def shutdown(self):
+        self.closed = True
+        with self._lock:
+            workers = list(self._workers.values())
+        for worker in workers:
+            worker.stop()
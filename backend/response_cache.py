@@ -0,0 +1,310 @@
+"""Two-tier cache for AI tutor responses.
+
+Tier 1 is an exact match on the normalized prompt plus the truncated
+conversation history. Tier 2 catches near-duplicate prompts ("explain
+recursion" / "Explain recursion please?") with MinHash signatures over
+character n-grams, bucketed with LSH so a lookup never scans the cache.
+MinHash only finds candidates: on a long prompt one changed word ("ascending"
+/ "descending") barely moves the score, so a candidate is served only if its
+content words match the prompt's one for one, in order, up to a one-letter
+typo. Fillers ("please", "a", "the") are left out of both. Entries expire after a TTL and are evicted LRU-first once the entry or
+memory ceiling is reached. Optionally persisted to SQLite.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.]+$")
+_DIGITS = re.compile(r"\d+")
+_WORDS = re.compile(r"[a-z][a-z0-9_]*(?:\+\+|#)?")
+# Words a few characters apart that ask for a different answer
+_TECHNICAL_TERMS = frozenset("""
+    c c++ c# cpp csharp java javascript js typescript ts python py sql mysql postgres postgresql sqlite
+    go golang rust ruby php kotlin swift scala haskell r julia dart perl lua matlab bash shell powershell
+    assembly asm html css react angular vue node nodejs django flask numpy pandas qiskit
+""".split())
+
+# Words that never change what is being asked
+_FILLER_WORDS = frozenset("a an the please pls plz kindly thanks thank you me can could would just hey hi".split())
+# Shorter words must match exactly: "max" / "min" and "int" / "in" are one or two letters apart
+_TYPO_MIN_LENGTH = 5
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_ENTRY_OVERHEAD = 256  # rough per-entry bookkeeping bytes
+
+
+def normalize_prompt(prompt):
+    prompt = _WHITESPACE.sub(" ", prompt.strip().lower())
+    return _TRAILING_PUNCTUATION.sub("", prompt)
+
+
+def _shingles(text, n):
+    if len(text) <= n:
+        return {text}
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def _content_words(text):
+    return tuple(word for word in _WORDS.findall(text) if word not in _FILLER_WORDS)
+
+
+def _typo(a, b):
+    """Whether a and b are one insertion, deletion, substitution or adjacent swap apart"""
+    if min(len(a), len(b)) < _TYPO_MIN_LENGTH or abs(len(a) - len(b)) > 1:
+        return False
+    i = 0
+    while i < min(len(a), len(b)) and a[i] == b[i]:
+        i += 1
+    if len(a) != len(b):
+        longer, shorter = (a, b) if len(a) > len(b) else (b, a)
+        return longer[i + 1:] == shorter[i:]
+    swapped = a[i + 1:i + 2] == b[i:i + 1] and a[i:i + 1] == b[i + 1:i + 2] and a[i + 2:] == b[i + 2:]
+    return a[i + 1:] == b[i + 1:] or swapped
+
+
+def _same_words(words_a, words_b):
+    return len(words_a) == len(words_b) and all(
+        a == b or _typo(a, b) for a, b in zip(words_a, words_b))
+
+
+class MinHasher:
+    """MinHash signatures over character n-grams"""
+
+    def __init__(self, num_perm=64, ngram=3, seed=1):
+        self.ngram = ngram
+        rng = hashlib.sha256(str(seed).encode()).digest()
+        self.params = []
+        for i in range(num_perm):
+            digest = hashlib.sha256(rng + i.to_bytes(4, "big")).digest()
+            a = int.from_bytes(digest[:8], "big") % (_MERSENNE_PRIME - 1) + 1
+            b = int.from_bytes(digest[8:16], "big") % _MERSENNE_PRIME
+            self.params.append((a, b))
+
+    def signature(self, text):
+        hashes = [zlib.crc32(s.encode()) for s in _shingles(text, self.ngram)]
+        return tuple(
+            min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+            for a, b in self.params
+        )
+
+    @staticmethod
+    def similarity(sig_a, sig_b):
+        return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+class _Entry:
+    __slots__ = ("prompt", "context", "response", "expires_at", "size", "signature", "bands", "words")
+
+    def __init__(self, prompt, context, response, expires_at, signature, bands):
+        self.prompt = prompt
+        self.context = context
+        self.response = response
+        self.expires_at = expires_at
+        self.signature = signature
+        self.bands = bands
+        self.words = _content_words(prompt)
+        self.size = len(prompt) + len(response.encode()) + 8 * len(signature) + _ENTRY_OVERHEAD
+
+
+class ResponseCache:
+    """TTL + LRU response cache with exact and near-duplicate lookup"""
+
+    def __init__(self, ttl=3600, max_entries=2000, max_bytes=32 * 1024 * 1024,
+                 history_turns=4, similarity=0.85, num_perm=64, bands=16,
+                 db_path=None, clock=time.time):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.history_turns = history_turns
+        self.threshold = similarity
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm=num_perm)
+        self.clock = clock
+
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()  # key -> _Entry, least recently used first
+        self._buckets = {}  # (context, band, rows) -> set of keys
+        self.bytes_used = 0
+        self.counters = {"exact_hits": 0, "near_hits": 0, "misses": 0,
+                         "puts": 0, "evictions": 0, "expirations": 0}
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute('''CREATE TABLE IF NOT EXISTS response_cache
+                                (key TEXT PRIMARY KEY, prompt TEXT, context TEXT,
+                                 response TEXT, expires_at REAL, last_used REAL)''')
+            self._db.commit()
+            self._load()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            ttl=float(os.getenv("CHAT_CACHE_TTL", "3600")),
+            max_entries=int(os.getenv("CHAT_CACHE_MAX_ENTRIES", "2000")),
+            max_bytes=int(float(os.getenv("CHAT_CACHE_MAX_MB", "32")) * 1024 * 1024),
+            similarity=float(os.getenv("CHAT_CACHE_SIMILARITY", "0.85")),
+            db_path=os.getenv("CHAT_CACHE_DB") or None
+        )
+
+    # Keys
+
+    def _context(self, prompt, history):
+        """Identify the conversation context a prompt is asked in.
+
+        Numbers and language names are part of the context so "what is 2+3" never
+        near-matches "what is 2+4", nor "bubble sort in c++" "bubble sort in c".
+        """
+        turns = [
+            (msg.get("role", "user"), normalize_prompt(str(msg.get("content", "")))[:200])
+            for msg in (history or [])[-self.history_turns:]
+        ] if self.history_turns else []
+        terms = [word for word in _WORDS.findall(prompt) if word in _TECHNICAL_TERMS]
+        raw = json.dumps([turns, _DIGITS.findall(prompt), terms])
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    @staticmethod
+    def _key(context, prompt):
+        return hashlib.sha1(f"{context}\0{prompt}".encode()).hexdigest()
+
+    def _band_keys(self, context, signature):
+        return [
+            (context, band, signature[band * self.rows:(band + 1) * self.rows])
+            for band in range(self.bands)
+        ]
+
+    # Lookup
+
+    def get(self, prompt, history=None):
+        """Return a cached response for the prompt or None"""
+        normalized = normalize_prompt(prompt)
+        context = self._context(normalized, history)
+        key = self._key(context, normalized)
+        now = self.clock()
+        with self._lock:
+            entry = self._live(key, now)
+            if entry is not None:
+                self.counters["exact_hits"] += 1
+                return entry.response
+
+            words = _content_words(normalized)
+            signature = self.hasher.signature(" ".join(words))
+            best_key, best_score = None, self.threshold
+            candidates = set()
+            for band_key in self._band_keys(context, signature):
+                candidates |= self._buckets.get(band_key, set())
+            for candidate in candidates:
+                candidate_entry = self._entries.get(candidate)
+                if candidate_entry is None or not _same_words(words, candidate_entry.words):
+                    continue
+                score = MinHasher.similarity(signature, candidate_entry.signature)
+                if score >= best_score:
+                    best_key, best_score = candidate, score
+            entry = self._live(best_key, now) if best_key else None
+            if entry is not None:
+                self.counters["near_hits"] += 1
+                return entry.response
+
+            self.counters["misses"] += 1
+            return None
+
+    def _live(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            self._remove(key)
+            self.counters["expirations"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    # Insert / evict
+
+    def put(self, prompt, history, response):
+        normalized = normalize_prompt(prompt)
+        context = self._context(normalized, history)
+        key = self._key(context, normalized)
+        now = self.clock()
+        with self._lock:
+            self._insert(key, normalized, context, response, now + self.ttl)
+            self.counters["puts"] += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO response_cache VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, normalized, context, response, now + self.ttl, now)
+                )
+                self._db.commit()
+            self._evict(now)
+
+    def _insert(self, key, prompt, context, response, expires_at):
+        if key in self._entries:
+            self._remove(key, persist=False)
+        signature = self.hasher.signature(" ".join(_content_words(prompt)))
+        entry = _Entry(prompt, context, response, expires_at, signature,
+                       self._band_keys(context, signature))
+        if entry.size > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self.bytes_used += entry.size
+        for band_key in entry.bands:
+            self._buckets.setdefault(band_key, set()).add(key)
+
+    def _remove(self, key, persist=True):
+        entry = self._entries.pop(key)
+        self.bytes_used -= entry.size
+        for band_key in entry.bands:
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+        if persist and self._db is not None:
+            self._db.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+
+    def _evict(self, now):
+        while self._entries and (len(self._entries) > self.max_entries or self.bytes_used > self.max_bytes):
+            key, entry = next(iter(self._entries.items()))
+            self._remove(key)
+            if entry.expires_at <= now:
+                self.counters["expirations"] += 1
+            else:
+                self.counters["evictions"] += 1
+        if self._db is not None:
+            self._db.commit()
+
+    def _load(self):
+        now = self.clock()
+        self._db.execute("DELETE FROM response_cache WHERE expires_at <= ?", (now,))
+        rows = self._db.execute(
+            "SELECT key, prompt, context, response, expires_at FROM response_cache ORDER BY last_used"
+        ).fetchall()
+        for key, prompt, context, response, expires_at in rows:
+            self._insert(key, prompt, context, response, expires_at)
+        self._evict(now)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self.bytes_used = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM response_cache")
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self.bytes_used
+        lookups = stats["exact_hits"] + stats["near_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["exact_hits"] + stats["near_hits"]) / lookups, 3) if lookups else 0.0
+        return stats
@@ -0,0 +1,196 @@
+"""Per-user progress rollups, maintained on write.
+
+user_summary holds one row per student with everything the dashboard
+shows: login days, last login and streaks, running totals and counts per
+activity type, and aptitude count/best/sum. daily_activity holds the same
+activity totals per (user, day, type). The write routes update both in the
+same transaction as the raw row, so get_progress is a primary-key lookup
+plus a short primary-key range read, however long the account's history.
+
+global_stats holds the site-wide counters behind /api/stats (users,
+login days, summed activity value), bumped by the same write helpers, so
+the stats read is three primary-key lookups instead of three table scans.
+reconcile_stats() recounts them from the raw tables and reports the drift.
+
+The raw tables stay the source of truth: backfill() rebuilds the rollups
+from them. Run it by hand with: python rollups.py [db path]
+"""
+import sqlite3
+import sys
+
+import streaks
+
+# Activity types the dashboard reports; others only appear in daily_activity
+SUMMARY_ACTIVITY_TYPES = ("pdf", "video", "quantum", "test", "aptitude")
+
+SUMMARY_COLUMNS = (
+    ["login_days", "last_login_date", "current_streak", "longest_streak"]
+    + [f"{typ}_{kind}" for typ in SUMMARY_ACTIVITY_TYPES for kind in ("total", "count")]
+    + ["aptitude_tests", "aptitude_best", "aptitude_score_sum"]
+)
+
+
+# global_stats rows, each the value of the matching query over the raw tables
+STATS_QUERIES = {
+    "users": "SELECT COUNT(*) FROM users",
+    "logins": "SELECT COUNT(*) FROM logins",
+    "activities": "SELECT COALESCE(SUM(value), 0) FROM activities",
+}
+
+
+def empty_summary():
+    summary = dict.fromkeys(SUMMARY_COLUMNS, 0)
+    summary["last_login_date"] = None
+    return summary
+
+
+def get_summary(conn, user_id):
+    row = conn.execute(f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM user_summary WHERE user_id = ?",
+                       (user_id,)).fetchone()
+    return dict(zip(SUMMARY_COLUMNS, row)) if row else empty_summary()
+
+
+def record_login(conn, user_id, day):
+    """Call after inserting a new (user_id, day) row into logins; does not commit"""
+    row = conn.execute("SELECT last_login_date, current_streak, longest_streak FROM user_summary WHERE user_id = ?",
+                       (user_id,)).fetchone()
+    streak = streaks.EMPTY
+    if row and row[0] is not None:
+        streak = streaks.Streak(streaks.to_ordinal(row[0]), row[1], row[2])
+    streak = streaks.advance(streak, streaks.to_ordinal(day))
+    conn.execute("""INSERT INTO user_summary (user_id, login_days, last_login_date, current_streak, longest_streak)
+                    VALUES (?, 1, ?, ?, ?)
+                    ON CONFLICT(user_id) DO UPDATE SET
+                        login_days = login_days + 1,
+                        last_login_date = excluded.last_login_date,
+                        current_streak = excluded.current_streak,
+                        longest_streak = excluded.longest_streak""",
+                 (user_id, streaks.to_iso(streak.last), streak.current, streak.longest))
+    _bump_stat(conn, "logins", 1)
+
+
+def record_activity(conn, user_id, activity_type, value, day, count=1):
+    """Call after inserting count rows totalling value into activities; does not commit"""
+    conn.execute("""INSERT INTO daily_activity (user_id, activity_date, activity_type, total)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(user_id, activity_date, activity_type)
+                    DO UPDATE SET total = total + excluded.total""", (user_id, day, activity_type, value))
+    if activity_type in SUMMARY_ACTIVITY_TYPES:
+        total, count_column = f"{activity_type}_total", f"{activity_type}_count"
+        conn.execute(f"""INSERT INTO user_summary (user_id, {total}, {count_column}) VALUES (?, ?, ?)
+                         ON CONFLICT(user_id) DO UPDATE SET
+                             {total} = {total} + excluded.{total},
+                             {count_column} = {count_column} + excluded.{count_column}""",
+                     (user_id, value, count))
+    _bump_stat(conn, "activities", value)
+
+
+def record_aptitude(conn, user_id, score):
+    """Call after inserting into aptitude_scores; does not commit"""
+    conn.execute("""INSERT INTO user_summary (user_id, aptitude_tests, aptitude_best, aptitude_score_sum)
+                    VALUES (?, 1, ?, ?)
+                    ON CONFLICT(user_id) DO UPDATE SET
+                        aptitude_tests = aptitude_tests + 1,
+                        aptitude_best = MAX(aptitude_best, excluded.aptitude_best),
+                        aptitude_score_sum = aptitude_score_sum + excluded.aptitude_score_sum""",
+                 (user_id, score, score))
+
+
+def recent_activity(conn, user_id, since):
+    """[(date, type, total)] on or after since, newest day first"""
+    return conn.execute("""SELECT activity_date, activity_type, total FROM daily_activity
+                           WHERE user_id = ? AND activity_date >= ?
+                           ORDER BY activity_date DESC, activity_type""", (user_id, since)).fetchall()
+
+
+def record_user(conn):
+    """Call after inserting a new users row; does not commit"""
+    _bump_stat(conn, "users", 1)
+
+
+def _bump_stat(conn, name, delta):
+    conn.execute("""INSERT INTO global_stats (name, value) VALUES (?, ?)
+                    ON CONFLICT(name) DO UPDATE SET value = value + excluded.value""", (name, delta))
+
+
+def get_stats(conn):
+    """{name: value} for every STATS_QUERIES counter"""
+    rows = dict(conn.execute(f"SELECT name, value FROM global_stats WHERE name IN ({', '.join('?' for _ in STATS_QUERIES)})",
+                             tuple(STATS_QUERIES)).fetchall())
+    return {name: rows.get(name, 0) for name in STATS_QUERIES}
+
+
+def reconcile_stats(conn):
+    """Recount global_stats from the raw tables; returns {name: stored - actual} for counters that had drifted"""
+    conn.execute("BEGIN IMMEDIATE")  # no writes may land between counting and storing
+    try:
+        stored = get_stats(conn)
+        actual = {name: conn.execute(sql).fetchone()[0] for name, sql in STATS_QUERIES.items()}
+        conn.executemany("INSERT OR REPLACE INTO global_stats (name, value) VALUES (?, ?)", actual.items())
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return {name: stored[name] - actual[name] for name in STATS_QUERIES if stored[name] != actual[name]}
+
+
+def backfill(conn):
+    """Rebuild user_summary and daily_activity from the raw tables; returns users summarised"""
+    conn.execute("BEGIN IMMEDIATE")  # no writes may land between reading and replacing
+    try:
+        summaries = _summaries_from_raw(conn)
+        conn.execute("DELETE FROM daily_activity")
+        conn.execute("""INSERT INTO daily_activity (user_id, activity_date, activity_type, total)
+                        SELECT user_id, activity_date, activity_type, SUM(value) FROM activities
+                        GROUP BY user_id, activity_date, activity_type""")
+        conn.execute("DELETE FROM user_summary")
+        conn.executemany(
+            f"INSERT INTO user_summary (user_id, {', '.join(SUMMARY_COLUMNS)}) "
+            f"VALUES (?, {', '.join('?' for _ in SUMMARY_COLUMNS)})",
+            [(user_id, *(s[column] for column in SUMMARY_COLUMNS)) for user_id, s in summaries.items()]
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(summaries)
+
+
+def _summaries_from_raw(conn):
+    summaries = {}
+
+    def summary(user_id):
+        if user_id not in summaries:
+            summaries[user_id] = empty_summary()
+        return summaries[user_id]
+
+    days_by_user = {}
+    for user_id, day in conn.execute("SELECT user_id, login_date FROM logins"):
+        days_by_user.setdefault(user_id, []).append(streaks.to_ordinal(day))
+    for user_id, days in days_by_user.items():
+        streak = streaks.from_days(days)
+        s = summary(user_id)
+        s["login_days"] = len(days)
+        s["last_login_date"] = streaks.to_iso(streak.last)
+        s["current_streak"], s["longest_streak"] = streak.current, streak.longest
+
+    for user_id, typ, total, count in conn.execute(
+            "SELECT user_id, activity_type, SUM(value), COUNT(*) FROM activities GROUP BY user_id, activity_type"):
+        if typ in SUMMARY_ACTIVITY_TYPES:
+            s = summary(user_id)
+            s[f"{typ}_total"], s[f"{typ}_count"] = total or 0, count
+
+    for user_id, tests, best, score_sum in conn.execute(
+            "SELECT user_id, COUNT(*), MAX(score), SUM(score) FROM aptitude_scores GROUP BY user_id"):
+        s = summary(user_id)
+        s["aptitude_tests"], s["aptitude_best"], s["aptitude_score_sum"] = tests, best or 0, score_sum or 0
+    return summaries
+
+if __name__ == "__main__":
+    from migrations import migrate
+
+    path = sys.argv[1] if len(sys.argv) > 1 else "progress.db"
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    print(f"✅ Rebuilt progress rollups for {backfill(conn)} users in {path}")
+    conn.close()
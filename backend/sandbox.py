@@ -0,0 +1,245 @@
+"""Run one student program and measure what it used.
+
+subprocess.run only reports the exit code. run_program reaps the child
+with os.wait4, which also returns its resource usage, so each run reports
+wall time, CPU time and peak resident memory. stdin, stdout and stderr go
+through temporary files rather than pipes, so a program that floods its
+output or ignores its input can never deadlock the server.
+
+ResourceLimits caps each program with setrlimit: CPU seconds, address
+space and bytes written (stdout/stderr are regular files, so RLIMIT_FSIZE
+bounds them), so one runaway program cannot push the host into swap or
+fill its disk. A process cap is opt-in: RLIMIT_NPROC counts every task of
+the uid, server threads, JVM and V8 threads included, so it is set to the
+uid's current count plus SANDBOX_MAX_PROCESSES of headroom.
+"""
+import os
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows: wall-clock timeout only
+    resource = None
+
+_POLL_MIN = 0.001
+_POLL_MAX = 0.02
+_HAVE_PROC = os.path.exists("/proc/self/status")
+# What running out of RLIMIT_AS (or the JVM/V8 heap cap) leaves on stderr
+_OUT_OF_MEMORY = re.compile(r"MemoryError|std::bad_alloc|OutOfMemoryError|heap out of memory|"
+                            r"Cannot allocate memory|out of memory", re.IGNORECASE)
+_MEMORY_SIGNALS = (-signal.SIGSEGV, -signal.SIGABRT, -signal.SIGKILL)
+
+
+def _peak_rss_kb(rusage):
+    # ru_maxrss is kilobytes on Linux, bytes on macOS
+    return rusage.ru_maxrss // 1024 if sys.platform == "darwin" else rusage.ru_maxrss
+
+
+class ResourceLimits:
+    """rlimits applied to each student program"""
+
+    def __init__(self, cpu_seconds=10, memory_mb=256, output_kb=1024, max_processes=0):
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.output_kb = output_kb
+        self.max_processes = max_processes  # tasks a run may add to the uid's; 0 leaves RLIMIT_NPROC alone
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            cpu_seconds=int(os.getenv("SANDBOX_CPU_SECONDS", "10")),
+            memory_mb=int(os.getenv("SANDBOX_MEMORY_MB", "256")),
+            output_kb=int(os.getenv("SANDBOX_OUTPUT_KB", "1024")),
+            max_processes=int(os.getenv("SANDBOX_MAX_PROCESSES", "0"))
+        )
+
+    @property
+    def output_bytes(self):
+        return self.output_kb * 1024
+
+    def apply(self, cpu=True, address_space=True, nproc=None):
+        """Lower this process's limits; called in the child before exec.
+
+        The JVM and V8 reserve far more address space than they use, so
+        Java and Node run with address_space=False and get a heap flag instead.
+        nproc is the absolute RLIMIT_NPROC, worked out by preexec_fn.
+        """
+        if resource is None:
+            return
+        if cpu:
+            _set_limit(resource.RLIMIT_CPU, self.cpu_seconds, self.cpu_seconds + 1)
+        if address_space:
+            _set_limit(resource.RLIMIT_AS, self.memory_mb * 1024 * 1024)
+        _set_limit(resource.RLIMIT_FSIZE, self.output_bytes)
+        if nproc and hasattr(resource, "RLIMIT_NPROC"):
+            _set_limit(resource.RLIMIT_NPROC, nproc)
+
+    def preexec_fn(self, cpu=True, address_space=True):
+        if resource is None:
+            return None
+        # Counted here in the parent: the child between fork and exec should do as little as possible
+        nproc = _uid_task_count() + self.max_processes if self.max_processes else None
+        return lambda: self.apply(cpu, address_space, nproc)
+
+    def to_dict(self):
+        return {
+            "cpu_seconds": self.cpu_seconds,
+            "memory_mb": self.memory_mb,
+            "output_kb": self.output_kb,
+            "max_processes": self.max_processes
+        }
+
+
+def _set_limit(kind, soft, hard=None):
+    """setrlimit without ever asking for more than the current hard limit"""
+    _, current_hard = resource.getrlimit(kind)
+    hard = soft if hard is None else hard
+    if current_hard != resource.RLIM_INFINITY:
+        soft, hard = min(soft, current_hard), min(hard, current_hard)
+    resource.setrlimit(kind, (soft, hard))
+
+
+def _uid_task_count():
+    """Tasks (threads included) running as this uid, which is what RLIMIT_NPROC counts; 0 without /proc"""
+    if not _HAVE_PROC:
+        return 0
+    uid, count = os.getuid(), 0
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            if os.stat(f"/proc/{entry}").st_uid == uid:
+                count += len(os.listdir(f"/proc/{entry}/task"))
+        except OSError:
+            pass  # exited while we looked
+    return count
+
+
+def _out_of_memory(returncode, limits, stderr_tail, peak_rss_kb):
+    """Whether a failed run died of the memory cap.
+
+    A failed allocation surfaces as an error message (Python, C++, the JVM,
+    V8) or, in C code that ignores a NULL from malloc, as a crash near the cap.
+    """
+    if returncode == 0:
+        return False
+    if _OUT_OF_MEMORY.search(stderr_tail):
+        return True
+    return (returncode in _MEMORY_SIGNALS and peak_rss_kb is not None
+            and peak_rss_kb >= limits.memory_mb * 1024 * 0.8)
+
+
+def _limit_hit(returncode, timed_out, limits, cpu_time, stdout_size, stderr_tail="", peak_rss_kb=None):
+    """Which limit ended the run: "wall", "cpu", "memory", "output" or None"""
+    if timed_out:
+        return "wall"
+    if limits is None or resource is None:
+        return None
+    if returncode == -signal.SIGXCPU or (
+            returncode == -signal.SIGKILL and cpu_time is not None and cpu_time >= limits.cpu_seconds):
+        return "cpu"
+    if _out_of_memory(returncode, limits, stderr_tail, peak_rss_kb):
+        return "memory"
+    if returncode == -signal.SIGXFSZ or stdout_size >= limits.output_bytes:
+        return "output"
+    return None
+
+
+def _sample_hwm_kb(pid):
+    """VmHWM of a live child, or None once it has exited (or without /proc).
+
+    On Linux the child's ru_maxrss also counts the server's own image it was
+    forked from, so while /proc is available the peak is sampled from here
+    instead, every time the wait loop polls.
+    """
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def run_program(cmd, stdin="", timeout=10, cwd=None, limits=None, address_space=True):
+    """Run cmd to completion or until timeout, under limits if given.
+
+    Returns a dict with returncode, stdout, stderr, timed_out, limit (which
+    limit stopped it, or None), wall_time, cpu_time and peak_rss_kb. The
+    last two are None where unsupported; peak_rss_kb is also None for a
+    program that exits too fast to sample.
+    """
+    preexec_fn = limits.preexec_fn(address_space=address_space) if limits else None
+    with tempfile.TemporaryFile() as stdin_file, \
+            tempfile.TemporaryFile() as stdout_file, \
+            tempfile.TemporaryFile() as stderr_file:
+        stdin_file.write((stdin or "").encode())
+        stdin_file.seek(0)
+
+        started = time.perf_counter()
+        proc = subprocess.Popen(cmd, stdin=stdin_file, stdout=stdout_file, stderr=stderr_file,
+                                cwd=cwd, preexec_fn=preexec_fn)
+        status, rusage, timed_out, sampled_kb = _wait(proc, started + timeout)
+        wall_time = time.perf_counter() - started
+        if sampled_kb is not None or _HAVE_PROC:
+            peak_rss_kb = sampled_kb  # None if it exited before the first sample
+        else:
+            peak_rss_kb = _peak_rss_kb(rusage) if rusage else None
+
+        cpu_time = rusage.ru_utime + rusage.ru_stime if rusage else None
+        stdout_size = os.fstat(stdout_file.fileno()).st_size
+        stdout_file.seek(0)
+        stderr_file.seek(0)
+        stderr = stderr_file.read().decode(errors="replace")
+        return {
+            "returncode": proc.returncode,
+            "stdout": stdout_file.read().decode(errors="replace"),
+            "stderr": stderr,
+            "timed_out": timed_out,
+            "limit": _limit_hit(proc.returncode, timed_out, limits, cpu_time, stdout_size,
+                                stderr[-4096:], peak_rss_kb),
+            "wall_time": wall_time,
+            "cpu_time": cpu_time,
+            "peak_rss_kb": peak_rss_kb
+        }
+
+
+def _wait(proc, deadline):
+    """Reap proc, killing it at the deadline.
+
+    Returns (status, rusage, timed_out, sampled peak RSS in KB or None).
+    """
+    if not hasattr(os, "wait4"):  # Windows: no rusage
+        try:
+            proc.wait(timeout=max(0, deadline - time.perf_counter()))
+            return proc.returncode, None, False, None
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+            return proc.returncode, None, True, None
+
+    poll = _POLL_MIN
+    timed_out = False
+    sampled = None
+    while True:
+        hwm = _sample_hwm_kb(proc.pid)
+        if hwm is not None:
+            sampled = max(sampled or 0, hwm)
+        pid, status, rusage = os.wait4(proc.pid, os.WNOHANG)
+        if pid:
+            break
+        if time.perf_counter() >= deadline:
+            proc.kill()
+            pid, status, rusage = os.wait4(proc.pid, 0)
+            timed_out = True
+            break
+        time.sleep(poll)  # cooperative under eventlet
+        poll = min(poll * 2, _POLL_MAX)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return status, rusage, timed_out, sampled
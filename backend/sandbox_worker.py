@@ -0,0 +1,266 @@
+"""Warm Python sandbox worker, spawned and driven by python_pool.py.
+
+Reads length-prefixed JSON requests ({"code": ...}) on stdin, runs each one
+in a fresh namespace with stdout/stderr captured, and answers with a
+length-prefixed JSON result on stdout. The real stdin/stdout/stderr file
+descriptors are pointed at /dev/null so student code can never write into
+the protocol stream.
+
+Each run happens in a child forked from this warm process (fork-server
+style), so whatever the code changes -- attributes of already imported
+modules like json.dumps or math.pi, threads it starts, globals anywhere --
+dies with the child and never reaches the next submission. Where fork is
+unavailable the run happens in-process with a best-effort reset, and the
+result says isolated=False so the pool retires the worker afterwards.
+
+The pool starts the worker under the sandbox's memory, file size and
+process limits. CPU time is capped per run by moving the soft RLIMIT_CPU
+just ahead of what the worker has used so far; captured output is capped
+in memory.
+"""
+import builtins
+import io
+import json
+import os
+import signal
+import struct
+import sys
+import time
+import traceback
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Pre-imported so student snippets don't pay for them on every run
+import bisect
+import collections
+import datetime
+import functools
+import heapq
+import itertools
+import math
+import random
+import re
+import string
+
+_HEADER = struct.Struct(">I")
+# Bound now, so a run that patches json can't garble the frame carrying its own result
+_dumps, _loads = json.dumps, json.loads
+
+
+def read_frame(stream):
+    header = stream.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        return None
+    (size,) = _HEADER.unpack(header)
+    payload = b""
+    while len(payload) < size:
+        chunk = stream.read(size - len(payload))
+        if not chunk:
+            return None
+        payload += chunk
+    return _loads(payload)
+
+
+def write_frame(stream, message):
+    payload = _dumps(message).encode()
+    stream.write(_HEADER.pack(len(payload)) + payload)
+    stream.flush()
+
+
+class CPULimitExceeded(BaseException):
+    pass
+
+
+class OutputLimitExceeded(BaseException):
+    pass
+
+
+class _CappedOutput(io.StringIO):
+    """StringIO that keeps at most limit characters.
+
+    Once full, stdout raises OutputLimitExceeded into the student's code;
+    stderr just drops the rest so tracebacks can always be written.
+    """
+
+    def __init__(self, limit, raise_when_full):
+        super().__init__()
+        self.limit = limit
+        self.raise_when_full = raise_when_full
+        self.exceeded = False
+
+    def write(self, text):
+        room = self.limit - self.tell()
+        if len(text) <= room:
+            return super().write(text)
+        super().write(text[:max(room, 0)])
+        self.exceeded = True
+        if self.raise_when_full:
+            raise OutputLimitExceeded(f"Output limit of {self.limit} characters exceeded")
+        return len(text)
+
+
+def _on_cpu_limit(signum, frame):
+    raise CPULimitExceeded("CPU time limit exceeded")
+
+
+def _limit_cpu(seconds):
+    """Let the coming run use seconds more CPU; None lifts the soft limit again"""
+    if resource is None:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = hard if seconds is None else int(_cpu_time() + seconds) + 1
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _reset_peak_rss():
+    """Reset VmHWM so the next reading covers only the coming run (Linux)"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss_kb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+
+
+def _cpu_time():
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run(code, stdin="", cpu_seconds=None, output_limit=1024 * 1024):
+    """Run one snippet as __main__ and return its captured output"""
+    stdout = _CappedOutput(output_limit, raise_when_full=True)
+    stderr = _CappedOutput(output_limit, raise_when_full=False)
+    saved_builtins = dict(builtins.__dict__)
+    saved_modules = set(sys.modules)
+    saved_path = list(sys.path)
+    saved_cwd = os.getcwd()
+    saved_recursion_limit = sys.getrecursionlimit()
+
+    _reset_peak_rss()
+    cpu_started = _cpu_time()
+    namespace = {"__name__": "__main__", "__builtins__": builtins}
+    sys.stdout, sys.stderr, sys.stdin = stdout, stderr, io.StringIO(stdin)
+    success = True
+    limit = None
+    try:
+        if cpu_seconds:
+            _limit_cpu(cpu_seconds)
+        exec(compile(code, "main.py", "exec"), namespace)
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            success = False
+            if not isinstance(e.code, int):
+                print(e.code, file=stderr)
+    except SyntaxError as e:
+        success = False
+        traceback.print_exception(type(e), e, None, file=stderr)
+    except (CPULimitExceeded, OutputLimitExceeded) as e:
+        success = False  # the caller reports the limit; no traceback needed
+        limit = "cpu" if isinstance(e, CPULimitExceeded) else "output"
+    except BaseException as e:
+        success = False
+        if isinstance(e, MemoryError):
+            limit = "memory"
+        # Skip this frame so the traceback starts in the student's code
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next, file=stderr)
+    finally:
+        if cpu_seconds:
+            _limit_cpu(None)
+        sys.stdout, sys.stderr, sys.stdin = sys.__stdout__, sys.__stderr__, sys.__stdin__
+        namespace.clear()
+        builtins.__dict__.clear()
+        builtins.__dict__.update(saved_builtins)
+        for name in set(sys.modules) - saved_modules:
+            del sys.modules[name]
+        sys.path[:] = saved_path
+        os.chdir(saved_cwd)
+        sys.setrecursionlimit(saved_recursion_limit)
+
+    cpu_time = _cpu_time() - cpu_started if cpu_started is not None else None
+    return {
+        "success": success,
+        "stdout": stdout.getvalue(),
+        "stderr": stderr.getvalue(),
+        "limit": limit,
+        "cpu_time": cpu_time,
+        "peak_rss_kb": _peak_rss_kb()
+    }
+
+
+def run_isolated(code, stdin="", cpu_seconds=None, output_limit=1024 * 1024):
+    """run() in a forked child; the child's state is discarded with it"""
+    if not hasattr(os, "fork"):
+        return dict(run(code, stdin, cpu_seconds, output_limit), isolated=False)
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            result = run(code, stdin, cpu_seconds, output_limit)
+            with os.fdopen(write_fd, "wb") as result_out:
+                write_frame(result_out, result)
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    # Read one frame rather than to EOF: processes the code spawned may still hold the pipe
+    with os.fdopen(read_fd, "rb") as result_in:
+        try:
+            result = read_frame(result_in)
+        except ValueError:
+            result = None
+    _, status = os.waitpid(pid, 0)
+    if result is None:
+        signum = os.WTERMSIG(status) if os.WIFSIGNALED(status) else None
+        cpu_killed = signum in (getattr(signal, "SIGXCPU", None), signal.SIGKILL) and bool(cpu_seconds)
+        if signum is not None:
+            stderr = f"Process killed by signal {signum}"
+        elif os.WEXITSTATUS(status):
+            stderr = f"Process exited with code {os.WEXITSTATUS(status)}"
+        else:
+            stderr = "Process exited without reporting a result"
+        result = {"success": False, "stdout": "", "stderr": "" if cpu_killed else stderr,
+                  "limit": "cpu" if cpu_killed else None, "cpu_time": None, "peak_rss_kb": None}
+    result["isolated"] = True
+    return result
+
+
+def main():
+    proto_in = os.fdopen(os.dup(0), "rb")
+    proto_out = os.fdopen(os.dup(1), "wb")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    if hasattr(signal, "SIGXCPU"):
+        signal.signal(signal.SIGXCPU, _on_cpu_limit)
+
+    while True:
+        request = read_frame(proto_in)
+        if request is None:
+            break
+        started = time.perf_counter()
+        result = run_isolated(request["code"], request.get("stdin", ""),
+                              request.get("cpu_seconds"), request.get("output_limit", 1024 * 1024))
+        result["duration"] = time.perf_counter() - started
+        write_frame(proto_out, result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""Where the Socket.IO side keeps its shared state, and how workers talk.
+
+Online sids, the matchmaking queue, active interview rooms and the legacy
+chat-room member lists used to be process globals, which pinned the
+socket server to a single eventlet process. Handlers now go through a
+state backend instead:
+
+- MemoryState: plain dicts, for a single process (the default).
+- SQLiteState: the same state in a SQLite file every worker process on
+  the host opens. Each process heartbeats into a hosts table; rows owned
+  by a process that stopped heartbeating (crashed or killed) are dropped
+  by the survivors, so dead sids don't linger in the queue or the count.
+
+Events to clients connected to another process go through Flask-SocketIO's
+message_queue. Any URL it understands (redis://, amqp://, kafka://, ...)
+is passed straight through; sqlite:///path uses SQLiteMessageQueue below,
+a polling broker that needs no extra service.
+
+    SOCKETIO_STATE=sqlite:///socket_state.db
+    SOCKETIO_MESSAGE_QUEUE=sqlite:///socket_queue.db   # or redis://host:6379/0
+
+Worker processes still need a load balancer with sticky sessions in
+front of them, as any multi-process Socket.IO deployment does.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+
+import socketio
+
+from collab import Document, EditRejected
+from db import ConnectionPool
+from matchmaking import Matchmaker, SQLiteMatchmaker
+
+SQLITE_PREFIX = "sqlite:///"
+
+
+class MemoryState:
+    shared = False
+
+    def __init__(self, matchmaker=None):
+        self.matchmaker = matchmaker or Matchmaker.from_env()
+        self._online = set()
+        self._interviews = {}  # room_id -> {'users': [...], 'created_at': ...}
+        self._members = {}  # legacy chat room -> [username, ...]
+        self._presence = {}  # room -> {sid, ...}
+        self._presence_by_sid = {}  # sid -> {room, ...}
+        self._documents = {}  # interview room_id -> collab.Document
+        self._documents_lock = threading.Lock()
+
+    def start(self, spawn):
+        pass
+
+    def add_online(self, sid):
+        self._online.add(sid)
+        return len(self._online)
+
+    def remove_online(self, sid):
+        self._online.discard(sid)
+        return len(self._online)
+
+    def online_count(self):
+        return len(self._online)
+
+    def create_interview(self, room_id, users):
+        self._interviews[room_id] = {'users': users, 'created_at': time.time()}
+        self._documents[room_id] = Document()
+
+    def get_interview(self, room_id):
+        return self._interviews.get(room_id)
+
+    def save_interview(self, room_id, room):
+        self._interviews[room_id] = room
+
+    def delete_interview(self, room_id):
+        self._interviews.pop(room_id, None)
+        self._documents.pop(room_id, None)
+
+    def edit_document(self, room_id, fn):
+        """fn(document) with the room's shared code document, atomically; returns its result"""
+        with self._documents_lock:
+            document = self._documents.get(room_id)
+            if document is None:
+                raise EditRejected(f"No shared document for room {room_id}")
+            return fn(document)
+
+    def document_snapshot(self, room_id):
+        document = self._documents.get(room_id)
+        return document.snapshot() if document else None
+
+    def join_members(self, room, username):
+        """Add username to a legacy chat room; returns the member list"""
+        members = self._members.setdefault(room, [])
+        members.append(username)
+        return list(members)
+
+    def leave_members(self, room, username):
+        members = self._members.get(room)
+        if members and username in members:
+            members.remove(username)
+            if not members:
+                del self._members[room]
+        return list(self._members.get(room, []))
+
+    def join_presence(self, room, sid):
+        self._presence.setdefault(room, set()).add(sid)
+        self._presence_by_sid.setdefault(sid, set()).add(room)
+
+    def leave_presence(self, room, sid):
+        self._presence_by_sid.get(sid, set()).discard(room)
+        sids = self._presence.get(room)
+        if sids is not None:
+            sids.discard(sid)
+            if not sids:
+                del self._presence[room]
+
+    def drop_presence(self, sid):
+        """Remove sid from every room; returns the rooms it was in"""
+        rooms = self._presence_by_sid.pop(sid, set())
+        for room in rooms:
+            self.leave_presence(room, sid)
+        return list(rooms)
+
+    def presence_count(self, room):
+        return len(self._presence.get(room, ()))
+
+    def stats(self):
+        return {"backend": "memory", "online": len(self._online), "interviews": len(self._interviews)}
+
+
+class SQLiteState:
+    shared = True
+
+    def __init__(self, path, skill_band=100, heartbeat_interval=10.0, host_ttl=30.0):
+        self.path = path
+        self.host = uuid.uuid4().hex
+        self.heartbeat_interval = heartbeat_interval
+        self.host_ttl = host_ttl
+        self.pool = ConnectionPool(path, size=4)
+        with self.pool.connection() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS hosts (host TEXT PRIMARY KEY, seen_at REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS online (sid TEXT PRIMARY KEY, host TEXT)")
+            conn.execute("CREATE TABLE IF NOT EXISTS interviews (room_id TEXT PRIMARY KEY, data TEXT)")
+            conn.execute("""CREATE TABLE IF NOT EXISTS members
+                            (id INTEGER PRIMARY KEY, room TEXT, username TEXT)""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_members_room ON members (room, id)")
+            conn.execute("""CREATE TABLE IF NOT EXISTS presence
+                            (room TEXT, sid TEXT, host TEXT, PRIMARY KEY (room, sid)) WITHOUT ROWID""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_presence_sid ON presence (sid)")
+            conn.execute("CREATE TABLE IF NOT EXISTS documents (room_id TEXT PRIMARY KEY, data TEXT)")
+            conn.commit()
+        self.matchmaker = SQLiteMatchmaker(self.pool, skill_band, host=self.host)
+        self.heartbeat()
+
+    def start(self, spawn):
+        spawn(self._heartbeat_loop)
+
+    def heartbeat(self):
+        """Mark this process alive and drop rows owned by processes that aren't"""
+        now = time.time()
+        with self.pool.connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO hosts (host, seen_at) VALUES (?, ?)", (self.host, now))
+            dead = [row[0] for row in conn.execute("SELECT host FROM hosts WHERE seen_at < ?",
+                                                   (now - self.host_ttl,))]
+            for host in dead:
+                conn.execute("DELETE FROM online WHERE host = ?", (host,))
+                conn.execute("DELETE FROM match_queue WHERE host = ?", (host,))
+                conn.execute("DELETE FROM presence WHERE host = ?", (host,))
+                conn.execute("DELETE FROM hosts WHERE host = ?", (host,))
+            conn.commit()
+        return dead
+
+    def _heartbeat_loop(self):
+        while True:
+            time.sleep(self.heartbeat_interval)
+            try:
+                self.heartbeat()
+            except Exception as e:
+                print(f"⚠️ Socket state heartbeat failed: {e}")
+
+    def _write(self, sql, params=()):
+        with self.pool.connection() as conn:
+            conn.execute(sql, params)
+            conn.commit()
+
+    def _scalar(self, sql, params=()):
+        with self.pool.connection() as conn:
+            row = conn.execute(sql, params).fetchone()
+        return row[0] if row else None
+
+    def add_online(self, sid):
+        self._write("INSERT OR REPLACE INTO online (sid, host) VALUES (?, ?)", (sid, self.host))
+        return self.online_count()
+
+    def remove_online(self, sid):
+        self._write("DELETE FROM online WHERE sid = ?", (sid,))
+        return self.online_count()
+
+    def online_count(self):
+        return self._scalar("SELECT COUNT(*) FROM online")
+
+    def create_interview(self, room_id, users):
+        self.save_interview(room_id, {'users': users, 'created_at': time.time()})
+        self._write("INSERT OR REPLACE INTO documents (room_id, data) VALUES (?, ?)",
+                    (room_id, json.dumps(Document().to_dict())))
+
+    def get_interview(self, room_id):
+        data = self._scalar("SELECT data FROM interviews WHERE room_id = ?", (room_id,))
+        return json.loads(data) if data else None
+
+    def save_interview(self, room_id, room):
+        self._write("INSERT OR REPLACE INTO interviews (room_id, data) VALUES (?, ?)", (room_id, json.dumps(room)))
+
+    def delete_interview(self, room_id):
+        with self.pool.connection() as conn:
+            conn.execute("DELETE FROM interviews WHERE room_id = ?", (room_id,))
+            conn.execute("DELETE FROM documents WHERE room_id = ?", (room_id,))
+            conn.commit()
+
+    def edit_document(self, room_id, fn):
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")  # one writer per document at a time, across processes
+            try:
+                row = conn.execute("SELECT data FROM documents WHERE room_id = ?", (room_id,)).fetchone()
+                if row is None:
+                    raise EditRejected(f"No shared document for room {room_id}")
+                document = Document.from_dict(json.loads(row[0]))
+                result = fn(document)
+                conn.execute("UPDATE documents SET data = ? WHERE room_id = ?",
+                             (json.dumps(document.to_dict()), room_id))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return result
+
+    def document_snapshot(self, room_id):
+        data = self._scalar("SELECT data FROM documents WHERE room_id = ?", (room_id,))
+        return Document.from_dict(json.loads(data)).snapshot() if data else None
+
+    def join_members(self, room, username):
+        self._write("INSERT INTO members (room, username) VALUES (?, ?)", (room, username))
+        return self._members(room)
+
+    def leave_members(self, room, username):
+        self._write("""DELETE FROM members WHERE id =
+                       (SELECT MIN(id) FROM members WHERE room = ? AND username = ?)""", (room, username))
+        return self._members(room)
+
+    def _members(self, room):
+        with self.pool.connection() as conn:
+            return [row[0] for row in conn.execute("SELECT username FROM members WHERE room = ? ORDER BY id",
+                                                   (room,))]
+
+    def join_presence(self, room, sid):
+        self._write("INSERT OR REPLACE INTO presence (room, sid, host) VALUES (?, ?, ?)", (room, sid, self.host))
+
+    def leave_presence(self, room, sid):
+        self._write("DELETE FROM presence WHERE room = ? AND sid = ?", (room, sid))
+
+    def drop_presence(self, sid):
+        with self.pool.connection() as conn:
+            rooms = [row[0] for row in conn.execute("DELETE FROM presence WHERE sid = ? RETURNING room", (sid,))]
+            conn.commit()
+        return rooms
+
+    def presence_count(self, room):
+        return self._scalar("SELECT COUNT(*) FROM presence WHERE room = ?", (room,))
+
+    def stats(self):
+        with self.pool.connection() as conn:
+            online, interviews, hosts = conn.execute(
+                "SELECT (SELECT COUNT(*) FROM online), (SELECT COUNT(*) FROM interviews), (SELECT COUNT(*) FROM hosts)"
+            ).fetchone()
+        return {"backend": "sqlite", "path": self.path, "host": self.host,
+                "online": online, "interviews": interviews, "hosts": hosts}
+
+
+class SQLiteMessageQueue(socketio.PubSubManager):
+    """Socket.IO pub/sub over a SQLite table: publishers insert, every process polls"""
+
+    name = "sqlite"
+
+    def __init__(self, url=SQLITE_PREFIX + "socket_queue.db", channel="socketio", write_only=False,
+                 logger=None, json=None, poll_interval=0.02, retention=60.0):
+        super().__init__(channel=channel, write_only=write_only, logger=logger, json=json)
+        self.path = url[len(SQLITE_PREFIX):] if url.startswith(SQLITE_PREFIX) else url
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.pool = ConnectionPool(self.path, size=2)
+        with self.pool.connection() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS messages
+                            (id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT, payload TEXT, created_at REAL)""")
+            conn.commit()
+            # Subscribed from here on: older messages were for processes that were already running
+            self._last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM messages").fetchone()[0]
+
+    def _publish(self, data):
+        with self.pool.connection() as conn:
+            conn.execute("INSERT INTO messages (channel, payload, created_at) VALUES (?, ?, ?)",
+                         (self.channel, self.json.dumps(data), time.time()))
+            conn.commit()
+
+    def _listen(self):
+        last_prune = time.monotonic()
+        while True:
+            with self.pool.connection() as conn:
+                rows = conn.execute("""SELECT id, payload FROM messages WHERE id > ? AND channel = ?
+                                       ORDER BY id LIMIT 500""", (self._last_id, self.channel)).fetchall()
+                if time.monotonic() - last_prune > self.retention:
+                    conn.execute("DELETE FROM messages WHERE created_at < ?", (time.time() - self.retention,))
+                    conn.commit()
+                    last_prune = time.monotonic()
+            if not rows:
+                time.sleep(self.poll_interval)
+                continue
+            self._last_id = rows[-1][0]
+            for _, payload in rows:
+                yield payload
+
+
+def from_env():
+    """State backend named by SOCKETIO_STATE: "memory" (default) or sqlite:///path"""
+    url = os.getenv("SOCKETIO_STATE", "memory")
+    if url.startswith(SQLITE_PREFIX):
+        return SQLiteState(url[len(SQLITE_PREFIX):], skill_band=int(os.getenv("MATCH_SKILL_BAND", "100")))
+    if url != "memory":
+        raise ValueError(f"Unsupported SOCKETIO_STATE: {url}")
+    return MemoryState()
+
+
+def message_queue_options(url=None):
+    """Extra SocketIO.init_app kwargs for SOCKETIO_MESSAGE_QUEUE (empty when unset)"""
+    url = url if url is not None else os.getenv("SOCKETIO_MESSAGE_QUEUE", "")
+    if not url:
+        return {}
+    if url.startswith(SQLITE_PREFIX):
+        return {"client_manager": SQLiteMessageQueue(url, channel="flask-socketio")}
+    return {"message_queue": url}
@@ -0,0 +1,73 @@
+"""Periodic reconciliation of the global_stats counters behind /api/stats.
+
+The write paths keep global_stats in step inside their own transactions
+(see rollups.py), so /api/stats never counts the raw tables. Anything
+that writes those tables some other way can still skew a counter: manual
+SQL, an old build, a restore. StatsReconciler recounts from the raw tables
+every STATS_RECONCILE_SECONDS (default hourly), fixes the stored values and
+reports how far they had drifted, in the log and in /api/metrics. The
+recount is the one place the full scans remain, off the request path.
+"""
+import os
+import threading
+import time
+
+import rollups
+
+
+class StatsReconciler:
+    def __init__(self, pool, interval=3600.0, on_drift=None):
+        self.pool = pool
+        self.interval = interval
+        self.on_drift = on_drift  # called with {name: stored - actual} when a recount changed something
+        self._lock = threading.Lock()
+        self._started = False
+        self.last_drift = {}
+        self.last_run_at = None
+        self.last_run_ms = None
+        self.counters = {"runs": 0, "drifted_runs": 0, "errors": 0}
+
+    @classmethod
+    def from_env(cls, pool, on_drift=None):
+        return cls(pool, interval=float(os.getenv("STATS_RECONCILE_SECONDS", "3600")), on_drift=on_drift)
+
+    def start(self, spawn):
+        if self._started or self.interval <= 0:
+            return
+        self._started = True
+        spawn(self._run)
+
+    def reconcile(self):
+        """Recount now; returns the drift found ({} if the counters were exact)"""
+        started = time.perf_counter()
+        with self.pool.connection() as conn:
+            drift = rollups.reconcile_stats(conn)
+        with self._lock:
+            self.counters["runs"] += 1
+            self.last_drift = drift
+            self.last_run_at = time.time()
+            self.last_run_ms = round((time.perf_counter() - started) * 1000, 1)
+            if drift:
+                self.counters["drifted_runs"] += 1
+        if drift:
+            print(f"⚠️ Stats counters had drifted (stored - actual): {drift}")
+            if self.on_drift is not None:
+                self.on_drift(drift)
+        return drift
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.reconcile()
+            except Exception as e:
+                with self._lock:
+                    self.counters["errors"] += 1
+                print(f"⚠️ Stats reconciliation failed: {e}")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats.update(last_drift=dict(self.last_drift), last_run_at=self.last_run_at, last_run_ms=self.last_run_ms)
+        stats["interval"] = self.interval
+        return stats
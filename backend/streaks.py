@@ -0,0 +1,41 @@
+"""Login streaks as a small running state instead of a scan of every login.
+
+A streak is (last login ordinal, current run, longest run). Days are
+proleptic Gregorian ordinals (date.toordinal()), so "consecutive" is just
+b - a == 1, with no datetime arithmetic. advance() is O(1) per login;
+from_days() replays a whole history in one pass for backfills.
+"""
+from collections import namedtuple
+from datetime import date
+
+Streak = namedtuple("Streak", ["last", "current", "longest"])
+
+EMPTY = Streak(None, 0, 0)
+
+
+def to_ordinal(day):
+    """ISO date string (or date) -> ordinal"""
+    return (date.fromisoformat(day) if isinstance(day, str) else day).toordinal()
+
+
+def to_iso(ordinal):
+    return date.fromordinal(ordinal).isoformat() if ordinal is not None else None
+
+
+def advance(streak, day):
+    """State after a login on day (an ordinal). Same-day and backdated logins change nothing."""
+    if streak.last is None:
+        return Streak(day, 1, max(streak.longest, 1))
+    gap = day - streak.last
+    if gap <= 0:
+        return streak
+    current = streak.current + 1 if gap == 1 else 1
+    return Streak(day, current, max(streak.longest, current))
+
+
+def from_days(days):
+    """Replay a history of ordinals in any order (duplicates allowed)"""
+    streak = EMPTY
+    for day in sorted(set(days)):
+        streak = advance(streak, day)
+    return streak
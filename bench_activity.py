@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark: one transaction per activity event (the old record_activity)
+vs write-behind batches from backend/activity_buffer.py, on a scratch copy
+of the progress schema.
+
+Events mimic reading sessions: a few users each sending page views and
+video ticks, so most of a batch coalesces into the same rollup rows.
+
+Run: python bench_activity.py [events] [users]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+import rollups
+from activity_buffer import ActivityBuffer
+from db import ConnectionPool
+from migrations import migrate
+
+
+def make_pool(path):
+    pool = ConnectionPool(path, size=2)
+    with pool.connection() as conn:
+        migrate(conn)
+    return pool
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    rng = random.Random(7)
+    events = [(rng.randint(1, users), rng.choice(["pdf", "video", "quantum"]), 1, "2024-01-01") for _ in range(count)]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pool = make_pool(os.path.join(temp_dir, "per_event.db"))
+        started = time.perf_counter()
+        for user_id, typ, value, day in events:
+            with pool.connection() as conn:
+                conn.execute("INSERT INTO activities (user_id, activity_type, value, activity_date) VALUES (?, ?, ?, ?)",
+                             (user_id, typ, value, day))
+                rollups.record_activity(conn, user_id, typ, value, day)
+                conn.commit()
+        per_event = time.perf_counter() - started
+        pool.close()
+
+        pool = make_pool(os.path.join(temp_dir, "batched.db"))
+        buffer = ActivityBuffer(pool, max_events=500, max_delay=60)
+        buffer._started = True  # flush on the size trigger inline, no flusher thread
+        started = time.perf_counter()
+        for event in events:
+            buffer.record([event])
+            if buffer.pending() >= buffer.max_events:
+                buffer.flush()
+        buffer.close()
+        batched = time.perf_counter() - started
+        stats = buffer.stats()
+        pool.close()
+
+    print(f"{count} activity events from {users} users")
+    print(f"{'scheme':<24} {'commits':>8} {'rollup upserts':>15} {'events/s':>10}")
+    print(f"{'per-event commit':<24} {count:>8} {count:>15} {count / per_event:>10,.0f}")
+    print(f"{'batched (500)':<24} {stats['flushes']:>8} {stats['rollup_upserts']:>15} {count / batched:>10,.0f}")
+    print(f"speedup {per_event / batched:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
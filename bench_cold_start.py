@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cold start to first request for backend/app.py.
+
+Each run starts a fresh interpreter in a scratch directory (so init_db
+migrates an empty database), builds the app and times the first "/"
+request and the first DB-backed request from process start. By default
+the JWKS URL points at a local socket that accepts connections and never
+answers, the way a stalled Clerk edge looks; the fetch then waits out
+HTTP_READ_TIMEOUT (3s here).
+
+"blocking" replays the old import-time behaviour (init_db plus a JWKS
+fetch before the app can answer); "deferred" is the app factory as is.
+
+Run: python bench_cold_start.py [runs] [jwks url]
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+READ_TIMEOUT = "3"
+
+CHILD = r"""
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import app as backend
+if sys.argv[2] == "blocking":
+    backend.db_ready.ensure()
+    backend.jwks_cache.refresh()
+built = time.perf_counter()
+client = backend.app.test_client()
+assert client.get("/").status_code == 200
+first = time.perf_counter()
+assert client.get("/api/get_aptitude_leaderboard").status_code == 200
+first_db = time.perf_counter()
+print("RESULT " + json.dumps({"built": built - started, "first": first - started, "first_db": first_db - started,
+                  "boot": backend.boot_timer.report()["phases_ms"]}), flush=True)
+"""
+
+
+def cold_start(mode, jwks_url):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        env = dict(os.environ, CLERK_JWKS_URL=jwks_url, HTTP_READ_TIMEOUT=READ_TIMEOUT, PYTHONWARNINGS="ignore")
+        out = subprocess.run([sys.executable, "-c", CHILD, BACKEND, mode], cwd=temp_dir, env=env,
+                             capture_output=True, text=True, timeout=300)
+        if out.returncode != 0:
+            raise RuntimeError(out.stderr[-2000:])
+        result = next(line for line in out.stdout.splitlines() if line.startswith("RESULT "))
+        return json.loads(result[len("RESULT "):])
+
+
+def stalled_jwks():
+    """A listening socket nobody accepts on: connects succeed, reads hang"""
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(64)
+    return server, f"http://127.0.0.1:{server.getsockname()[1]}/.well-known/jwks.json"
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    server, jwks_url = stalled_jwks()
+    jwks_url = sys.argv[2] if len(sys.argv) > 2 else jwks_url
+    print(f"JWKS: {jwks_url}")
+    print(f"{'mode':<10} {'app built':>10} {'first req':>10} {'first DB req':>13}")
+    for mode in ("blocking", "deferred"):
+        results = [cold_start(mode, jwks_url) for _ in range(runs)]
+        median = lambda key: sorted(r[key] for r in results)[len(results) // 2] * 1000
+        print(f"{mode:<10} {median('built'):>8.0f}ms {median('first'):>8.0f}ms {median('first_db'):>11.0f}ms")
+    phases = ", ".join(f"{name} {ms:.0f}ms" for name, ms in results[-1]["boot"].items())
+    print(f"boot phases (last deferred run): {phases}")
+    server.close()
+
+
+if __name__ == "__main__":
+    main()
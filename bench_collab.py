@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Socket.IO payload bytes for live code sharing, full buffer per
+keystroke (the old code_change) vs incremental edits (backend/collab.py).
+
+Simulates a solver typing into the middle of a solution of the given size,
+with the odd backspace, and counts the JSON each scheme puts on the wire
+for the partner, acks and periodic snapshots included. Also times the
+server applying the edits.
+
+Run: python bench_collab.py [solution kB] [keystrokes]
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+from collab import Document
+
+SNAPSHOT_EVERY = 200
+
+
+def keystrokes(size, count, seed=3):
+    rng = random.Random(seed)
+    text = "".join(rng.choice("abcdefghij \n()=+:") for _ in range(size))
+    cursor = size // 2
+    edits = []
+    for _ in range(count):
+        if rng.random() < 0.1 and cursor > 0:
+            cursor -= 1
+            edits.append({"pos": cursor, "delete": 1, "insert": ""})
+        else:
+            edits.append({"pos": cursor, "delete": 0, "insert": rng.choice("abcdefghij ")})
+            cursor += 1
+    return text, edits
+
+
+def main():
+    size = int(float(sys.argv[1]) * 1024) if len(sys.argv) > 1 else 20 * 1024
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    text, edits = keystrokes(size, count)
+
+    doc = Document(text)
+    full_bytes = edit_bytes = 0
+    started = time.perf_counter()
+    for edit in edits:
+        version, applied = doc.apply(edit, doc.version, "solver")
+        full_bytes += len(json.dumps({"roomId": "interview_x", "code": doc.text}))  # sent in
+        full_bytes += len(json.dumps({"code": doc.text}))  # relayed out
+        edit_bytes += len(json.dumps({"roomId": "interview_x", "version": version - 1, "edit": edit}))
+        edit_bytes += len(json.dumps({"version": version}))  # ack
+        edit_bytes += len(json.dumps({"version": version, "edit": applied}))
+        if version % SNAPSHOT_EVERY == 0:
+            edit_bytes += len(json.dumps(doc.snapshot()))
+    elapsed = time.perf_counter() - started
+
+    print(f"{count} keystrokes into a {size // 1024} kB solution")
+    print(f"{'scheme':<28} {'bytes':>14} {'per keystroke':>14}")
+    print(f"{'full buffer':<28} {full_bytes:>14,} {full_bytes / count:>14,.0f}")
+    print(f"{'incremental edits':<28} {edit_bytes:>14,} {edit_bytes / count:>14,.0f}")
+    print(f"server apply: {elapsed / count * 1e6:.1f} µs/edit, traffic cut {full_bytes / edit_bytes:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark: connect-per-request (the old route pattern) vs the pooled WAL
+connections from backend/db.py, on a scratch copy of the progress schema.
+
+Each "request" mirrors record_login: look up the user, check today's login,
+insert it. Readers mirror get_detailed_progress.
+
+Run: python bench_db.py [requests] [threads]
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+from db import ConnectionPool
+
+USERS = 200
+
+
+def setup(path):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, clerk_id TEXT UNIQUE, username TEXT)")
+    conn.execute("CREATE TABLE logins (id INTEGER PRIMARY KEY, user_id INTEGER, login_date DATE)")
+    conn.executemany("INSERT INTO users (clerk_id, username) VALUES (?, ?)",
+                     [(f"user_{i}", f"student{i}") for i in range(USERS)])
+    conn.commit()
+    conn.close()
+
+
+def write_request(conn, i):
+    c = conn.cursor()
+    c.execute("SELECT id FROM users WHERE clerk_id = ?", (f"user_{i % USERS}",))
+    user_id = c.fetchone()[0]
+    day = f"2024-01-{i % 28 + 1:02d}"
+    c.execute("SELECT id FROM logins WHERE user_id = ? AND login_date = ?", (user_id, day))
+    if not c.fetchone():
+        c.execute("INSERT INTO logins (user_id, login_date) VALUES (?, ?)", (user_id, day))
+        conn.commit()
+
+
+def read_request(conn, i):
+    c = conn.cursor()
+    c.execute("SELECT id FROM users WHERE clerk_id = ?", (f"user_{i % USERS}",))
+    user_id = c.fetchone()[0]
+    c.execute("SELECT login_date FROM logins WHERE user_id = ?", (user_id,))
+    c.fetchall()
+
+
+def per_request(path):
+    def handle(fn, i):
+        conn = sqlite3.connect(path, timeout=5)
+        try:
+            fn(conn, i)
+        finally:
+            conn.close()
+    return handle
+
+
+def pooled(pool):
+    def handle(fn, i):
+        with pool.connection() as conn:
+            fn(conn, i)
+    return handle
+
+
+def drive(handle, requests, threads):
+    """Run requests (1 write : 3 reads) across threads; returns requests/second"""
+    errors = []
+
+    def worker(offset):
+        try:
+            for i in range(offset, requests, threads):
+                handle(write_request if i % 4 == 0 else read_request, i)
+        except Exception as e:
+            errors.append(e)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+    if errors:
+        print(f"  ⚠️ {len(errors)} worker(s) failed, first: {errors[0]}")
+    return requests / elapsed
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    print(f"{'pattern':<28} {'threads':>7} {'req/s':>10}")
+    for n in (1, threads):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "progress.db")
+            setup(path)
+            rate = drive(per_request(path), requests, n)
+            print(f"{'connect per request':<28} {n:>7} {rate:>10.0f}")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "progress.db")
+            setup(path)
+            pool = ConnectionPool(path, size=n)
+            rate = drive(pooled(pool), requests, n)
+            pool.close()
+            print(f"{'pooled (WAL, sync=NORMAL)':<28} {n:>7} {rate:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
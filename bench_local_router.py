@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: legacy keyword scans vs the compiled intent router
+used by get_enhanced_local_response() in backend/app.py.
+
+Run: python bench_local_router.py
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+from intent_router import classify_prompt
+
+
+def legacy_classify(prompt):
+    """The original any(word in prompt_lower ...) chain, with lists rebuilt per call"""
+    prompt_lower = prompt.lower()
+    if any(word in prompt_lower for word in ['python', 'javascript', 'java', 'c++', 'programming', 'code', 'algorithm', 'function', 'variable', 'loop', 'array', 'object']):
+        if 'python' in prompt_lower:
+            return "python"
+        elif any(word in prompt_lower for word in ['javascript', 'js', 'react', 'node']):
+            return "javascript"
+        return "programming"
+    elif any(word in prompt_lower for word in ['math', 'mathematics', 'calculus', 'algebra', 'geometry', 'statistics', 'equation', 'formula', 'solve']):
+        if 'calculus' in prompt_lower:
+            return "calculus"
+        elif 'algebra' in prompt_lower:
+            return "algebra"
+        return "math"
+    elif any(word in prompt_lower for word in ['study', 'exam', 'test', 'learn', 'homework', 'assignment', 'grade', 'school', 'college', 'university']):
+        return "study"
+    elif any(word in prompt_lower for word in ['physics', 'chemistry', 'biology', 'science', 'experiment', 'theory', 'formula']):
+        return "science"
+    elif any(word in prompt_lower for word in ['hello', 'hi', 'hey', 'help', 'what can you do', 'capabilities']):
+        return "greeting"
+    return "general"
+
+
+PROMPTS = [
+    "Write a Python function to calculate factorial",
+    "What are the best practices for JavaScript development?",
+    "Help me understand calculus derivatives",
+    "How should I prepare for my university exams next week?",
+    "Explain the theory of relativity in simple words",
+    "Hello! What can you do?",
+    "I was wondering whether you could tell me something about the history of the Roman empire "
+    "and the reasons it eventually declined over several centuries",
+]
+
+
+def best_of(fn, prompt, number=5000, repeat=5):
+    """Best per-call time in µs, to keep scheduler noise out of the numbers"""
+    return min(timeit.repeat(lambda: fn(prompt), number=number, repeat=repeat)) / number * 1e6
+
+
+def main():
+    print(f"{'legacy µs':>10} {'router µs':>10}  prompt")
+    totals = [0.0, 0.0]
+    for prompt in PROMPTS:
+        old, new = best_of(legacy_classify, prompt), best_of(classify_prompt, prompt)
+        totals[0] += old
+        totals[1] += new
+        print(f"{old:10.2f} {new:10.2f}  {prompt[:60]}")
+    print(f"{totals[0] / len(PROMPTS):10.2f} {totals[1] / len(PROMPTS):10.2f}  (mean)")
+
+    print("\n🔎 Classification differences (substring vs word-boundary):")
+    for prompt in PROMPTS + ["Is this right?", "adjust the margins", "his homework"]:
+        old, new = legacy_classify(prompt), classify_prompt(prompt)
+        if old != new:
+            print(f"  {prompt!r}: {old} -> {new}")
+
+
+if __name__ == "__main__":
+    main()
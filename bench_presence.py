@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark: online-count messages during a reconnect storm, broadcasting on
+every connect/disconnect (the old handlers) vs Presence's ticked broadcasts
+(backend/presence.py).
+
+Simulates a deploy: every client drops within a second, then all of them
+reconnect at random over the spread window and each rejoins its
+two-person interview room. A message is one delivery to one client, so a
+broadcast to n connected clients counts n.
+
+Run: python bench_presence.py [clients] [spread seconds] [tick seconds]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+from presence import Presence
+from state_backend import MemoryState
+
+
+def storm(clients, spread, seed=7):
+    """[(time, kind, sid)] for a disconnect wave followed by a reconnect wave"""
+    rng = random.Random(seed)
+    events = [(rng.uniform(0, 1.0), "disconnect", sid) for sid in range(clients)]
+    events += [(1.0 + rng.uniform(0, spread), "connect", sid) for sid in range(clients)]
+    return sorted(events)
+
+
+def per_event(events, clients):
+    online = clients
+    messages = 0
+    for _, kind, _ in events:
+        online += 1 if kind == "connect" else -1
+        messages += online  # emit('online_users_count', ..., broadcast=True)
+    return messages, len(events)
+
+
+def ticked(events, clients, tick):
+    state = MemoryState()
+    delivered = [0, 0]  # messages, emits
+
+    def emit(event, payload, room=None):
+        delivered[0] += state.online_count() if room is None else state.presence_count(room)
+        delivered[1] += 1
+
+    presence = Presence(state, emit, tick=tick)
+    for sid in range(clients):
+        presence.connected(sid)
+        presence.join(f"interview_{sid // 2}", sid)
+    presence.flush()
+    delivered[:] = [0, 0]
+
+    started = time.perf_counter()
+    next_tick = tick
+    for at, kind, sid in events:
+        while at >= next_tick:
+            presence.flush()
+            next_tick += tick
+        if kind == "connect":
+            presence.connected(sid)
+            presence.join(f"interview_{sid // 2}", sid)
+        else:
+            presence.disconnected(sid)
+    presence.flush()
+    elapsed = time.perf_counter() - started
+    return delivered[0], delivered[1], elapsed
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    spread = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    tick = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+    events = storm(clients, spread)
+    print(f"{clients} clients, reconnects spread over {spread:.0f}s, tick {tick}s")
+    print(f"{'pattern':<28} {'emits':>8} {'messages':>12}")
+    messages, emits = per_event(events, clients)
+    print(f"{'broadcast per event':<28} {emits:>8} {messages:>12,}")
+    messages, emits, elapsed = ticked(events, clients, tick)
+    print(f"{'presence tick (+ rooms)':<28} {emits:>8} {messages:>12,}   ({elapsed * 1000:.0f}ms bookkeeping)")
+
+
+if __name__ == "__main__":
+    main()
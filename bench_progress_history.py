@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark: get_detailed_progress payloads for a long-lived account, the
+full legacy history vs one windowed page (backend/progress_history.py)
+in rows and columns format.
+
+Builds a scratch user with the given years of near-daily logins and
+activity, then times query + JSON encoding per request.
+
+Run: python bench_progress_history.py [years] [requests]
+"""
+
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+import rollups
+from migrations import migrate
+from progress_history import history_page, legacy_history, parse_query
+
+
+def make_user(years):
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    rng = random.Random(11)
+    start = date(2020, 1, 1)
+    for offset in range(int(years * 365)):
+        day = (start + timedelta(days=offset)).isoformat()
+        if rng.random() < 0.8:
+            conn.execute("INSERT INTO logins (user_id, login_date) VALUES (1, ?)", (day,))
+        for typ in ("pdf", "video", "quantum", "test"):
+            if rng.random() < 0.6:
+                value = rng.randint(1, 5)
+                conn.execute("INSERT INTO activities (user_id, activity_type, value, activity_date) VALUES (1, ?, ?, ?)",
+                             (typ, value, day))
+                rollups.record_activity(conn, 1, typ, value, day)
+    conn.commit()
+    return conn, (start + timedelta(days=int(years * 365) - 90)).isoformat()
+
+
+def measure(build, requests):
+    started = time.perf_counter()
+    for _ in range(requests):
+        body = json.dumps(build(), separators=(",", ":"), sort_keys=True).encode()
+    return len(body), (time.perf_counter() - started) / requests * 1000
+
+
+def main():
+    years = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    conn, window_start = make_user(years)
+    schemes = [
+        ("full history (legacy)", lambda: legacy_history(conn, 1)),
+        ("90 days, rows", lambda: history_page(conn, 1, parse_query({"from": window_start}))),
+        ("90 days, columns", lambda: history_page(conn, 1, parse_query({"from": window_start, "format": "columns"}))),
+        ("all time by month, columns", lambda: history_page(conn, 1, parse_query({"bucket": "month", "format": "columns",
+                                                                                 "limit": "1000"}))),
+    ]
+    print(f"{years:g} years of history, {requests} requests each")
+    print(f"{'payload':<30} {'bytes':>10} {'ms/request':>11}")
+    for name, build in schemes:
+        size, ms = measure(build, requests)
+        print(f"{name:<30} {size:>10,} {ms:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /api/stats computed with COUNT(*)/SUM over the raw tables (the
+old get_stats) vs the global_stats counters (rollups.get_stats), and the
+cost of one reconciliation recount, on a scratch progress.db.
+
+Run: python bench_stats.py [activity rows] [requests]
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+import rollups
+from migrations import migrate
+
+OLD_QUERIES = ["SELECT COUNT(*) FROM users", "SELECT COUNT(*) FROM logins", "SELECT SUM(value) FROM activities"]
+
+
+def timed(fn, requests):
+    started = time.perf_counter()
+    for _ in range(requests):
+        fn()
+    return (time.perf_counter() - started) / requests * 1000
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    with tempfile.TemporaryDirectory() as temp_dir:
+        conn = sqlite3.connect(os.path.join(temp_dir, "progress.db"))
+        migrate(conn)
+        users = max(1, rows // 200)
+        conn.executemany("INSERT INTO users (clerk_id, username) VALUES (?, ?)",
+                         ((f"user_{i}", f"student{i}") for i in range(users)))
+        conn.executemany("INSERT OR IGNORE INTO logins (user_id, login_date) VALUES (?, ?)",
+                         ((i % users + 1, f"2024-{i // users % 12 + 1:02d}-{i // users // 12 % 28 + 1:02d}")
+                          for i in range(rows // 4)))
+        conn.executemany("INSERT INTO activities (user_id, activity_type, value, activity_date) VALUES (?, ?, ?, ?)",
+                         ((i % users + 1, "pdf", i % 5 + 1, "2024-01-01") for i in range(rows)))
+        conn.commit()
+        rollups.reconcile_stats(conn)
+
+        old = timed(lambda: [conn.execute(sql).fetchone() for sql in OLD_QUERIES], requests)
+        new = timed(lambda: rollups.get_stats(conn), requests * 100)
+        recount = timed(lambda: rollups.reconcile_stats(conn), 3)
+        conn.close()
+
+    print(f"{rows:,} activity rows, {users:,} users")
+    print(f"{'scheme':<28} {'ms/request':>11}")
+    print(f"{'COUNT/SUM per request':<28} {old:>11.3f}")
+    print(f"{'global_stats counters':<28} {new:>11.3f}")
+    print(f"{'reconcile (periodic)':<28} {recount:>11.3f}")
+    print(f"speedup {old / new:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
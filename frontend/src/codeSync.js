@@ -0,0 +1,109 @@
+// Incremental code sync for interview rooms (server side: backend/collab.py).
+// Each local change goes out as one edit {pos, delete, insert} against the
+// last document version we saw, instead of the whole buffer. Only one edit
+// is in flight at a time: keystrokes made before its ack are sent together
+// as one edit once it arrives. If remote edits arrive while we have
+// unacknowledged or unsent changes, or one doesn't line up with our version,
+// we ask the server for a snapshot and continue from there.
+
+export function diffEdit(before, after) {
+  if (before === after) return null;
+  const max = Math.min(before.length, after.length);
+  let start = 0;
+  while (start < max && before[start] === after[start]) start++;
+  let end = 0;
+  while (end < max - start && before[before.length - 1 - end] === after[after.length - 1 - end]) end++;
+  return {
+    pos: start,
+    delete: before.length - start - end,
+    insert: after.slice(start, after.length - end)
+  };
+}
+
+export function applyEdit(text, edit) {
+  if (edit.pos + edit.delete > text.length) {
+    throw new Error('Edit does not fit the document');
+  }
+  return text.slice(0, edit.pos) + edit.insert + text.slice(edit.pos + edit.delete);
+}
+
+export class CodeSync {
+  constructor(socket, onRemoteCode) {
+    this.socket = socket;
+    this.onRemoteCode = onRemoteCode;
+    this.reset(null);
+
+    socket.on('code_ack', ({ version }) => {
+      this.inFlight = false;
+      this.version = Math.max(this.version, version);
+      this.flush();
+    });
+
+    socket.on('code_edit', ({ version, edit }) => {
+      if (!this.roomId) return;
+      if (this.inFlight || this.pending !== null || version !== this.version + 1) {
+        this.requestSnapshot();
+        return;
+      }
+      try {
+        this.shadow = applyEdit(this.shadow, edit);
+      } catch (error) {
+        this.requestSnapshot();
+        return;
+      }
+      this.version = version;
+      this.onRemoteCode(this.shadow);
+    });
+
+    socket.on('code_snapshot', (snapshot) => {
+      if (!this.roomId || !snapshot) return;
+      // Periodic snapshots don't override edits of ours still on the way; resyncs do
+      const requested = this.awaitingSnapshot || snapshot.resync;
+      if (!requested && (this.inFlight || this.pending !== null || snapshot.version < this.version)) return;
+      this.awaitingSnapshot = false;
+      this.inFlight = false;
+      this.pending = null;
+      this.version = snapshot.version;
+      this.shadow = snapshot.code;
+      this.onRemoteCode(this.shadow);
+    });
+
+    // Sent instead of a snapshot once the room is gone: stop syncing, keep the editor as it is
+    socket.on('interview_disconnected', ({ roomId } = {}) => {
+      if (roomId && roomId === this.roomId) this.reset(null);
+    });
+  }
+
+  reset(roomId) {
+    this.roomId = roomId;
+    this.version = 0;
+    this.shadow = '';
+    this.inFlight = false;
+    this.pending = null; // editor text not sent yet
+    this.awaitingSnapshot = false;
+  }
+
+  // Call with the editor's text after a local change
+  localChange(text) {
+    if (!this.roomId) return;
+    this.pending = text;
+    this.flush();
+  }
+
+  // Send unsent changes as one edit, unless one is still waiting for its ack
+  flush() {
+    if (this.inFlight || this.awaitingSnapshot || this.pending === null) return;
+    const edit = diffEdit(this.shadow, this.pending);
+    this.shadow = this.pending;
+    this.pending = null;
+    if (!edit) return;
+    this.inFlight = true;
+    this.socket.emit('code_edit', { roomId: this.roomId, version: this.version, edit });
+  }
+
+  requestSnapshot() {
+    if (this.awaitingSnapshot) return;
+    this.awaitingSnapshot = true;
+    this.socket.emit('code_sync', { roomId: this.roomId });
+  }
+}
@@ -10,6 +10,7 @@ export const API_ENDPOINTS = {
   // User endpoints
   RECORD_LOGIN: `${API_BASE_URL}/api/record_login`,
   RECORD_ACTIVITY: `${API_BASE_URL}/api/record_activity`,
+  RECORD_ACTIVITIES: `${API_BASE_URL}/api/record_activities`,
   
   // Progress endpoints
   GET_PROGRESS: `${API_BASE_URL}/api/get_progress`,
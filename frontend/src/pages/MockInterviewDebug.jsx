@@ -8,7 +8,7 @@ const MockInterviewDebug = () => {
   const [socket, setSocket] = useState(null);
   const [isConnected, setIsConnected] = useState(false);
   const [onlineUsers, setOnlineUsers] = useState(0);
-  const [waitingUsers, setWaitingUsers] = useState([]);
+  const [waitingCount, setWaitingCount] = useState(0);
   const [isSearching, setIsSearching] = useState(false);
   const [matchFound, setMatchFound] = useState(null);
   const [logs, setLogs] = useState([]);
@@ -56,9 +56,10 @@ const MockInterviewDebug = () => {
       addLog(`👥 Online users: ${count}`);
     });
 
-    newSocket.on('waiting_users', (users) => {
-      setWaitingUsers(users);
-      addLog(`⏳ Waiting users: ${users.length}`);
+    // Coalesced queue size updates: { waiting, delta }
+    newSocket.on('queue_size', ({ waiting }) => {
+      setWaitingCount(waiting);
+      addLog(`⏳ Waiting users: ${waiting}`);
     });
 
     newSocket.on('match_found', ({ roomId, partner, role }) => {
@@ -132,7 +133,7 @@ const MockInterviewDebug = () => {
           <div className="bg-white dark:bg-slate-800 p-4 rounded-lg shadow-lg">
             <h3 className="font-semibold mb-2">Waiting</h3>
             <div className="text-2xl font-bold text-amber-600 dark:text-amber-400">
-              {waitingUsers.length}
+              {waitingCount}
             </div>
           </div>
 
@@ -25,6 +25,7 @@ import {
   FaRandom
 } from 'react-icons/fa';
 import { SOCKET_CONFIG, API_ENDPOINTS } from '../config/api';
+import { CodeSync } from '../codeSync';
 
 const MockInterviewWorking = () => {
   const { user } = useAuth();
@@ -63,8 +64,9 @@ const MockInterviewWorking = () => {
   
   // Socket.IO State
   const [socket, setSocket] = useState(null);
-  const [waitingUsers, setWaitingUsers] = useState([]);
+  const [waitingCount, setWaitingCount] = useState(0);
   const [isConnected, setIsConnected] = useState(false);
+  const codeSyncRef = useRef(null);
 
   // Coding problems
   const codingProblems = [
@@ -115,6 +117,7 @@ console.log(result);`,
       upgrade: true,
     });
     setSocket(newSocket);
+    codeSyncRef.current = new CodeSync(newSocket, (remoteCode) => setCode(remoteCode));
 
     newSocket.on('connect', () => {
       setIsConnected(true);
@@ -134,8 +137,9 @@ console.log(result);`,
       setOnlineUsers(count);
     });
 
-    newSocket.on('waiting_users', (users) => {
-      setWaitingUsers(users);
+    // Coalesced queue size updates: { waiting, delta }
+    newSocket.on('queue_size', ({ waiting }) => {
+      setWaitingCount(waiting);
     });
 
     newSocket.on('match_found', (data) => {
@@ -145,6 +149,7 @@ console.log(result);`,
         id: data.partner.userId
       });
       setRoomId(data.roomId);
+      codeSyncRef.current.reset(data.roomId);
       setMyRole(data.role);
       setIsMatched(true);
       setIsSearching(false);
@@ -187,16 +192,12 @@ console.log(result);`,
       setMessages(prev => [...prev, message]);
     });
 
-    // Real-time code sharing
-    newSocket.on('code_update', (data) => {
-      setCode(data.code);
-    });
-
     // Real-time partner disconnect
     newSocket.on('partner_disconnected', () => {
       setIsMatched(false);
       setPartner(null);
       setRoomId(null);
+      codeSyncRef.current.reset(null);
       setMyRole('solver');
       setCurrentProblem(null);
       setMessages([]);
@@ -283,6 +284,13 @@ console.log(result);`,
     };
   }, [isMatched]);
 
+  // Real-time code sharing: the solver's changes go out as incremental edits
+  useEffect(() => {
+    if (roomId && myRole === 'solver') {
+      codeSyncRef.current?.localChange(code);
+    }
+  }, [code, roomId, myRole]);
+
   // Timer effect
   useEffect(() => {
     let interval;
@@ -308,7 +316,8 @@ console.log(result);`,
     if (socket && isConnected) {
       socket.emit('find_match', {
         userId: user?.id,
-        username: user?.firstName || user?.username || 'Anonymous'
+        username: user?.firstName || user?.username || 'Anonymous',
+        language
       });
     }
   };
@@ -463,6 +472,7 @@ console.log(result);`,
     setIsMatched(false);
     setPartner(null);
     setRoomId(null);
+    codeSyncRef.current?.reset(null);
     setMessages([]);
     setCurrentProblem(null);
     setCode('');
@@ -549,7 +559,7 @@ console.log(result);`,
                     <FaCode className="text-white text-xl" />
                   </div>
                   <div>
-                    <h3 className="text-2xl font-bold text-slate-800 dark:text-white">{waitingUsers.length}</h3>
+                    <h3 className="text-2xl font-bold text-slate-800 dark:text-white">{waitingCount}</h3>
                     <p className="text-slate-600 dark:text-slate-400">Waiting for Match</p>
                   </div>
                 </div>
@@ -937,10 +947,6 @@ console.log(result);`,
                   value={code}
                   onChange={(value) => {
                     setCode(value || '');
-                    // Real-time code sharing
-                    if (socket && roomId) {
-                      socket.emit('code_update', { roomId: roomId, code: value || '' });
-                    }
                   }}
                   options={{
                     fontSize: 16,
@@ -31,6 +31,8 @@ ChartJS.register(
   BarElement
 );
 
+const DETAILED_HISTORY_DAYS = 180;
+
 export default function ProgressTracker() {
   const { getToken } = useAuth();
   const [data, setData] = useState(null);
@@ -164,7 +166,9 @@ export default function ProgressTracker() {
     const fetchDetailedProgress = async () => {
       try {
         const token = await getToken();
-        const res = await fetch(API_ENDPOINTS.GET_DETAILED_PROGRESS, {
+        // The calendar and trend chart only need recent history; one page of days covers it
+        const since = new Date(Date.now() - DETAILED_HISTORY_DAYS * 86400000).toISOString().split('T')[0];
+        const res = await fetch(`${API_ENDPOINTS.GET_DETAILED_PROGRESS}?from=${since}&limit=${DETAILED_HISTORY_DAYS + 1}`, {
           headers: {
             Authorization: `Bearer ${token}`,
           },
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests for write-behind activity batching (backend/activity_buffer.py)
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+import rollups
+from activity_buffer import ActivityBuffer, ActivityWriteFailed
+from db import ConnectionPool
+from migrations import migrate
+
+
+def make_pool(temp_dir):
+    pool = ConnectionPool(os.path.join(temp_dir, "progress.db"), size=4)
+    with pool.connection() as conn:
+        migrate(conn)
+    return pool
+
+
+def spawn(fn):
+    threading.Thread(target=fn, daemon=True).start()
+
+
+def test_batch_matches_per_event_writes():
+    events = [(1, "pdf", 1, "2024-01-01"), (1, "pdf", 2, "2024-01-01"), (1, "video", 5, "2024-01-02"),
+              (2, "pdf", 1, "2024-01-01"), (1, "pdf", 1, "2024-01-02"), (2, "other", 3, "2024-01-01")]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pool = make_pool(temp_dir)
+        buffer = ActivityBuffer(pool, max_events=100, max_delay=60)
+        buffer._started = True  # no flusher thread: flush by hand
+        buffer.record(events[:4])
+        buffer.record(events[4:])
+        assert buffer.pending() == 6
+        assert buffer.flush() == 6 and buffer.pending() == 0
+        stats = buffer.stats()
+        assert stats["flushes"] == 1 and stats["rollup_upserts"] == 5
+
+        reference = sqlite3.connect(":memory:")
+        migrate(reference)
+        for user_id, typ, value, day in events:
+            reference.execute("INSERT INTO activities (user_id, activity_type, value, activity_date) VALUES (?, ?, ?, ?)",
+                              (user_id, typ, value, day))
+            rollups.record_activity(reference, user_id, typ, value, day)
+        with pool.connection() as conn:
+            for table in ("activities", "daily_activity", "user_summary"):
+                query = f"SELECT * FROM {table} ORDER BY 1, 2, 3"
+                assert conn.execute(query).fetchall() == reference.execute(query).fetchall(), table
+        pool.close()
+
+
+def test_size_trigger_and_group_commit():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pool = make_pool(temp_dir)
+        buffer = ActivityBuffer(pool, max_events=3, max_delay=60, durability="group")
+        buffer.start(spawn)
+        results = []
+        writers = [threading.Thread(target=lambda: results.append(buffer.record([(1, "pdf", 1, "2024-01-01")])))
+                   for _ in range(3)]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join(5)
+        # The third event fills the batch; all three callers return once it commits
+        assert len(results) == 3
+        with pool.connection() as conn:
+            assert conn.execute("SELECT pdf_total, pdf_count FROM user_summary").fetchone() == (3, 3)
+        assert buffer.stats()["flushes"] == 1
+        buffer.close()
+        pool.close()
+
+
+def test_failed_writes_are_retried_and_close_flushes():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pool = make_pool(temp_dir)
+        buffer = ActivityBuffer(pool, max_delay=60)
+        buffer._started = True
+        buffer.record([(1, "quantum", 2, "2024-01-01")])
+        with pool.connection() as conn:
+            conn.execute("ALTER TABLE activities RENAME TO activities_moved")
+            conn.commit()
+        assert buffer.flush() == 0 and buffer.stats()["write_errors"] == 1
+        buffer.record([(1, "quantum", 3, "2024-01-01")])
+        assert buffer.pending() == 2
+        with pool.connection() as conn:
+            conn.execute("ALTER TABLE activities_moved RENAME TO activities")
+            conn.commit()
+        buffer.close()
+        with pool.connection() as conn:
+            assert conn.execute("SELECT quantum_total, quantum_count FROM user_summary").fetchone() == (5, 2)
+        try:
+            buffer.record([(1, "pdf", 1, "2024-01-01")])
+            assert False, "expected ActivityWriteFailed after close"
+        except ActivityWriteFailed:
+            pass
+        pool.close()
+
+
+def test_bad_rows_are_dropped_and_retries_are_capped():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pool = make_pool(temp_dir)
+        buffer = ActivityBuffer(pool, max_delay=60, max_attempts=2)
+        buffer._started = True
+        # Too big for SQLite: written alone and dropped, the others still land
+        buffer.record([(1, "pdf", 2, "2024-01-01"), (1, "pdf", 10 ** 20, "2024-01-01"), (2, "pdf", 3, "2024-01-01")])
+        assert buffer.flush() == 2 and buffer.pending() == 0
+        with pool.connection() as conn:
+            assert conn.execute("SELECT SUM(value) FROM activities").fetchone()[0] == 5
+        stats = buffer.stats()
+        assert stats["dropped"] == 1 and stats["write_errors"] == 1
+        with pool.connection() as conn:
+            conn.execute("ALTER TABLE activities RENAME TO activities_moved")
+            conn.commit()
+        buffer.record([(1, "pdf", 1, "2024-01-02")])
+        assert buffer.flush() == 0 and buffer.pending() == 1
+        assert buffer.flush() == 0 and buffer.pending() == 0  # second failure: given up on
+        assert buffer.stats()["dropped"] == 2
+        pool.close()
+
+
+if __name__ == "__main__":
+    test_batch_matches_per_event_writes()
+    test_size_trigger_and_group_commit()
+    test_failed_writes_are_retried_and_close_flushes()
+    test_bad_rows_are_dropped_and_retries_are_capped()
+    print("✅ Activity buffer tests passed")
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Tests for cached Clerk token verification (backend/auth.py)
+Signs tokens with throwaway RSA keys served from a local JWKS stub.
+"""
+
+import base64
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import rsa
+from jose import jwt
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+from auth import AuthError, JWKSCache, TokenVerifier
+from http_client import HTTPClient
+
+AUDIENCE = "pk_test_audience"
+ISSUER = "https://clerk.example.test"
+
+
+def b64url_uint(value):
+    raw = value.to_bytes((value.bit_length() + 7) // 8, "big")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+class SigningKey:
+    def __init__(self, kid):
+        self.kid = kid
+        self.public, self.private = rsa.newkeys(768)  # small keys keep the test fast
+
+    def jwk(self):
+        return {"kid": self.kid, "kty": "RSA", "alg": "RS256", "use": "sig",
+                "n": b64url_uint(self.public.n), "e": b64url_uint(self.public.e)}
+
+    def token(self, sub="user_1", ttl=60, **claims):
+        now = int(time.time())
+        claims = dict({"sub": sub, "aud": AUDIENCE, "iss": ISSUER, "iat": now, "exp": now + ttl}, **claims)
+        return jwt.encode(claims, self.private.save_pkcs1().decode(), algorithm="RS256", headers={"kid": self.kid})
+
+
+class JWKSStub:
+    """Serves whatever keys are in .keys and counts requests"""
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                stub.requests += 1
+                body = json.dumps({"keys": [key.jwk() for key in stub.keys]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/.well-known/jwks.json"
+
+    def close(self):
+        self.server.shutdown()
+
+
+def make_verifier(stub, **kwargs):
+    client = HTTPClient()
+    jwks = JWKSCache(stub.url, client, **kwargs)
+    return jwks, TokenVerifier(jwks, AUDIENCE, ISSUER), client
+
+
+def test_verified_tokens_are_cached_until_exp():
+    key = SigningKey("k1")
+    stub = JWKSStub([key])
+    jwks, verifier, client = make_verifier(stub)
+    try:
+        token = key.token()
+        assert verifier.verify(token)["sub"] == "user_1"
+        assert verifier.verify(token)["sub"] == "user_1"
+        stats = verifier.stats()
+        assert stats["verifications"] == 1 and stats["cache_hits"] == 1
+        assert stub.requests == 1  # fetched lazily on the first unknown kid
+
+        short = key.token(sub="user_2", ttl=1)
+        verifier.verify(short)
+        time.sleep(2.1)  # jose compares exp against whole seconds
+        try:
+            verifier.verify(short)
+            assert False, "expected AuthError for an expired token"
+        except AuthError as e:
+            assert "expired" in str(e).lower()
+    finally:
+        client.close()
+        stub.close()
+
+
+def test_bad_tokens_are_rejected_and_not_cached():
+    key, other = SigningKey("k1"), SigningKey("k1")  # same kid, different key pair
+    stub = JWKSStub([key])
+    jwks, verifier, client = make_verifier(stub)
+    try:
+        for token in (other.token(), key.token(aud="someone-else"), "not-a-jwt"):
+            try:
+                verifier.verify(token)
+                assert False, "expected AuthError"
+            except AuthError:
+                pass
+        assert verifier.stats()["failures"] == 3
+        assert verifier.stats()["cached_tokens"] == 0
+    finally:
+        client.close()
+        stub.close()
+
+
+def test_unknown_kid_refetches_with_rate_limit():
+    old, new = SigningKey("old"), SigningKey("new")
+    stub = JWKSStub([old])
+    jwks, verifier, client = make_verifier(stub, min_refetch_interval=0.5)
+    try:
+        jwks.refresh()
+        verifier.verify(old.token())
+        stub.keys = [old, new]  # Clerk rotates in a new key
+        time.sleep(0.6)
+        assert verifier.verify(new.token())["sub"] == "user_1"
+        assert stub.requests == 2
+
+        # A burst of unknown kids triggers at most one fetch per interval
+        forged = [SigningKey(f"forged-{n}").token() for n in range(5)]
+        time.sleep(0.6)
+        for token in forged:
+            try:
+                verifier.verify(token)
+            except AuthError:
+                pass
+        assert stub.requests == 3
+        assert jwks.stats()["refetches_skipped"] >= 4
+    finally:
+        client.close()
+        stub.close()
+
+
+if __name__ == "__main__":
+    test_verified_tokens_are_cached_until_exp()
+    test_bad_tokens_are_rejected_and_not_cached()
+    test_unknown_kid_refetches_with_rate_limit()
+    print("✅ Auth tests passed")
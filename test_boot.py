@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests for startup timing and deferred initialisation (backend/boot.py)
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+from boot import BootTimer, Deferred
+
+
+def spawn_thread(fn):
+    threading.Thread(target=fn, daemon=True).start()
+
+
+def test_background_start_runs_once_and_ensure_waits():
+    calls = []
+    release = threading.Event()
+
+    def slow_init():
+        calls.append(1)
+        release.wait(5)
+
+    timer = BootTimer()
+    deferred = Deferred("init_db", slow_init, timer)
+    deferred.start(spawn_thread)
+    deferred.start(spawn_thread)
+    try:
+        deferred.ensure(timeout=0.05)
+        assert False, "expected TimeoutError while init is still running"
+    except TimeoutError:
+        pass
+    release.set()
+    deferred.ensure(timeout=5)
+    deferred.ensure()
+    assert calls == [1]
+    assert deferred.done and "init_db" in timer.report()["phases_ms"]
+
+
+def test_ensure_runs_inline_when_never_started():
+    calls = []
+    deferred = Deferred("jwks_prefetch", lambda: calls.append(threading.current_thread()))
+    deferred.ensure()
+    assert calls == [threading.current_thread()]
+
+
+def test_failures_are_reported_to_every_caller():
+    def broken():
+        raise ValueError("disk full")
+
+    deferred = Deferred("init_db", broken)
+    for _ in range(2):
+        try:
+            deferred.ensure()
+            assert False, "expected RuntimeError"
+        except RuntimeError as e:
+            assert "disk full" in str(e)
+
+
+def test_failed_init_is_retried_after_a_backoff():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ValueError("database is locked")
+
+    deferred = Deferred("init_db", flaky, backoff=0.05)
+    for expected_attempts in (1, 1):  # the second call is inside the backoff: no new attempt
+        try:
+            deferred.ensure()
+            assert False, "expected RuntimeError"
+        except RuntimeError as e:
+            assert "database is locked" in str(e)
+        assert len(attempts) == expected_attempts
+    time.sleep(0.06)
+    try:
+        deferred.ensure()
+        assert False, "expected RuntimeError"
+    except RuntimeError:
+        pass
+    assert len(attempts) == 2 and deferred.failures == 2
+    try:
+        deferred.ensure()  # inside the doubled backoff
+        assert False, "expected RuntimeError"
+    except RuntimeError:
+        pass
+    time.sleep(0.11)
+    deferred.ensure()
+    deferred.ensure()
+    assert len(attempts) == 3 and deferred.failures == 0 and deferred.error is None
+
+
+def test_boot_report():
+    timer = BootTimer(started=time.perf_counter())
+    with timer.phase("create_app"):
+        time.sleep(0.01)
+    report = timer.report()
+    assert not report["ready"] and report["phases_ms"]["create_app"] >= 10
+    timer.mark_ready()
+    assert timer.report()["ready"] and "create_app" in timer.summary()
+
+
+if __name__ == "__main__":
+    test_background_start_runs_once_and_ensure_waits()
+    test_ensure_runs_inline_when_never_started()
+    test_failures_are_reported_to_every_caller()
+    test_failed_init_is_retried_after_a_backoff()
+    test_boot_report()
+    print("✅ Boot tests passed")
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming chat paths in backend/app.py: the SSE endpoint
+(/api/chat/stream) and the Socket.IO chat_stream / chat_cancel events.
+Runs against a local stub of the OpenRouter streaming API, no network needed.
+
+app.py monkey-patches the process with eventlet on import, so each case
+runs the app side in a child interpreter (this file, given the case name)
+while the stub and its bookkeeping stay in the test process.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TOKENS = ["Recursion ", "is ", "a function ", "calling ", "itself."]
+
+
+class StubOpenRouter(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests_seen = []
+    endless_closed = threading.Event()
+
+    def do_GET(self):
+        # /closed: whether an /endless stream has seen the app hang up
+        body = json.dumps({"closed": StubOpenRouter.endless_closed.is_set()}).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        StubOpenRouter.requests_seen.append(self.path)
+        if self.path == "/fail":
+            body = b'{"error": "upstream overloaded"}'
+            self.send_response(503)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        if self.path == "/slow":
+            time.sleep(1)
+            return
+        self.send_chunk(": OPENROUTER PROCESSING\n\n")
+        if self.path == "/endless":
+            try:
+                for _ in range(1000):
+                    self.send_chunk(self.token_line("more "))
+                    time.sleep(0.02)
+            except OSError:
+                StubOpenRouter.endless_closed.set()  # the app hung up on us
+            return
+        for token in TOKENS:
+            self.send_chunk(self.token_line(token))
+        self.send_chunk("data: [DONE]\n\n")
+
+    @staticmethod
+    def token_line(token):
+        return "data: " + json.dumps({"choices": [{"delta": {"content": token}}]}) + "\n\n"
+
+    def send_chunk(self, text):
+        self.wfile.write(text.encode())
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_server():
+    StubOpenRouter.requests_seen = []
+    StubOpenRouter.endless_closed.clear()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOpenRouter)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def run_case(case, url, read_timeout=5):
+    """Run one case_* function against the app in a child process"""
+    with tempfile.TemporaryDirectory() as temp_dir:  # the app's progress.db lands here
+        result = subprocess.run([sys.executable, os.path.abspath(__file__), case, url, str(read_timeout)],
+                                cwd=temp_dir, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, f"{case} failed:\n{result.stdout[-2000:]}\n{result.stderr[-3000:]}"
+
+
+# App side: runs in the child, with backend/app.py imported
+
+
+def load_app(url, read_timeout):
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+    import app
+    from http_client import HTTPClient
+    app.OPENROUTER_CHAT_URL = url
+    app.http_client = HTTPClient(read_timeout=read_timeout)
+    return app
+
+
+def sse_frames(body):
+    frames = []
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n")
+        assert event.startswith("event: ") and data.startswith("data: ")
+        frames.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return frames
+
+
+def post_stream(app, prompt):
+    response = app.app.test_client().post("/api/chat/stream", json={"prompt": prompt})
+    assert response.status_code == 200 and response.mimetype == "text/event-stream"
+    return sse_frames(response.get_data(as_text=True))
+
+
+def case_stream(app):
+    frames = post_stream(app, "explain recursion")
+    assert frames[:-1] == [("token", {"token": token}) for token in TOKENS]
+    assert frames[-1] == ("done", {"response": "".join(TOKENS)})
+    assert app.response_cache.get("explain recursion") == "".join(TOKENS)
+    # Asked again: served from the cache, the stub sees one request only
+    assert post_stream(app, "Explain recursion?")[-1] == ("done", {"response": "".join(TOKENS)})
+
+
+def case_fallback(app):
+    prompt = "how do python loops work"
+    fallback = app.get_enhanced_local_response(prompt)
+    assert post_stream(app, prompt) == [("token", {"token": fallback}), ("done", {"response": fallback})]
+    assert app.response_cache.get(prompt) is None  # fallbacks are never cached
+
+
+def wait_for(client, event, timeout=5):
+    deadline = time.monotonic() + timeout
+    seen = []
+    while time.monotonic() < deadline:
+        seen += client.get_received()
+        matches = [message["args"][0] for message in seen if message["name"] == event]
+        if matches:
+            return matches
+        time.sleep(0.02)
+    raise AssertionError(f"no {event} within {timeout}s, got {[message['name'] for message in seen]}")
+
+
+def case_cancel(app):
+    client = app.socketio.test_client(app.app)
+    ack = client.emit("chat_stream", {"prompt": "tell me everything", "streamId": "s1"}, callback=True)
+    assert ack == {"streamId": "s1"}
+    assert wait_for(client, "chat_token")[0] == {"streamId": "s1", "token": "more "}
+    client.emit("chat_cancel", {"streamId": "s1"})
+    assert wait_for(client, "chat_cancelled") == [{"streamId": "s1"}]
+    assert app.chat_streams == {}
+    assert app.response_cache.get("tell me everything") is None
+    # Still connected to the app, so only the cancel can have closed the upstream stream
+    closed_url = app.OPENROUTER_CHAT_URL.rsplit("/", 1)[0] + "/closed"
+    deadline = time.monotonic() + 5
+    while not app.http_client.get(closed_url).json()["closed"]:
+        assert time.monotonic() < deadline, "upstream kept streaming after cancel"
+        time.sleep(0.05)
+    client.disconnect()
+
+
+# Test side
+
+
+def test_sse_framing_done_event_and_cache_fill():
+    server, base_url = start_stub_server()
+    try:
+        run_case("case_stream", f"{base_url}/ok")
+        assert StubOpenRouter.requests_seen == ["/ok"]
+    finally:
+        server.shutdown()
+
+
+def test_fallback_on_5xx_and_timeout():
+    for path in ("/fail", "/slow"):
+        server, base_url = start_stub_server()
+        try:
+            run_case("case_fallback", f"{base_url}{path}", read_timeout=0.2)
+            assert StubOpenRouter.requests_seen == [path]
+        finally:
+            server.shutdown()
+
+
+def test_cancel_stops_the_upstream_read():
+    server, base_url = start_stub_server()
+    try:
+        run_case("case_cancel", f"{base_url}/endless")
+        assert StubOpenRouter.endless_closed.is_set()
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4:
+        globals()[sys.argv[1]](load_app(sys.argv[2], float(sys.argv[3])))
+    else:
+        test_sse_framing_done_event_and_cache_fill()
+        test_fallback_on_5xx_and_timeout()
+        test_cancel_stops_the_upstream_read()
+        print("✅ Chat stream tests passed")
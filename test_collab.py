@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for incremental code sync (backend/collab.py)
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+from collab import Document, EditRejected, apply_edit, transform
+from state_backend import MemoryState, SQLiteState
+
+
+def edit(pos, delete=0, insert=""):
+    return {"pos": pos, "delete": delete, "insert": insert}
+
+
+def test_concurrent_edits_keep_both_intentions():
+    doc = Document("def f():\n    return 1\n")
+    # Both clients start from version 0
+    doc.apply(edit(6, 0, "x"), 0, "alice")  # def f(x):
+    version, applied = doc.apply(edit(20, 1, "2"), 0, "bob")  # return 2
+    assert doc.text == "def f(x):\n    return 2\n"
+    assert version == 2 and applied == edit(21, 1, "2")
+
+
+def test_same_position_insert_goes_after_the_applied_one():
+    assert transform(edit(3, 0, "B"), edit(3, 0, "A")) == edit(4, 0, "B")
+    # Deleting text someone else already replaced shrinks to nothing
+    assert transform(edit(2, 3), edit(1, 5, "zz")) == edit(3, 0, "")
+    # An overlapping delete keeps the other side's insert
+    text = apply_edit("abcdef", edit(1, 5, "zz"))
+    assert apply_edit(text, transform(edit(0, 2, "Q"), edit(1, 5, "zz"))) == "Qzz"
+    assert apply_edit("abcXdef", transform(edit(0, 3), edit(3, 0, "X"))) == "Xdef"
+
+
+def test_own_edits_are_not_transformed_again():
+    doc = Document("abc")
+    doc.apply(edit(3, 0, "d"), 0, "alice")
+    # alice types again before her first ack: still based on version 0, but after her own "d"
+    doc.apply(edit(4, 0, "e"), 0, "alice")
+    assert doc.text == "abcde"
+
+
+
+def test_own_edits_after_a_foreign_one_are_rejected_not_misplaced():
+    doc = Document("abcdef")
+    doc.apply(edit(3, 0, "Y"), 0, "bob")
+    doc.apply(edit(0, 0, "XXXX"), 0, "alice")
+    assert doc.text == "XXXXabcYdef"
+    try:
+        # Typed after "XXXX", before its ack: its position assumes no "Y", but "Y" lies between
+        doc.apply(edit(5, 0, "Z"), 0, "alice")
+        assert False, "expected EditRejected"
+    except EditRejected:
+        pass
+    assert doc.text == "XXXXabcYdef" and doc.version == 2
+    # Once alice has seen version 2 her edits place normally again
+    doc.apply(edit(5, 0, "Z"), 2, "alice")
+    assert doc.text == "XXXXaZbcYdef"
+
+
+def test_bad_and_stale_edits_are_rejected():
+    doc = Document("abc", history_size=3)
+    for bad, base in ((edit(2, 5), 0), ({"pos": "1"}, 0), (edit(0, 0, "x"), 7), (edit(0), None)):
+        try:
+            doc.apply(bad, base, "alice")
+            assert False, f"expected EditRejected for {bad} @ {base}"
+        except EditRejected:
+            pass
+    for n in range(5):
+        doc.apply(edit(0, 0, str(n)), doc.version, "bob")
+    try:
+        doc.apply(edit(0, 0, "late"), 1, "alice")  # version 1's successors are gone from the history
+        assert False, "expected EditRejected for a base older than the history"
+    except EditRejected:
+        pass
+    assert doc.snapshot() == {"version": 5, "code": "43210abc"}
+    assert Document.from_dict(doc.to_dict()).snapshot() == doc.snapshot()
+
+
+def test_state_backends_keep_one_document_per_interview():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for state in (MemoryState(), SQLiteState(os.path.join(temp_dir, "state.db"))):
+            state.create_interview("room1", [])
+            state.edit_document("room1", lambda doc: doc.apply(edit(0, 0, "print(1)"), 0, "a"))
+            version, _ = state.edit_document("room1", lambda doc: doc.apply(edit(6, 1, "2"), 1, "a"))
+            assert version == 2 and state.document_snapshot("room1") == {"version": 2, "code": "print(2)"}
+            state.delete_interview("room1")
+            assert state.document_snapshot("room1") is None
+            try:
+                state.edit_document("room1", lambda doc: doc.apply(edit(0), 0, "a"))
+                assert False, "expected EditRejected for a closed room"
+            except EditRejected:
+                pass
+
+
+if __name__ == "__main__":
+    test_concurrent_edits_keep_both_intentions()
+    test_same_position_insert_goes_after_the_applied_one()
+    test_own_edits_are_not_transformed_again()
+    test_own_edits_after_a_foreign_one_are_rejected_not_misplaced()
+    test_bad_and_stale_edits_are_rejected()
+    test_state_backends_keep_one_document_per_interview()
+    print("✅ Collab tests passed")
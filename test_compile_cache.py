@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for the compiled artifact cache (backend/compile_cache.py)
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+from compile_cache import CompileCache
+
+
+def build(temp_dir, name, size):
+    build_dir = os.path.join(temp_dir, f"build-{name}")
+    os.makedirs(build_dir)
+    with open(os.path.join(build_dir, "main.c"), "w") as f:
+        f.write("int main(){}")
+    with open(os.path.join(build_dir, "main"), "wb") as f:
+        f.write(b"x" * size)
+    return build_dir
+
+
+def test_hit_after_store_and_restart():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = os.path.join(temp_dir, "cache")
+        cache = CompileCache(root)
+        key = cache.key(["gcc", "main.c", "-o", "main"], "main.c", "int main(){}")
+        with cache.checkout(key) as path:
+            assert path is None
+        cache.store(key, build(temp_dir, "a", 10), exclude=["main.c"])
+        with cache.checkout(key) as path:
+            assert os.listdir(path) == ["main"]
+
+        restarted = CompileCache(root)
+        with restarted.checkout(key) as path:
+            assert path is not None
+        assert restarted.stats()["hit_rate"] == 1.0
+
+
+def test_key_depends_on_command_and_source():
+    key = CompileCache.key(["gcc", "main.c"], "main.c", "int main(){}")
+    assert key != CompileCache.key(["gcc", "-O2", "main.c"], "main.c", "int main(){}")
+    assert key != CompileCache.key(["gcc", "main.c"], "main.c", "int main(){return 1;}")
+
+
+def test_lru_eviction_skips_checked_out_builds():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = CompileCache(os.path.join(temp_dir, "cache"), max_bytes=250)
+        cache.store("a", build(temp_dir, "a", 100))
+        cache.store("b", build(temp_dir, "b", 100))
+        with cache.checkout("a") as path_a:
+            cache.store("c", build(temp_dir, "c", 100))
+            assert os.path.exists(path_a)
+        stats = cache.stats()
+        assert stats["evictions"] == 1 and stats["bytes"] <= 250
+        with cache.checkout("b") as path_b:
+            assert path_b is None
+
+
+if __name__ == "__main__":
+    test_hit_after_store_and_restart()
+    test_key_depends_on_command_and_source()
+    test_lru_eviction_skips_checked_out_builds()
+    print("✅ Compile cache tests passed")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for the pooled SQLite connections (backend/db.py)
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+from db import ConnectionPool, PoolExhausted
+
+
+def make_pool(temp_dir, **kwargs):
+    pool = ConnectionPool(os.path.join(temp_dir, "progress.db"), **kwargs)
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE logins (id INTEGER PRIMARY KEY, user_id INTEGER)")
+        conn.commit()
+    return pool
+
+
+def test_connections_are_reused_in_wal_mode():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pool = make_pool(temp_dir)
+        with pool.connection() as first:
+            assert first.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert first.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        with pool.connection() as second:
+            assert second is first
+        assert pool.stats()["opened"] == 1
+        pool.close()
+
+
+def test_uncommitted_work_is_rolled_back_on_release():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pool = make_pool(temp_dir)
+        conn = pool.acquire()
+        conn.execute("INSERT INTO logins (user_id) VALUES (1)")
+        pool.release(conn)  # e.g. a route that returned early
+        with pool.connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM logins").fetchone()[0] == 0
+        assert pool.stats()["rollbacks"] == 1
+        pool.close()
+
+
+def test_exhausted_pool_times_out():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pool = make_pool(temp_dir, size=1, timeout=0.1)
+        held = pool.acquire()
+        try:
+            pool.acquire()
+            assert False, "expected PoolExhausted"
+        except PoolExhausted:
+            pass
+        pool.release(held)
+        with pool.connection() as conn:
+            assert conn is held
+        pool.close()
+
+
+if __name__ == "__main__":
+    test_connections_are_reused_in_wal_mode()
+    test_uncommitted_work_is_rolled_back_on_release()
+    test_exhausted_pool_times_out()
+    print("✅ DB pool tests passed")
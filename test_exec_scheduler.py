@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for the bounded execution scheduler (backend/exec_scheduler.py)
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+from exec_scheduler import ExecutionScheduler, QueueFull
+
+
+def test_concurrency_is_bounded_per_language():
+    lock = threading.Lock()
+    running = {"now": 0, "peak": 0}
+
+    def fake_run(code, language):
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        time.sleep(0.05)
+        with lock:
+            running["now"] -= 1
+        return {"success": True, "output": code}
+
+    scheduler = ExecutionScheduler(fake_run, workers={"c": 2}, max_queue=50)
+    jobs = [scheduler.submit(str(i), "c") for i in range(8)]
+    for job in jobs:
+        assert job.done.wait(5)
+    assert running["peak"] == 2
+    assert [job.result["output"] for job in jobs] == [str(i) for i in range(8)]
+    assert scheduler.get(jobs[0].id).status == "done"
+
+
+def test_admission_control_rejects_when_saturated():
+    release = threading.Event()
+    scheduler = ExecutionScheduler(lambda code, language: release.wait(5) and {}, workers={"java": 1}, max_queue=2)
+    scheduler.submit("a", "java")
+    time.sleep(0.05)  # let the single worker pick up the first job
+    scheduler.submit("b", "java")
+    scheduler.submit("c", "java")
+    try:
+        scheduler.submit("d", "java")
+        assert False, "queue should be full"
+    except QueueFull as e:
+        assert e.retry_after >= 1
+    finally:
+        release.set()
+    assert scheduler.stats()["lanes"]["java"]["rejected"] == 1
+
+
+def test_language_aliases():
+    scheduler = ExecutionScheduler(lambda code, language: {"language": language})
+    assert scheduler.supports("C++") and not scheduler.supports("cobol")
+    assert scheduler.run("", "c++") == {"language": "cpp"}
+
+
+if __name__ == "__main__":
+    test_concurrency_is_bounded_per_language()
+    test_admission_control_rejects_when_saturated()
+    test_language_aliases()
+    print("✅ Execution scheduler tests passed")
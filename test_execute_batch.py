@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Tests for /api/execute_batch in backend/app.py: per-case verdicts, the
+timeLimit checks and the JSON error when the batch outlives its wait.
+
+app.py monkey-patches the process with eventlet on import, so each case
+runs in a child interpreter (this file, given the case name).
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+DOUBLER = """n = input()
+if n == "loop":
+    while True:
+        pass
+print(int(n) * 2)
+"""
+
+
+def run_case(case):
+    """Run one case_* function against the app in a child process"""
+    with tempfile.TemporaryDirectory() as temp_dir:  # the app's progress.db lands here
+        result = subprocess.run([sys.executable, os.path.abspath(__file__), case],
+                                cwd=temp_dir, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, f"{case} failed:\n{result.stdout[-2000:]}\n{result.stderr[-3000:]}"
+
+
+# App side: runs in the child, with backend/app.py imported
+
+
+def load_app():
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+    import app
+    return app
+
+
+def post_batch(app, **body):
+    return app.app.test_client().post("/api/execute_batch", json=body)
+
+
+def case_verdicts(app):
+    response = post_batch(app, code=DOUBLER, language="python", timeLimit=1, testCases=[
+        {"input": "2", "expected": "4"},
+        {"input": "3", "expected": "7"},
+        {"input": "loop", "expected": "0"},
+        {"input": "x", "expected": "0"},
+        {"input": "5", "expected": "10  \n\n"},
+        {"input": "6"}
+    ])
+    assert response.status_code == 200
+    result = response.get_json()
+    assert [case["verdict"] for case in result["cases"]] == [
+        "Accepted", "Wrong Answer", "Time Limit Exceeded", "Runtime Error", "Accepted", "Completed"]
+    assert result["passed"] == 3 and result["total"] == 6 and not result["success"]
+    assert result["cases"][1]["output"] == "6\n"
+    assert "ValueError" in result["cases"][3]["error"]
+
+
+def case_compile_error(app):
+    response = post_batch(app, code="int main( {", language="c", testCases=[{"input": "", "expected": ""}] * 2)
+    result = response.get_json()
+    assert response.status_code == 200 and result["error"].startswith("Compilation failed")
+    assert [case["verdict"] for case in result["cases"]] == ["Compilation Error"] * 2
+    assert result["passed"] == 0
+
+
+def case_time_limits(app):
+    for time_limit in ("nan", "inf", "-inf", -1, 0, "soon"):
+        response = post_batch(app, code="print(1)", language="python", timeLimit=time_limit,
+                              testCases=[{"input": ""}])
+        assert response.status_code == 400, time_limit
+    # Over the total budget: 50 cases x 10 s
+    response = post_batch(app, code="print(1)", language="python", timeLimit=10, testCases=[{"input": ""}] * 50)
+    assert response.status_code == 400 and "may not exceed" in response.get_json()["error"]
+    # Clamped to 10 s, not rejected
+    assert post_batch(app, code="print(1)", language="python", timeLimit=60,
+                      testCases=[{"input": ""}]).status_code == 200
+
+
+def case_wait_timeout_is_json(app):
+    def never_finishes(*args, **kwargs):
+        assert kwargs["timeout"] == 2 * 3 + app.BATCH_WAIT_MARGIN
+        raise TimeoutError("Execution did not finish in time")
+    app.execution_scheduler.run = never_finishes
+    response = post_batch(app, code="print(1)", language="python", timeLimit=3, testCases=[{"input": ""}] * 2)
+    assert response.status_code == 504 and response.get_json() == {"error": "Execution did not finish in time"}
+
+
+# Test side
+
+
+def test_verdicts():
+    run_case("case_verdicts")
+
+
+def test_compile_error():
+    if shutil.which("gcc") is None:
+        return
+    run_case("case_compile_error")
+
+
+def test_time_limits_are_validated_and_budgeted():
+    run_case("case_time_limits")
+
+
+def test_wait_timeout_returns_json():
+    run_case("case_wait_timeout_is_json")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 2:
+        globals()[sys.argv[1]](load_app())
+    else:
+        test_verdicts()
+        test_compile_error()
+        test_time_limits_are_validated_and_budgeted()
+        test_wait_timeout_returns_json()
+        print("✅ Batch execution tests passed")
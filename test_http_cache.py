@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Tests for the versioned ETag response cache (backend/http_cache.py)
+"""
+
+import os
+import sys
+import time
+
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+from http_cache import HttpCache
+
+
+def make_app(cache, data):
+    app = Flask(__name__)
+    builds = []
+
+    def build():
+        builds.append(1)
+        return dict(data)
+
+    @app.route("/progress/<int:user_id>")
+    def progress(user_id):
+        return cache.respond("progress", ("user", user_id), build, private=True)
+
+    return app.test_client(), builds
+
+
+def test_repeat_polls_skip_the_build_and_get_304s():
+    cache = HttpCache(ttl=60)
+    data = {"pdfCount": 1}
+    client, builds = make_app(cache, data)
+    first = client.get("/progress/1")
+    etag = first.headers["ETag"]
+    assert first.json == {"pdfCount": 1} and first.headers["Cache-Control"] == "private, no-cache"
+    for _ in range(5):
+        assert client.get("/progress/1", headers={"If-None-Match": etag}).status_code == 304
+    assert len(builds) == 1
+    assert cache.stats()["not_modified"] == 5
+
+    # A write to another user leaves this entry alone; a write to this one rebuilds it
+    cache.bump(("user", 2))
+    assert client.get("/progress/1", headers={"If-None-Match": etag}).status_code == 304
+    data["pdfCount"] = 2
+    cache.bump(("user", 1))
+    changed = client.get("/progress/1", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.json == {"pdfCount": 2} and changed.headers["ETag"] != etag
+    assert len(builds) == 2
+
+
+def test_ttl_rebuilds_but_unchanged_bodies_keep_their_etag():
+    cache = HttpCache(ttl=0.05, max_entries=1)
+    client, builds = make_app(cache, {"pdfCount": 1})
+    etag = client.get("/progress/1").headers["ETag"]
+    time.sleep(0.06)
+    # Rebuilt after the TTL, same bytes, so the client's copy is still good
+    assert client.get("/progress/1", headers={"If-None-Match": etag}).status_code == 304
+    assert len(builds) == 2
+    client.get("/progress/2")
+    assert cache.stats()["entries"] == 1 and cache.stats()["evictions"] == 1
+
+
+if __name__ == "__main__":
+    test_repeat_polls_skip_the_build_and_get_304s()
+    test_ttl_rebuilds_but_unchanged_bodies_keep_their_etag()
+    print("✅ HTTP cache tests passed")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Tests for the pooled outbound HTTP client (backend/http_client.py)
+Runs against a local keep-alive stub server, no network needed.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+from http_client import HTTPClient, HostBusyError
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        if self.path.startswith("/slow"):
+            time.sleep(0.5)
+        body = json.dumps({"keys": [], "path": self.path}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_connections_are_reused():
+    server, base_url = start_stub_server()
+    client = HTTPClient()
+    try:
+        for _ in range(5):
+            assert client.get(f"{base_url}/jwks").json()["keys"] == []
+        stats = client.stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 4
+    finally:
+        client.close()
+        server.shutdown()
+
+
+def test_per_host_limit():
+    server, base_url = start_stub_server()
+    client = HTTPClient(per_host_limit=1, acquire_timeout=0.1)
+    try:
+        slow = threading.Thread(target=client.get, args=(f"{base_url}/slow",))
+        slow.start()
+        time.sleep(0.1)
+        assert client.stats()["in_flight"] == {server_netloc(base_url): 1}
+        try:
+            client.get(f"{base_url}/blocked")
+            assert False, "second request should not get a slot"
+        except HostBusyError:
+            pass
+        slow.join()
+        assert client.get(f"{base_url}/free").status_code == 200
+    finally:
+        client.close()
+        server.shutdown()
+
+
+def test_streams_have_their_own_limit():
+    server, base_url = start_stub_server()
+    client = HTTPClient(per_host_limit=1, stream_limit=2, acquire_timeout=0.1)
+    try:
+        with client.stream("GET", f"{base_url}/chat1"), client.stream("GET", f"{base_url}/chat2"):
+            assert client.stats()["streams"] == {server_netloc(base_url): 2}
+            # Open chats don't hold up a plain request...
+            assert client.get(f"{base_url}/jwks").status_code == 200
+            # ...but the stream cap still applies to streams
+            try:
+                with client.stream("GET", f"{base_url}/chat3"):
+                    pass
+                assert False, "third stream should not get a slot"
+            except HostBusyError:
+                pass
+        with client.stream("GET", f"{base_url}/chat4") as response:
+            assert response.status_code == 200
+    finally:
+        client.close()
+        server.shutdown()
+
+
+def test_read_timeout_is_separate():
+    server, base_url = start_stub_server()
+    client = HTTPClient(connect_timeout=1, read_timeout=0.1)
+    try:
+        try:
+            client.get(f"{base_url}/slow")
+            assert False, "slow response should hit the read timeout"
+        except requests.exceptions.ReadTimeout:
+            pass
+        assert client.get(f"{base_url}/slow", read_timeout=2).status_code == 200
+    finally:
+        client.close()
+        server.shutdown()
+
+
+def server_netloc(base_url):
+    return base_url.split("//", 1)[1]
+
+
+if __name__ == "__main__":
+    test_connections_are_reused()
+    test_per_host_limit()
+    test_streams_have_their_own_limit()
+    test_read_timeout_is_separate()
+    print("✅ HTTP client tests passed")
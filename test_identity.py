@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for clerk_id -> user resolution (backend/identity.py)
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+from identity import User, UserDirectory
+from migrations import migrate
+
+
+def test_lookups_are_cached_and_bounded():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    directory = UserDirectory(max_entries=2)
+    assert directory.resolve(conn, "ghost") is None
+    alice = directory.resolve(conn, "alice", "Alice", create=True)
+    assert alice == User(1, "alice", "Alice")
+    # Cached: the row is no longer consulted
+    conn.execute("UPDATE users SET username = 'changed'")
+    assert directory.resolve(conn, "alice") == alice
+    directory.resolve(conn, "bob", "Bob", create=True)
+    directory.resolve(conn, "alice")
+    directory.resolve(conn, "carol", "Carol", create=True)  # evicts bob, the least recently used
+    stats = directory.stats()
+    assert stats["size"] == 2 and stats["evictions"] == 1 and stats["created"] == 3
+    assert directory.resolve(conn, "bob").id == 2 and directory.stats()["misses"] == 5
+
+
+def test_concurrent_first_requests_get_one_row():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "progress.db")
+        setup = sqlite3.connect(path)
+        migrate(setup)
+        setup.close()
+        directory = UserDirectory()
+        barrier = threading.Barrier(8)
+        ids = []
+
+        def first_request():
+            conn = sqlite3.connect(path, timeout=5)
+            barrier.wait()
+            ids.append(directory.resolve(conn, "new_user", "New", create=True).id)
+            conn.close()
+
+        threads = [threading.Thread(target=first_request) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        conn = sqlite3.connect(path)
+        assert conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 1
+        assert set(ids) == {1} and directory.stats()["created"] == 1
+        conn.close()
+
+
+if __name__ == "__main__":
+    test_lookups_are_cached_and_bounded()
+    test_concurrent_first_requests_get_one_row()
+    print("✅ Identity tests passed")
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Tests for the local-response intent router (backend/intent_router.py)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+from intent_router import classify_prompt
+
+
+def test_priority_matches_original_chain():
+    assert classify_prompt("Write a Python function") == "python"
+    assert classify_prompt("javascript closures") == "javascript"
+    assert classify_prompt("explain this algorithm") == "programming"
+    assert classify_prompt("Help me with calculus") == "calculus"
+    assert classify_prompt("solve this algebra equation") == "algebra"
+    assert classify_prompt("a formula for speed") == "math"
+    assert classify_prompt("tips for my exams") == "study"
+    assert classify_prompt("physics experiments") == "science"
+    assert classify_prompt("Hello! What can you do?") == "greeting"
+    assert classify_prompt("tell me about the roman empire") == "general"
+
+
+def test_whole_words_only():
+    assert classify_prompt("Is this right?") == "general"
+    assert classify_prompt("adjust the margins") == "general"
+    assert classify_prompt("his car") == "general"
+    assert classify_prompt("is C++ hard?") == "programming"
+    assert classify_prompt("loops and arrays") == "programming"
+
+
+if __name__ == "__main__":
+    test_priority_matches_original_chain()
+    test_whole_words_only()
+    print("✅ Intent router tests passed")
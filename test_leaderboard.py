@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for the Fenwick-tree aptitude leaderboard (backend/leaderboard.py)
+"""
+
+import os
+import random
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+from leaderboard import FenwickTree, Leaderboard
+from migrations import migrate
+
+
+def test_fenwick_prefix_sums_and_lower_bound():
+    tree = FenwickTree(10)
+    for index, count in [(0, 2), (3, 1), (7, 4)]:
+        tree.add(index, count)
+    assert [tree.prefix_sum(i) for i in (0, 2, 3, 6, 7, 9)] == [2, 2, 3, 3, 7, 7]
+    assert [tree.lower_bound(k) for k in (1, 2, 3, 4, 7)] == [0, 0, 3, 7, 7]
+
+
+def test_rank_and_top_match_group_by():
+    rng = random.Random(7)
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    board = Leaderboard(max_score=20)
+    for user_id in range(1, 41):
+        conn.execute("INSERT INTO users (id, clerk_id, username) VALUES (?, ?, ?)",
+                     (user_id, f"user_{user_id}", f"student{user_id}"))
+    for n in range(300):
+        user_id, score, at = rng.randint(1, 40), rng.randint(0, 25), f"2024-01-01T00:{n // 60:02d}:{n % 60:02d}"
+        conn.execute("INSERT INTO aptitude_scores (user_id, score, timestamp) VALUES (?, ?, ?)", (user_id, score, at))
+        board.record(user_id, score, f"student{user_id}", at)
+
+    best = dict(conn.execute("SELECT user_id, MAX(score) FROM aptitude_scores GROUP BY user_id"))
+    for user_id, score in best.items():
+        assert board.rank(user_id) == 1 + sum(1 for s in best.values() if s > score)
+    expected_scores = sorted(best.values(), reverse=True)[:10]
+    assert [row["score"] for row in board.top(10)] == expected_scores
+
+    # The migration backfills aptitude_best, and load() rebuilds the same board
+    conn2 = sqlite3.connect(":memory:")
+    migrate(conn2, target=2)
+    conn2.executemany("INSERT INTO users (id, clerk_id, username) VALUES (?, ?, ?)",
+                      conn.execute("SELECT id, clerk_id, username FROM users").fetchall())
+    conn2.executemany("INSERT INTO aptitude_scores (user_id, score, timestamp) VALUES (?, ?, ?)",
+                      conn.execute("SELECT user_id, score, timestamp FROM aptitude_scores").fetchall())
+    conn2.commit()
+    migrate(conn2)
+    rebuilt = Leaderboard()
+    assert rebuilt.load(conn2) == len(best)
+    assert rebuilt.top(10) == board.top(10)
+    assert all(rebuilt.rank(u) == board.rank(u) for u in best)
+
+
+def test_only_personal_best_moves_a_student():
+    board = Leaderboard(max_score=5)
+    assert board.record(1, 3, "ada", "t1")
+    assert not board.record(1, 2, "ada", "t2")
+    assert board.record(2, 3, "bob", "t3")
+    assert board.top() == [{"username": "ada", "score": 3}, {"username": "bob", "score": 3}]
+    assert board.record(2, 50, "bob", "t4")  # beyond max_score: tree grows
+    assert board.rank(2) == 1 and board.rank(1) == 2
+    assert board.rank(99) is None
+
+
+def test_out_of_range_scores_are_skipped_not_fatal():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    conn.executemany("INSERT INTO users (id, clerk_id, username) VALUES (?, ?, ?)",
+                     [(1, "a", "ada"), (2, "b", "bob"), (3, "c", "cy")])
+    # Rows an unchecked route could have stored: used to hang load() or exhaust memory growing the tree
+    conn.executemany("INSERT INTO aptitude_best (user_id, score, achieved_at) VALUES (?, ?, ?)",
+                     [(1, -5, "t1"), (2, 2 ** 40, "t2"), (3, 7, "t3")])
+    board = Leaderboard(max_score=10, score_limit=100)
+    assert board.load(conn) == 1
+    assert board.top() == [{"username": "cy", "score": 7}]
+    assert not board.record(1, 2 ** 40, "ada", "t4")
+    assert board.rank(1) is None
+    try:
+        FenwickTree(4).add(-1, 1)
+        assert False, "expected IndexError for a negative index"
+    except IndexError:
+        pass
+
+
+if __name__ == "__main__":
+    test_fenwick_prefix_sums_and_lower_bound()
+    test_rank_and_top_match_group_by()
+    test_only_personal_best_moves_a_student()
+    test_out_of_range_scores_are_skipped_not_fatal()
+    print("✅ Leaderboard tests passed")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for the bucketed matchmaking queue (backend/matchmaking.py)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+from matchmaking import Matchmaker, QueueSizeBroadcaster, criteria
+
+
+def user(sid):
+    return {"sid": sid, "userId": f"user_{sid}", "username": sid}
+
+
+def test_fifo_matching_without_criteria():
+    mm = Matchmaker()
+    assert mm.find_or_enqueue(user("a"), *criteria({})) is None
+    assert mm.find_or_enqueue(user("b"), *criteria({}))["sid"] == "a"
+    assert len(mm) == 0
+    mm.find_or_enqueue(user("c"))
+    mm.remove("c")
+    mm.find_or_enqueue(user("d"))
+    assert mm.find_or_enqueue(user("e"))["sid"] == "d" and len(mm) == 0
+
+
+def test_buckets_separate_languages_and_skill_bands():
+    mm = Matchmaker(skill_band=100)
+    assert mm.find_or_enqueue(user("py"), "python", "easy", 450) is None
+    assert mm.find_or_enqueue(user("js"), "javascript", "easy", 450) is None
+    assert mm.find_or_enqueue(user("far"), "python", "easy", 900) is None
+    assert len(mm) == 3
+
+    partner = mm.find_or_enqueue(user("near"), "python", "easy", 530)  # adjacent band
+    assert partner["sid"] == "py"
+    assert "js" in mm and "far" in mm and "near" not in mm
+
+
+def test_longest_waiting_neighbour_wins():
+    mm = Matchmaker(skill_band=100)
+    mm.find_or_enqueue(user("older"), "python", "any", 350)
+    mm.find_or_enqueue(user("newer"), "python", "any", 150)  # two bands below older
+    assert mm.find_or_enqueue(user("x"), "python", "any", 280)["sid"] == "older"
+
+
+def test_remove_is_indexed_and_requeue_replaces():
+    mm = Matchmaker()
+    for n in range(1000):
+        mm.find_or_enqueue(user(f"s{n}"), "python", "any", n * 1000)
+    assert mm.remove("s500") and not mm.remove("s500") and "s500" not in mm
+    mm.find_or_enqueue(user("s10"), "python", "easy", 0)  # searching again moves s10
+    assert "s10" in mm and mm.stats()["waiting"] == len(mm) == 999
+
+
+def test_criteria_normalisation():
+    assert criteria({"language": "Python", "skill": "42"}) == ("python", "any", 42)
+    assert criteria({"skill": "lots"}) == ("any", "any", 0)
+
+
+def test_broadcaster_coalesces_changes():
+    mm = Matchmaker()
+    sent = []
+    updates = QueueSizeBroadcaster(lambda: len(mm), sent.append)
+    for n in range(5):
+        mm.find_or_enqueue(user(f"s{n}"), "python", "any", n * 1000)
+        updates.changed()
+    assert updates.flush() and not updates.flush()
+    mm.remove("s0")
+    mm.remove("s1")
+    updates.flush()
+    assert sent == [{"waiting": 5, "delta": 5}, {"waiting": 3, "delta": -2}]
+    assert updates.snapshot() == {"waiting": 3, "delta": 0}
+
+
+def test_shared_broadcaster_emits_after_every_change():
+    sent = []
+    updates = QueueSizeBroadcaster(lambda: 0, sent.append, shared=True)
+    updates.flush()  # another process may have told clients a different size
+    assert sent == [{"waiting": 0, "delta": 0}]
+
+
+if __name__ == "__main__":
+    test_fifo_matching_without_criteria()
+    test_buckets_separate_languages_and_skill_bands()
+    test_longest_waiting_neighbour_wins()
+    test_remove_is_indexed_and_requeue_replaces()
+    test_criteria_normalisation()
+    test_broadcaster_coalesces_changes()
+    test_shared_broadcaster_emits_after_every_change()
+    print("✅ Matchmaking tests passed")
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Tests for ticked presence broadcasts (backend/presence.py)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+from presence import Presence
+from state_backend import MemoryState
+
+
+def make_presence():
+    sent = []
+    presence = Presence(MemoryState(), lambda event, payload, room=None: sent.append((event, payload, room)))
+    return presence, sent
+
+
+def test_connect_storm_is_one_broadcast_per_tick():
+    presence, sent = make_presence()
+    for sid in range(100):
+        presence.connected(sid)
+    assert sent == []  # nothing goes out between ticks
+    assert presence.flush() == 1
+    assert sent == [("online_users_count", 100, None)]
+
+    presence.connected("late")
+    presence.disconnected("late")
+    assert presence.flush() == 0  # back to the value clients already have
+    assert presence.stats()["broadcasts"] == 1
+
+
+def test_room_presence_counts_and_disconnects():
+    presence, sent = make_presence()
+    for sid in ("a", "b", "c"):
+        presence.connected(sid)
+    presence.join("room1", "a")
+    presence.join("room1", "b")
+    presence.join("room2", "c")
+    presence.flush()
+    rooms = {room: payload["count"] for event, payload, room in sent if event == "room_presence"}
+    assert rooms == {"room1": 2, "room2": 1}
+
+    sent.clear()
+    presence.disconnected("b")
+    presence.leave("room2", "c")  # room2 is now empty: nobody left to notify
+    presence.flush()
+    assert sent == [("online_users_count", 2, None), ("room_presence", {"room": "room1", "count": 1}, "room1")]
+    assert presence.room_count("room1") == 1 and presence.room_count("room2") == 0
+
+
+if __name__ == "__main__":
+    test_connect_storm_is_one_broadcast_per_tick()
+    test_room_presence_counts_and_disconnects()
+    print("✅ Presence tests passed")
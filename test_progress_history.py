@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Tests for windowed, paginated detailed progress (backend/progress_history.py)
+"""
+
+import os
+import random
+import sqlite3
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+import rollups
+from migrations import migrate
+from progress_history import history_page, legacy_history, parse_query
+
+
+def make_history(days=400, seed=5):
+    """User 1 with a patchy year of logins and activity, user 2 as noise"""
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    for offset in range(days):
+        day = (start + timedelta(days=offset)).isoformat()
+        for user_id in (1, 2):
+            if rng.random() < 0.5:
+                conn.execute("INSERT INTO logins (user_id, login_date) VALUES (?, ?)", (user_id, day))
+            if rng.random() < 0.4:
+                typ, value = rng.choice(["pdf", "video", "quantum"]), rng.randint(1, 4)
+                conn.execute("INSERT INTO activities (user_id, activity_type, value, activity_date) VALUES (?, ?, ?, ?)",
+                             (user_id, typ, value, day))
+                rollups.record_activity(conn, user_id, typ, value, day)
+    conn.commit()
+    return conn
+
+
+def all_pages(conn, args):
+    pages, cursor = [], None
+    while True:
+        page = history_page(conn, 1, parse_query(dict(args, cursor=cursor) if cursor else args))
+        pages.append(page)
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_no_parameters_keeps_the_legacy_payload():
+    conn = make_history(days=30)
+    assert parse_query({}) is None
+    legacy = legacy_history(conn, 1)
+    assert set(legacy) == {"logins", "activities"}
+    paged = history_page(conn, 1, parse_query({"limit": "1000"}))
+    assert paged["logins"] == sorted(legacy["logins"]) and paged["activities"] == legacy["activities"]
+    assert paged["next_cursor"] is None
+
+
+def test_day_pages_cover_the_range_exactly_once():
+    conn = make_history()
+    legacy = legacy_history(conn, 1)
+    pages = all_pages(conn, {"from": "2024-03-01", "to": "2024-12-31", "limit": "45"})
+    assert all(len(set(page["logins"]) | set(page["activities"])) <= 45 for page in pages)
+    # Newest page first, each page oldest to newest
+    assert max(pages[1]["activities"]) < min(pages[0]["activities"])
+    logins = [day for page in reversed(pages) for day in page["logins"]]
+    assert logins == sorted(day for day in legacy["logins"] if "2024-03-01" <= day <= "2024-12-31")
+    activities = {day: totals for page in pages for day, totals in page["activities"].items()}
+    assert activities == {day: totals for day, totals in legacy["activities"].items() if "2024-03-01" <= day <= "2024-12-31"}
+
+
+def test_month_and_week_buckets_in_columns():
+    conn = make_history()
+    legacy = legacy_history(conn, 1)
+    pages = all_pages(conn, {"bucket": "month", "format": "columns", "limit": "5"})
+    periods = [period for page in reversed(pages) for period in page["periods"]]
+    assert periods == [f"2024-{month:02d}-01" for month in range(1, 13)] + ["2025-01-01", "2025-02-01"]
+    february = pages[-1]["periods"].index("2024-02-01")
+    assert pages[-1]["logins"][february] == sum(day.startswith("2024-02") for day in legacy["logins"])
+    for typ in pages[-1]["types"]:
+        assert len(pages[-1]["values"][typ]) == len(pages[-1]["periods"])
+        assert pages[-1]["values"][typ][february] == sum(
+            totals.get(typ, 0) for day, totals in legacy["activities"].items() if day.startswith("2024-02"))
+
+    week = history_page(conn, 1, parse_query({"bucket": "week", "from": "2024-01-03", "to": "2024-01-21"}))
+    # 2024-01-01 is a Monday: the partial first week keeps its Monday label
+    assert list(week["activities"]) == ["2024-01-01", "2024-01-08", "2024-01-15"][-len(week["activities"]):]
+    assert set(week["logins"]) <= {"2024-01-01", "2024-01-08", "2024-01-15"}
+
+
+def test_from_in_mid_bucket_counts_only_days_in_range():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    # 2024-01-01 is a Monday; from = Wednesday of that week
+    for day in ("2024-01-01", "2024-01-02", "2024-01-03", "2024-01-05", "2024-01-09"):
+        conn.execute("INSERT INTO logins (user_id, login_date) VALUES (1, ?)", (day,))
+        conn.execute("INSERT INTO activities (user_id, activity_type, value, activity_date) VALUES (1, 'pdf', 2, ?)", (day,))
+        rollups.record_activity(conn, 1, "pdf", 2, day)
+    conn.commit()
+    week = history_page(conn, 1, parse_query({"bucket": "week", "format": "columns", "from": "2024-01-03"}))
+    assert week["periods"] == ["2024-01-01", "2024-01-08"]
+    assert week["logins"] == [2, 1] and week["values"] == {"pdf": [4, 2]}
+    month = history_page(conn, 1, parse_query({"bucket": "month", "from": "2024-01-05", "to": "2024-01-31"}))
+    assert month["logins"] == {"2024-01-01": 2} and month["activities"] == {"2024-01-01": {"pdf": 4}}
+
+
+def test_bad_parameters_are_rejected():
+    page = history_page(make_history(days=60), 1, parse_query({"limit": "10"}))
+    for args in ({"bucket": "year"}, {"format": "csv"}, {"limit": "0"}, {"limit": "x"}, {"from": "2024-13-01"},
+                 {"from": "2024-02-01", "to": "2024-01-01"}, {"cursor": "!!"},
+                 {"cursor": page["next_cursor"], "bucket": "week"}):
+        try:
+            parse_query(args)
+            assert False, f"expected ValueError for {args}"
+        except ValueError:
+            pass
+
+
+if __name__ == "__main__":
+    test_no_parameters_keeps_the_legacy_payload()
+    test_day_pages_cover_the_range_exactly_once()
+    test_month_and_week_buckets_in_columns()
+    test_from_in_mid_bucket_counts_only_days_in_range()
+    test_bad_parameters_are_rejected()
+    print("✅ Progress history tests passed")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Tests for the warm Python worker pool (backend/python_pool.py)
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+from python_pool import PoolUnavailable, PythonWorkerPool
+from sandbox import ResourceLimits
+
+
+def test_runs_code_in_isolated_namespace():
+    pool = PythonWorkerPool(size=1, max_runs=10)
+    try:
+        result = pool.run("x = 41\nprint(x + 1)")
+        assert result["success"] and result["stdout"] == "42\n"
+        result = pool.run("print(x)")
+        assert not result["success"]
+        assert "NameError" in result["stderr"]
+        assert 'File "main.py"' in result["stderr"]
+        pool.run("print = None")
+        assert pool.run("print('ok')")["stdout"] == "ok\n"
+    finally:
+        pool.shutdown()
+
+
+def test_timeout_and_crash_recycle_worker():
+    pool = PythonWorkerPool(size=1, max_runs=10)
+    try:
+        result = pool.run("while True: pass", timeout=0.5)
+        assert result["timed_out"] and not result["success"]
+        # Exiting only ends the run's forked child; the worker carries on
+        result = pool.run("import os; os._exit(1)")
+        assert not result["success"] and "code 1" in result["stderr"]
+        result = pool.run("import os, signal; os.kill(os.getppid(), signal.SIGKILL)")  # the worker itself
+        assert not result["success"]
+        assert pool.run("print('alive')")["stdout"] == "alive\n"
+        stats = pool.stats()
+        assert stats["timeouts"] == 1 and stats["crashes"] == 1
+        assert stats["recycled"] == 2
+    finally:
+        pool.shutdown()
+
+
+def test_changes_made_by_one_run_are_gone_in_the_next():
+    pool = PythonWorkerPool(size=1, max_runs=10)
+    try:
+        result = pool.run("import json, math, threading, time\n"
+                          "json.dumps = lambda *a, **k: 'ACCEPTED'\n"
+                          "math.pi = 3\n"
+                          "threading.Thread(target=time.sleep, args=(60,), daemon=True).start()\n"
+                          "print('patched')")
+        assert result["success"] and result["stdout"] == "patched\n"
+        result = pool.run("import json, math, threading\nprint(json.dumps([1]), math.pi, threading.active_count())")
+        assert result["stdout"] == "[1] 3.141592653589793 1\n"
+        result = pool.run("print(1/0)")
+        assert not result["success"] and "ZeroDivisionError" in result["stderr"]
+        assert len({w["pid"] for w in pool.stats()["workers"]}) == 1  # same warm worker throughout
+    finally:
+        pool.shutdown()
+
+
+def test_unstartable_pool_fails_fast_instead_of_hanging():
+    pool = PythonWorkerPool(size=1, python="/bin/false", acquire_timeout=5)
+    try:
+        started = time.monotonic()
+        try:
+            pool.run("print(1)")
+            assert False, "expected PoolUnavailable"
+        except PoolUnavailable:
+            pass
+        assert time.monotonic() - started < 5
+        assert pool.stats()["unavailable"] == 1
+    finally:
+        pool.shutdown()
+
+
+def test_worker_recycled_after_max_runs():
+    pool = PythonWorkerPool(size=1, max_runs=2)
+    try:
+        pids = set()
+        for _ in range(4):
+            pool.run("print(1)")
+            pids.update(w["pid"] for w in pool.stats()["workers"])
+        assert len(pids) >= 2
+        assert pool.stats()["recycled"] == 2
+    finally:
+        pool.shutdown()
+
+
+def test_limits_stop_runaway_code_without_killing_worker():
+    limits = ResourceLimits(cpu_seconds=1, memory_mb=512, output_kb=4)
+    pool = PythonWorkerPool(size=1, max_runs=10, limits=limits)
+    try:
+        result = pool.run("while True: print('spam')")
+        assert result["limit"] == "output" and len(result["stdout"]) == 4096
+        if os.name == "posix":
+            result = pool.run("while True: pass", timeout=5)
+            assert result["limit"] == "cpu" and not result["timed_out"]
+            result = pool.run("a = []\nwhile True: a.append(bytearray(1 << 20))", timeout=5)
+            assert result["limit"] == "memory"
+        assert pool.run("print('alive')")["stdout"] == "alive\n"
+        assert pool.stats()["crashes"] == 0
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    test_runs_code_in_isolated_namespace()
+    test_timeout_and_crash_recycle_worker()
+    test_changes_made_by_one_run_are_gone_in_the_next()
+    test_unstartable_pool_fails_fast_instead_of_hanging()
+    test_worker_recycled_after_max_runs()
+    test_limits_stop_runaway_code_without_killing_worker()
+    print("✅ Python pool tests passed")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Schema migration tests (backend/migrations.py) and an EXPLAIN QUERY PLAN
+regression check: every hot query in backend/app.py must be answered from
+an index, never by scanning a whole table.
+"""
+
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+from migrations import MIGRATIONS, current_version, migrate
+
+# (name, sql, params) as issued by the progress and aptitude routes
+HOT_QUERIES = [
+    ("user by clerk id", "SELECT id FROM users WHERE clerk_id = ?", ("user_1",)),
+    ("user and name by clerk id", "SELECT id, username FROM users WHERE clerk_id = ?", ("user_1",)),
+    ("record_login insert", "INSERT OR IGNORE INTO logins (user_id, login_date) VALUES (?, ?)", (1, "2024-01-01")),
+    ("logins for streak", "SELECT login_date FROM logins WHERE user_id = ? ORDER BY login_date", (1,)),
+    ("detailed logins", "SELECT login_date FROM logins WHERE user_id = ?", (1,)),
+    ("activity totals",
+     "SELECT activity_type, SUM(value), COUNT(*) FROM activities WHERE user_id = ? GROUP BY activity_type", (1,)),
+    ("activities by day",
+     """SELECT activity_date, activity_type, SUM(value) FROM activities
+        WHERE user_id = ? GROUP BY activity_date, activity_type""", (1,)),
+    ("recent activities",
+     """SELECT activity_date, activity_type, SUM(value) FROM activities
+        WHERE user_id = ? AND activity_date >= ?
+        GROUP BY activity_date, activity_type ORDER BY activity_date DESC""", (1, "2024-01-01")),
+    ("aptitude summary",
+     "SELECT COUNT(*), MAX(score), AVG(score) FROM aptitude_scores WHERE user_id = ?", (1,)),
+    ("dashboard summary", "SELECT login_days, current_streak FROM user_summary WHERE user_id = ?", (1,)),
+    ("daily activity",
+     "SELECT activity_date, activity_type, total FROM daily_activity WHERE user_id = ?", (1,)),
+    ("recent daily activity",
+     """SELECT activity_date, activity_type, total FROM daily_activity
+        WHERE user_id = ? AND activity_date >= ? ORDER BY activity_date DESC, activity_type""", (1, "2024-01-01")),
+    ("global stats",
+     "SELECT name, value FROM global_stats WHERE name IN (?, ?, ?)", ("users", "logins", "activities")),
+    ("best score upsert",
+     """INSERT INTO aptitude_best (user_id, score, achieved_at) VALUES (?, ?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET score = excluded.score, achieved_at = excluded.achieved_at
+        WHERE excluded.score > aptitude_best.score""", (1, 5, "2024-01-01")),
+]
+
+# "SCAN logins" is a full table scan; "SCAN s USING COVERING INDEX ..." only reads an index
+FULL_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+
+def fresh_db():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    conn.executemany("INSERT INTO users (clerk_id, username) VALUES (?, ?)",
+                     [(f"user_{i}", f"student{i}") for i in range(50)])
+    conn.executemany("INSERT INTO activities (user_id, activity_type, value, activity_date) VALUES (?, ?, ?, ?)",
+                     [(i % 50 + 1, "pdf", 1, f"2024-01-{i % 28 + 1:02d}") for i in range(500)])
+    conn.commit()
+    return conn
+
+
+def test_hot_queries_use_indexes():
+    conn = fresh_db()
+    for name, sql, params in HOT_QUERIES:
+        plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+        scans = [step for step in plan if FULL_SCAN.match(step)]
+        assert not scans, f"{name} scans a table: {plan}"
+
+
+def test_migrate_is_idempotent_and_versioned():
+    conn = sqlite3.connect(":memory:")
+    latest = max(version for version, _, _ in MIGRATIONS)
+    assert migrate(conn, target=1) == [1]
+    assert current_version(conn) == 1
+    assert migrate(conn) == list(range(2, latest + 1))
+    assert migrate(conn) == []
+    assert current_version(conn) == latest
+
+
+def test_duplicate_logins_are_collapsed_before_unique_index():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn, target=1)
+    conn.executemany("INSERT INTO logins (user_id, login_date) VALUES (?, ?)",
+                     [(1, "2024-01-01"), (1, "2024-01-01"), (1, "2024-01-02")])
+    conn.commit()
+    migrate(conn)
+    assert conn.execute("SELECT COUNT(*) FROM logins").fetchone()[0] == 2
+    conn.execute("INSERT OR IGNORE INTO logins (user_id, login_date) VALUES (1, '2024-01-02')")
+    assert conn.execute("SELECT COUNT(*) FROM logins").fetchone()[0] == 2
+
+
+def test_concurrent_migrate_skips_what_the_lock_holder_applied():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "progress.db")
+        first, second = sqlite3.connect(path), sqlite3.connect(path, timeout=10, check_same_thread=False)
+        migrate(first, target=4)
+        first.execute("BEGIN IMMEDIATE")  # another process, mid-migration
+        outcome = {}
+
+        def migrate_second():
+            try:
+                outcome["applied"] = migrate(second)
+            except Exception as e:
+                outcome["error"] = e
+
+        waiter = threading.Thread(target=migrate_second)
+        waiter.start()
+        time.sleep(0.3)  # second has read version 4 and now waits for the write lock
+        version, _, fn = next(m for m in MIGRATIONS if m[0] == 5)
+        fn(first)
+        first.execute(f"PRAGMA user_version = {version}")
+        first.commit()
+        waiter.join(10)
+        assert "error" not in outcome, outcome.get("error")
+        assert 5 not in outcome["applied"] and current_version(second) == max(m[0] for m in MIGRATIONS)
+        first.close()
+        second.close()
+
+
+if __name__ == "__main__":
+    test_hot_queries_use_indexes()
+    test_migrate_is_idempotent_and_versioned()
+    test_duplicate_logins_are_collapsed_before_unique_index()
+    test_concurrent_migrate_skips_what_the_lock_holder_applied()
+    print("✅ Migration and query plan tests passed")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tests for the tutoring response cache (backend/response_cache.py)
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+from response_cache import ResponseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_exact_hit_ignores_case_and_punctuation():
+    cache = ResponseCache()
+    cache.put("Explain recursion", [], "Recursion is...")
+    assert cache.get("  explain   RECURSION? ") == "Recursion is..."
+    assert cache.stats()["exact_hits"] == 1
+
+
+def test_near_duplicate_hit():
+    cache = ResponseCache()
+    cache.put("write a factorial function in python", [], "def factorial(n): ...")
+    assert cache.get("write a factorial funtion in python") == "def factorial(n): ..."
+    assert cache.stats()["near_hits"] == 1
+    assert cache.get("write a fibonacci function in java") is None
+    cache.put("Explain recursion", [], "Recursion is...")
+    assert cache.get("explain recursion please?") == "Recursion is..."
+    assert cache.get("please explain the recursion") == "Recursion is..."
+
+
+def test_one_changed_word_is_not_a_near_duplicate():
+    cache = ResponseCache()
+    pairs = [
+        ("how to sort a list in descending order", "how to sort a list in ascending order"),
+        ("how do i find the minimum element in an array", "how do i find the maximum element in an array"),
+        ("is an array faster than a linked list", "is a linked list faster than an array"),
+    ]
+    for cached, asked in pairs:
+        cache.put(cached, [], f"answer to: {cached}")
+    for cached, asked in pairs:
+        assert cache.get(asked) is None, asked
+        assert cache.get(cached) == f"answer to: {cached}"
+    assert cache.stats()["near_hits"] == 0
+
+
+def test_numbers_and_history_change_the_key():
+    cache = ResponseCache()
+    cache.put("what is 12 + 30", [], "42")
+    assert cache.get("what is 12 + 31") is None
+    cache.put("write a bubble sort program in c++", [], "std::sort...")
+    assert cache.get("write a bubble sort program in c") is None
+    assert cache.get("write a bubble sort program in c#") is None
+    assert cache.get("write a bubble sort program in java") is None
+    assert cache.get("write a buble sort program in c++") == "std::sort..."
+    history = [{"role": "user", "content": "we are talking about java"}]
+    cache.put("show me a loop", history, "for (int i = 0; ...)")
+    assert cache.get("show me a loop") is None
+    assert cache.get("show me a loop", history) == "for (int i = 0; ...)"
+
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = ResponseCache(ttl=60, clock=clock)
+    cache.put("explain recursion", [], "Recursion is...")
+    clock.now += 61
+    assert cache.get("explain recursion") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_lru_and_memory_ceiling():
+    cache = ResponseCache(max_entries=2)
+    cache.put("explain recursion", [], "a")
+    cache.put("explain polymorphism", [], "b")
+    cache.get("explain recursion")
+    cache.put("explain closures", [], "c")
+    assert cache.get("explain polymorphism") is None
+    assert cache.get("explain recursion") == "a"
+
+    small = ResponseCache(max_bytes=4096)
+    for i in range(10):
+        small.put(f"topic number {i}", [], "x" * 1000)
+    assert small.stats()["bytes"] <= 4096
+    assert small.stats()["evictions"] > 0
+
+
+def test_sqlite_persistence():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "cache.db")
+        ResponseCache(db_path=db_path).put("explain recursion", [], "Recursion is...")
+        restored = ResponseCache(db_path=db_path)
+        assert restored.get("explain recursion") == "Recursion is..."
+
+
+if __name__ == "__main__":
+    test_exact_hit_ignores_case_and_punctuation()
+    test_near_duplicate_hit()
+    test_one_changed_word_is_not_a_near_duplicate()
+    test_numbers_and_history_change_the_key()
+    test_ttl_expiry()
+    test_lru_and_memory_ceiling()
+    test_sqlite_persistence()
+    print("✅ Response cache tests passed")
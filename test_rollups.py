@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-user progress rollups (backend/rollups.py)
+"""
+
+import os
+import random
+import sqlite3
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+import rollups
+from migrations import migrate
+
+
+def simulate(conn, rng, days=60, users=5):
+    """Drive the write paths the way the routes do, day by day"""
+    start = date(2024, 1, 1)
+    for offset in range(days):
+        day = (start + timedelta(days=offset)).isoformat()
+        for user_id in range(1, users + 1):
+            if rng.random() < 0.6:
+                cur = conn.execute("INSERT OR IGNORE INTO logins (user_id, login_date) VALUES (?, ?)", (user_id, day))
+                if cur.rowcount:
+                    rollups.record_login(conn, user_id, day)
+            for _ in range(rng.randint(0, 3)):
+                typ, value = rng.choice(["pdf", "video", "quantum", "test", "aptitude", "other"]), rng.randint(1, 5)
+                conn.execute("INSERT INTO activities (user_id, activity_type, value, activity_date) VALUES (?, ?, ?, ?)",
+                             (user_id, typ, value, day))
+                rollups.record_activity(conn, user_id, typ, value, day)
+            if rng.random() < 0.1:
+                score = rng.randint(0, 10)
+                conn.execute("INSERT INTO aptitude_scores (user_id, score, timestamp) VALUES (?, ?, ?)",
+                             (user_id, score, day))
+                rollups.record_aptitude(conn, user_id, score)
+        conn.commit()
+
+
+def streaks_from_scratch(days):
+    """(current, longest): runs of consecutive days, current being the one ending at the last login"""
+    runs = []
+    for day in sorted(date.fromisoformat(d) for d in days):
+        if runs and day - runs[-1][-1] == timedelta(days=1):
+            runs[-1].append(day)
+        else:
+            runs.append([day])
+    return (len(runs[-1]), max(len(run) for run in runs)) if runs else (0, 0)
+
+
+def test_incremental_rollups_match_raw_tables_and_backfill():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    simulate(conn, random.Random(3))
+
+    for user_id in range(1, 6):
+        summary = rollups.get_summary(conn, user_id)
+        days = [row[0] for row in conn.execute("SELECT login_date FROM logins WHERE user_id = ?", (user_id,))]
+        assert summary["login_days"] == len(days)
+        assert (summary["current_streak"], summary["longest_streak"]) == streaks_from_scratch(days)
+        for typ, total, count in conn.execute(
+                "SELECT activity_type, SUM(value), COUNT(*) FROM activities WHERE user_id = ? GROUP BY activity_type",
+                (user_id,)):
+            if typ in rollups.SUMMARY_ACTIVITY_TYPES:
+                assert (summary[f"{typ}_total"], summary[f"{typ}_count"]) == (total, count)
+        tests, best, score_sum = conn.execute(
+            "SELECT COUNT(*), MAX(score), SUM(score) FROM aptitude_scores WHERE user_id = ?", (user_id,)).fetchone()
+        assert (summary["aptitude_tests"], summary["aptitude_best"], summary["aptitude_score_sum"]) == \
+            (tests, best or 0, score_sum or 0)
+        recent = rollups.recent_activity(conn, user_id, "2024-02-20")
+        expected = conn.execute("""SELECT activity_date, activity_type, SUM(value) FROM activities
+                                   WHERE user_id = ? AND activity_date >= ?
+                                   GROUP BY activity_date, activity_type
+                                   ORDER BY activity_date DESC, activity_type""", (user_id, "2024-02-20")).fetchall()
+        assert recent == expected
+
+    incremental = {u: rollups.get_summary(conn, u) for u in range(1, 6)}
+    daily = conn.execute("SELECT * FROM daily_activity ORDER BY 1, 2, 3").fetchall()
+    assert rollups.backfill(conn) == 5
+    assert {u: rollups.get_summary(conn, u) for u in range(1, 6)} == incremental
+    assert conn.execute("SELECT * FROM daily_activity ORDER BY 1, 2, 3").fetchall() == daily
+
+
+def test_missing_summary_reads_as_zeros():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    summary = rollups.get_summary(conn, 42)
+    assert summary["login_days"] == 0 and summary["last_login_date"] is None
+
+
+if __name__ == "__main__":
+    test_incremental_rollups_match_raw_tables_and_backfill()
+    test_missing_summary_reads_as_zeros()
+    print("✅ Rollup tests passed")
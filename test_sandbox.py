@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests for the measured program runner (backend/sandbox.py)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+from sandbox import ResourceLimits, run_program
+
+
+def test_feeds_stdin_and_measures_the_run():
+    result = run_program([sys.executable, "-c", "print(int(input()) * 2)"], stdin="21\n")
+    assert result["returncode"] == 0 and not result["timed_out"]
+    assert result["stdout"] == "42\n"
+    assert result["wall_time"] > 0
+    if os.name == "posix":
+        assert result["cpu_time"] is not None
+        assert result["peak_rss_kb"] > 0
+
+
+def test_peak_memory_tracks_the_child_not_the_server():
+    ballast = bytearray(64 * 1024 * 1024)  # inflate this process, not the child
+    result = run_program([sys.executable, "-c", "pass"])
+    if result["peak_rss_kb"] is not None and sys.platform.startswith("linux"):
+        assert result["peak_rss_kb"] < len(ballast) // 1024
+    big = run_program([sys.executable, "-c", "import time; x = bytearray(32 * 1024 * 1024); time.sleep(0.1)"])
+    if big["peak_rss_kb"] is not None:
+        assert big["peak_rss_kb"] >= 32 * 1024
+
+
+def test_timeout_kills_the_program():
+    result = run_program([sys.executable, "-c", "while True: pass"], timeout=0.5)
+    assert result["timed_out"]
+    assert result["returncode"] != 0
+    assert result["wall_time"] < 5
+
+
+def test_nonzero_exit_and_stderr():
+    result = run_program([sys.executable, "-c", "import sys; sys.exit('boom')"])
+    assert result["returncode"] == 1
+    assert "boom" in result["stderr"]
+
+
+def test_limits_report_which_one_stopped_the_program():
+    if os.name != "posix":
+        return
+    limits = ResourceLimits(cpu_seconds=1, memory_mb=512, output_kb=16)
+    spin = run_program([sys.executable, "-c", "while True: pass"], timeout=10, limits=limits)
+    assert spin["limit"] == "cpu" and not spin["timed_out"]
+    assert spin["wall_time"] < 5
+    flood = run_program([sys.executable, "-c", "while True: print('spam')"], limits=limits)
+    assert flood["limit"] == "output"
+    assert len(flood["stdout"]) <= 16 * 1024
+    fine = run_program([sys.executable, "-c", "print('ok')"], limits=limits)
+    assert fine["limit"] is None and fine["stdout"] == "ok\n"
+
+
+def test_memory_verdict_and_opt_in_process_cap():
+    if os.name != "posix":
+        return
+    import resource
+    limits = ResourceLimits(cpu_seconds=5, memory_mb=128)
+    hog = run_program([sys.executable, "-c", "a = []\nwhile True: a.append(bytearray(1 << 20))"],
+                      timeout=10, limits=limits)
+    assert hog["limit"] == "memory" and "MemoryError" in hog["stderr"]
+    show_nproc = [sys.executable, "-c", "import resource; print(resource.getrlimit(resource.RLIMIT_NPROC)[0])"]
+    # Off by default: the child keeps the server's own process limit
+    assert run_program(show_nproc, limits=limits)["stdout"] == f"{resource.getrlimit(resource.RLIMIT_NPROC)[0]}\n"
+    # On: headroom above the tasks the uid already runs, so threaded runtimes still start
+    capped = ResourceLimits(max_processes=16)
+    nproc = int(run_program(show_nproc, limits=capped)["stdout"])
+    assert nproc > 16
+    threads = run_program([sys.executable, "-c", "import threading\n"
+                           "ts = [threading.Thread(target=lambda: None) for _ in range(8)]\n"
+                           "[t.start() for t in ts]; [t.join() for t in ts]; print('ok')"], limits=capped)
+    assert threads["stdout"] == "ok\n" and threads["limit"] is None
+
+
+if __name__ == "__main__":
+    test_feeds_stdin_and_measures_the_run()
+    test_peak_memory_tracks_the_child_not_the_server()
+    test_timeout_kills_the_program()
+    test_nonzero_exit_and_stderr()
+    test_limits_report_which_one_stopped_the_program()
+    test_memory_verdict_and_opt_in_process_cap()
+    print("✅ Sandbox tests passed")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for the Socket.IO state backends and SQLite message queue (backend/state_backend.py)
+Two SQLiteState instances on one file stand in for two worker processes.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+from state_backend import MemoryState, SQLiteMessageQueue, SQLiteState, from_env, message_queue_options
+
+
+def user(sid):
+    return {"sid": sid, "userId": f"user_{sid}", "username": sid}
+
+
+def exercise(state):
+    assert state.add_online("a") == 1 and state.add_online("b") == 2
+    assert state.remove_online("a") == 1 and state.online_count() == 1
+
+    state.create_interview("room1", [user("a"), user("b")])
+    room = state.get_interview("room1")
+    room["users"][0]["role"] = "helper"
+    state.save_interview("room1", room)
+    assert state.get_interview("room1")["users"][0]["role"] == "helper"
+    state.delete_interview("room1")
+    assert state.get_interview("room1") is None
+
+    assert state.join_members("lobby", "ann") == ["ann"]
+    assert state.join_members("lobby", "bob") == ["ann", "bob"]
+    assert state.leave_members("lobby", "ann") == ["bob"]
+    assert state.leave_members("lobby", "bob") == []
+
+    state.join_presence("room1", "a")
+    state.join_presence("room1", "b")
+    state.join_presence("room2", "a")
+    assert state.presence_count("room1") == 2
+    assert sorted(state.drop_presence("a")) == ["room1", "room2"]
+    assert state.presence_count("room1") == 1 and state.presence_count("room2") == 0
+    state.leave_presence("room1", "b")
+    assert state.presence_count("room1") == 0
+
+    assert state.matchmaker.find_or_enqueue(user("a"), "python", "easy", 120) is None
+    assert state.matchmaker.find_or_enqueue(user("b"), "python", "easy", 150)["sid"] == "a"
+
+
+def test_memory_state():
+    exercise(MemoryState())
+
+
+def test_sqlite_state_is_shared_between_processes():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        exercise(SQLiteState(os.path.join(temp_dir, "single.db")))
+
+        path = os.path.join(temp_dir, "state.db")
+        worker1, worker2 = SQLiteState(path), SQLiteState(path)
+        worker1.add_online("x")
+        assert worker2.add_online("y") == 2
+        assert worker1.matchmaker.find_or_enqueue(user("x"), "java", "any", 0) is None
+        assert len(worker2.matchmaker) == 1
+        assert worker2.matchmaker.find_or_enqueue(user("y"), "java", "any", 0)["sid"] == "x"
+        assert len(worker1.matchmaker) == 0
+
+
+def test_rows_of_dead_workers_are_dropped():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "state.db")
+        alive, dead = SQLiteState(path, host_ttl=0.2), SQLiteState(path)
+        dead.add_online("gone")
+        dead.matchmaker.find_or_enqueue(user("gone"), "python", "any", 0)
+        alive.add_online("here")
+        time.sleep(0.3)
+        assert alive.heartbeat() == [dead.host]
+        assert alive.online_count() == 1 and len(alive.matchmaker) == 0
+
+
+def test_sqlite_message_queue_delivers_across_instances():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        url = "sqlite:///" + os.path.join(temp_dir, "queue.db")
+        sender = SQLiteMessageQueue(url, write_only=True, json=json)
+        receiver = SQLiteMessageQueue(url, json=json, poll_interval=0.01)
+        messages = receiver._listen()
+        sender._publish({"method": "emit", "event": "queue_size", "data": [{"waiting": 1}]})
+        sender._publish({"method": "emit", "event": "queue_size", "data": [{"waiting": 2}]})
+        received = [json.loads(next(messages)) for _ in range(2)]
+        assert [m["data"][0]["waiting"] for m in received] == [1, 2]
+
+
+def test_env_selection():
+    assert isinstance(from_env(), MemoryState)
+    assert message_queue_options("") == {}
+    assert message_queue_options("redis://localhost:6379/0") == {"message_queue": "redis://localhost:6379/0"}
+
+
+if __name__ == "__main__":
+    test_memory_state()
+    test_sqlite_state_is_shared_between_processes()
+    test_rows_of_dead_workers_are_dropped()
+    test_sqlite_message_queue_delivers_across_instances()
+    test_env_selection()
+    print("✅ State backend tests passed")
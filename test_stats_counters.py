@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for the materialized /api/stats counters (rollups.get_stats,
+rollups.reconcile_stats, backend/stats_counters.py)
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+import rollups
+from db import ConnectionPool
+from identity import UserDirectory
+from migrations import migrate
+from stats_counters import StatsReconciler
+
+
+def raw_stats(conn):
+    return {name: conn.execute(sql).fetchone()[0] for name, sql in rollups.STATS_QUERIES.items()}
+
+
+def test_write_paths_keep_counters_exact():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    rng = random.Random(2)
+    directory = UserDirectory()
+    for i in range(20):
+        directory.resolve(conn, f"user_{i % 8}", create=True)  # 8 users, the rest are repeat lookups
+    for _ in range(300):
+        user_id, day = rng.randint(1, 8), f"2024-01-{rng.randint(1, 28):02d}"
+        if conn.execute("INSERT OR IGNORE INTO logins (user_id, login_date) VALUES (?, ?)", (user_id, day)).rowcount:
+            rollups.record_login(conn, user_id, day)
+        typ, value = rng.choice(["pdf", "video", "other"]), rng.randint(1, 5)
+        conn.execute("INSERT INTO activities (user_id, activity_type, value, activity_date) VALUES (?, ?, ?, ?)",
+                     (user_id, typ, value, day))
+        rollups.record_activity(conn, user_id, typ, value, day)
+    conn.commit()
+    assert rollups.get_stats(conn) == raw_stats(conn)
+    assert rollups.get_stats(conn)["users"] == 8
+    assert rollups.reconcile_stats(conn) == {}
+
+
+def test_migration_seeds_existing_data():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn, target=5)
+    conn.executemany("INSERT INTO users (clerk_id, username) VALUES (?, ?)", [("a", "A"), ("b", "B")])
+    conn.execute("INSERT INTO logins (user_id, login_date) VALUES (1, '2024-01-01')")
+    conn.execute("INSERT INTO activities (user_id, activity_type, value, activity_date) VALUES (1, 'pdf', 7, '2024-01-01')")
+    conn.commit()
+    migrate(conn)
+    assert rollups.get_stats(conn) == {"users": 2, "logins": 1, "activities": 7}
+
+
+def test_reconciler_reports_and_fixes_drift():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pool = ConnectionPool(os.path.join(temp_dir, "progress.db"), size=2)
+        with pool.connection() as conn:
+            migrate(conn)
+            # Written behind the counters' back, as manual SQL would
+            conn.execute("INSERT INTO activities (user_id, activity_type, value, activity_date) VALUES (1, 'pdf', 4, '2024-01-01')")
+            conn.execute("UPDATE global_stats SET value = value + 3 WHERE name = 'users'")
+            conn.commit()
+        reported = []
+        reconciler = StatsReconciler(pool, on_drift=reported.append)
+        assert reconciler.reconcile() == {"users": 3, "activities": -4}
+        assert reported == [{"users": 3, "activities": -4}]
+        with pool.connection() as conn:
+            assert rollups.get_stats(conn) == {"users": 0, "logins": 0, "activities": 4}
+        assert reconciler.reconcile() == {}
+        stats = reconciler.stats()
+        assert stats["runs"] == 2 and stats["drifted_runs"] == 1 and stats["last_drift"] == {}
+        pool.close()
+
+
+if __name__ == "__main__":
+    test_write_paths_keep_counters_exact()
+    test_migration_seeds_existing_data()
+    test_reconciler_reports_and_fixes_drift()
+    print("✅ Stats counter tests passed")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Tests for the incremental login streak engine (backend/streaks.py)
+"""
+
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "backend"))
+import streaks
+
+
+def test_advance_transitions():
+    s = streaks.advance(streaks.EMPTY, streaks.to_ordinal("2024-02-27"))
+    assert (s.current, s.longest) == (1, 1)
+    s = streaks.advance(s, streaks.to_ordinal("2024-02-28"))
+    s = streaks.advance(s, streaks.to_ordinal("2024-02-29"))  # leap day
+    assert (s.current, s.longest) == (3, 3)
+    assert streaks.advance(s, s.last) == s  # same day
+    assert streaks.advance(s, s.last - 5) == s  # backdated
+    s = streaks.advance(s, streaks.to_ordinal("2024-03-05"))
+    assert (s.current, s.longest) == (1, 3)
+    assert streaks.to_iso(s.last) == "2024-03-05"
+
+
+def test_from_days_matches_replaying_advance():
+    rng = random.Random(11)
+    start = date(2023, 12, 1).toordinal()
+    days = [start + offset for offset in range(120) if rng.random() < 0.7]
+    shuffled = days + rng.sample(days, 10)
+    rng.shuffle(shuffled)
+
+    replayed = streaks.EMPTY
+    for day in days:
+        replayed = streaks.advance(replayed, day)
+    assert streaks.from_days(shuffled) == replayed
+
+    runs, run = [], 0
+    for prev, day in zip([None] + days, days):
+        run = run + 1 if prev is not None and day - prev == 1 else 1
+        runs.append(run)
+    assert replayed.current == runs[-1] and replayed.longest == max(runs)
+
+
+def test_empty_history():
+    assert streaks.from_days([]) == streaks.EMPTY
+    assert streaks.to_iso(None) is None
+    assert streaks.to_ordinal(date(2024, 1, 1) + timedelta(days=1)) == streaks.to_ordinal("2024-01-02")
+
+
+if __name__ == "__main__":
+    test_advance_transitions()
+    test_from_days_matches_replaying_advance()
+    test_empty_history()
+    print("✅ Streak tests passed")